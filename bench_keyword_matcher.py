@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+금지/크롤링 키워드 매칭 벤치마크
+
+기존 방식(키워드마다 `keyword.lower() in text`)과 KeywordMatcher(Aho-Corasick)로
+같은 본문들을 매칭해 글당 걸린 시간을 비교하고 결과가 같은지 확인합니다.
+
+사용법:
+    python bench_keyword_matcher.py                      # 키워드 3000개, 글 200개
+    BENCH_KEYWORDS=10000 BENCH_ARTICLES=500 python bench_keyword_matcher.py
+"""
+
+import os
+import random
+import time
+
+import main
+
+SYLLABLES = "가나다라마바사아자차카타파하정시수시입학컨설팅학원과외모집문의상담후기추천"
+
+
+def random_word(rng, low, high):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(low, high)))
+
+
+def build_dataset(keyword_count, article_count, seed=7):
+    rng = random.Random(seed)
+    keywords = list(dict.fromkeys(random_word(rng, 3, 6) for _ in range(keyword_count)))
+    articles = []
+    for _ in range(article_count):
+        words = [random_word(rng, 1, 4) for _ in range(rng.randint(200, 600))]
+        articles.append(" ".join(words))
+    return keywords, articles
+
+
+def naive_match(text, keywords):
+    text = text.lower()
+    return [keyword for keyword in keywords if keyword and keyword.lower() in text]
+
+
+def timed(func, articles):
+    start = time.perf_counter()
+    results = [func(article) for article in articles]
+    return time.perf_counter() - start, results
+
+
+def run_benchmark():
+    keyword_count = int(os.environ.get("BENCH_KEYWORDS", "3000"))
+    article_count = int(os.environ.get("BENCH_ARTICLES", "200"))
+    keywords, articles = build_dataset(keyword_count, article_count)
+    avg_len = sum(len(a) for a in articles) / len(articles)
+    print(f"========== [키워드 매칭 벤치마크] 키워드 {len(keywords)}개, 글 {len(articles)}개 (평균 {avg_len:.0f}자) ==========")
+
+    start = time.perf_counter()
+    matcher = main.KeywordMatcher(keywords)
+    build_time = time.perf_counter() - start
+
+    naive_time, naive_results = timed(lambda text: naive_match(text, keywords), articles)
+    matcher_time, matcher_results = timed(matcher.find, articles)
+
+    print("\n" + "=" * 60)
+    print(f"기존 루프      글당 {naive_time / len(articles) * 1000:8.3f}ms")
+    print(f"KeywordMatcher 글당 {matcher_time / len(articles) * 1000:8.3f}ms (오토마톤 생성 {build_time * 1000:.1f}ms, 1회)")
+    print(f"matcher/기존: {matcher_time / naive_time:.0%}, 결과 일치: {naive_results == matcher_results}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_benchmark()
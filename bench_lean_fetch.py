@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+경량 로딩(lean_fetch) 벤치마크
+
+기본 크롤러 브라우저와 경량 로딩 브라우저(CDP 리소스 차단 + eager 로딩)로
+같은 게시글들을 열어 글당 전송 바이트와 본문 표시까지 걸린 시간(time-to-content)을 비교합니다.
+경량 로딩 쪽은 Chrome 성능 로그로 실제 차단된 요청 수(resourceType별)와
+차단 패턴이 놓친 Image/Font/Media 요청 URL도 보여줍니다.
+
+사용법:
+    HEADLESS=true python bench_lean_fetch.py                 # visited_history.txt 최근 10개 글
+    HEADLESS=true python bench_lean_fetch.py URL1 URL2 ...   # 지정한 글
+    HEADLESS=true BENCH_COUNT=20 python bench_lean_fetch.py
+"""
+
+import collections
+import json
+import os
+import sys
+import time
+import statistics
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+import main
+
+# 최상위 문서 + cafe_main iframe의 전송 바이트 합계 (차단된 요청은 집계되지 않음)
+TRANSFER_SIZE_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return entries.reduce((sum, e) => sum + (e.transferSize || 0), 0);
+"""
+
+
+def load_target_urls():
+    if len(sys.argv) > 1:
+        return sys.argv[1:]
+    count = int(os.environ.get("BENCH_COUNT", "10"))
+    if not os.path.exists(main.HISTORY_FILE):
+        print(f"[에러] {main.HISTORY_FILE} 없음 - 게시글 URL을 인자로 넘겨주세요.")
+        sys.exit(1)
+    with open(main.HISTORY_FILE, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if "/articles/" in line]
+    return urls[-count:]
+
+
+def read_blocking(driver):
+    """성능 로그에서 (resourceType별 차단 수 Counter, 차단되지 않은 Image/Font/Media 요청 [(type, url)])"""
+    requests_seen, blocked = {}, collections.Counter()
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        params = message.get("params", {})
+        if message.get("method") == "Network.requestWillBeSent":
+            requests_seen[params["requestId"]] = (params.get("type", "Other"), params["request"]["url"])
+        elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason"):
+            blocked[params.get("type", "Other")] += 1
+            requests_seen.pop(params["requestId"], None)
+    missed = [(kind, url) for kind, url in requests_seen.values() if kind in main.LEAN_FETCH_RESOURCE_TYPES]
+    return blocked, missed
+
+
+def measure(driver, url):
+    """글 하나 열고 (본문까지 걸린 초, 전송 바이트) 반환"""
+    driver.get_log("performance")  # 이전 글 로그 비우기
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    start = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, 15).until(EC.frame_to_be_available_and_switch_to_it("cafe_main"))
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located(
+        (By.CSS_SELECTOR, "div.se-main-container, div.ContentRenderer")))
+    elapsed = time.perf_counter() - start
+    frame_bytes = driver.execute_script(TRANSFER_SIZE_SCRIPT) or 0
+    driver.switch_to.default_content()
+    top_bytes = driver.execute_script(TRANSFER_SIZE_SCRIPT) or 0
+    return elapsed, top_bytes + frame_bytes
+
+
+def run_profile(name, lean, urls):
+    profile_name = f"chrome_bench_{os.getpid()}_{name}"
+    chrome_options = main.build_crawler_chrome_options(profile_name, lean=lean)
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = main.create_crawler_driver(chrome_options, lean=lean)
+    times, sizes = [], []
+    blocked_total, missed_total = collections.Counter(), collections.Counter()
+    try:
+        if not main.load_cookies(driver):
+            print(f"[{name}] 로그인 실패")
+            return times, sizes
+        for url in urls:
+            try:
+                elapsed, size = measure(driver, url)
+                times.append(elapsed)
+                sizes.append(size)
+                blocked, missed = read_blocking(driver)
+                blocked_total.update(blocked)
+                missed_total.update(missed)
+                print(f"[{name}] {elapsed:5.2f}초 {size / 1024:8.1f}KB 차단 {sum(blocked.values()):3d}건 "
+                      f"놓침 {len(missed):3d}건  {url}")
+            except Exception as e:
+                print(f"[{name}] 실패: {url} ({type(e).__name__})")
+    finally:
+        driver.quit()
+        main.remove_chrome_profile(profile_name)
+    if lean:
+        print(f"[{name}] 차단된 요청 (resourceType별): {dict(blocked_total) or '없음'}")
+        for (kind, url), count in missed_total.most_common(10):
+            print(f"[{name}] 차단 못 한 {kind} {count}회: {url[:120]}")
+    return times, sizes
+
+
+def summarize(name, times, sizes):
+    if not times:
+        return f"{name:8s} 측정값 없음"
+    return (f"{name:8s} 글 {len(times):3d}개 | time-to-content 중앙값 {statistics.median(times):5.2f}초 "
+            f"(평균 {statistics.mean(times):5.2f}초) | 전송량 중앙값 {statistics.median(sizes) / 1024:8.1f}KB "
+            f"(평균 {statistics.mean(sizes) / 1024:8.1f}KB)")
+
+
+def run_benchmark():
+    if not main.HEADLESS_MODE:
+        print("[안내] 경량 로딩은 Headless 모드 전용입니다. HEADLESS=true로 실행하세요.")
+        sys.exit(1)
+    urls = load_target_urls()
+    print(f"========== [경량 로딩 벤치마크] 글 {len(urls)}개 ==========")
+    default_result = run_profile("default", False, urls)
+    lean_result = run_profile("lean", True, urls)
+    print("\n" + "=" * 60)
+    print(summarize("default", *default_result))
+    print(summarize("lean", *lean_result))
+    if default_result[0] and lean_result[0]:
+        time_ratio = statistics.median(lean_result[0]) / statistics.median(default_result[0])
+        size_ratio = statistics.median(lean_result[1]) / max(statistics.median(default_result[1]), 1)
+        print(f"lean/default: 시간 {time_ratio:.0%}, 전송량 {size_ratio:.0%}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -9,6 +9,17 @@ import signal
 import sys
 import pickle
 import copy
+import re
+import collections
+import threading
+import queue
+import math
+import struct
+import mmap
+import hashlib
+import types
+import unicodedata
+import atexit
 from datetime import datetime, timezone, timedelta
 import google.generativeai as genai
 from openai import AzureOpenAI
@@ -21,7 +32,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import UnexpectedAlertPresentException, NoAlertPresentException
+from selenium.common.exceptions import UnexpectedAlertPresentException, NoAlertPresentException, TimeoutException
 import config
 
 # ==========================================
@@ -65,6 +76,8 @@ DRY_RUN_HISTORY_FILE = os.path.join(CAFE_DIR, "dry_run_history.json")
 SKIP_LINKS_FILE = os.path.join(CAFE_DIR, "skip_links.json")
 TRAINING_EXAMPLES_FILE = os.path.join(CAFE_DIR, "training_examples.json")
 STOP_FLAG_FILE = os.path.join(CAFE_DIR, ".stop_bot")
+CRAWL_WATERMARK_FILE = os.path.join(CAFE_DIR, "crawl_watermarks.json")
+KEYWORD_STATS_FILE = os.path.join(CAFE_DIR, "keyword_stats.json")
 
 # 계정 ID (로그용)
 ACCOUNT_ID = os.environ.get("ACCOUNT_ID", "unknown")
@@ -93,30 +106,121 @@ def check_stop_flag():
     return False
 
 
+# ==========================================
+# [설정 서비스] bot_config.json / bot_prompts.json 변경 시에만 다시 읽기
+# ==========================================
+# 파일의 (mtime, inode, 크기)가 바뀌었을 때만 파싱하고, 그 사이에는 stat 한 번으로 캐시된 스냅샷을 돌려줍니다.
+# 관리 페이지가 파일을 고치면 다음 호출에서 바로 반영되고, 쓰는 중이라 파싱에 실패하면 이전 스냅샷을 유지합니다.
+ConfigSnapshot = collections.namedtuple("ConfigSnapshot", ["version", "bot_config", "prompts"])
+
+
+def freeze_json(value):
+    """JSON 값을 읽기 전용으로 (dict → MappingProxyType, list → tuple)"""
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: freeze_json(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_json(item) for item in value)
+    return value
+
+
+def thaw_json(value):
+    """freeze_json의 반대 (호출자가 고쳐도 스냅샷에 영향 없는 일반 dict/list)"""
+    if isinstance(value, types.MappingProxyType):
+        return {key: thaw_json(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_json(item) for item in value]
+    return value
+
+
+class ConfigService:
+    """JSON 설정 파일 캐시 + 변경 콜백
+    
+    get(path)는 파일 내용의 읽기 전용 스냅샷, snapshot()은 bot_config/prompts를 묶은 불변 스냅샷을 반환합니다.
+    on_change(callback)으로 등록한 함수는 파일이 바뀌어 다시 읽을 때 callback(path, old, new)로 호출됩니다.
+    """
+
+    def __init__(self, config_file, prompts_file):
+        self.config_file = config_file
+        self.prompts_file = prompts_file
+        self._entries = {}  # path → (state, frozen data)
+        self._callbacks = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_state(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def get(self, path):
+        state = self._file_state(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == state:
+            return entry[1]
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == state:
+                return entry[1]
+            old = entry[1] if entry else None
+            if state is None:
+                data = freeze_json({})
+            else:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = freeze_json(json.load(f))
+                except Exception as e:
+                    # 쓰는 중이거나 잘못된 JSON: 이전 값 유지, 다음 호출에서 다시 시도
+                    print(f"[설정] {os.path.basename(path)} 읽기 실패 (이전 설정 유지): {e}")
+                    return old if old is not None else freeze_json({})
+            if not isinstance(data, types.MappingProxyType):
+                data = freeze_json({})
+            self._entries[path] = (state, data)
+            self._version += 1
+            callbacks = list(self._callbacks)
+        
+        if old is not None and old != data:
+            for callback in callbacks:
+                try:
+                    callback(path, old, data)
+                except Exception as e:
+                    print(f"[설정] 변경 콜백 실패: {e}")
+        return data
+
+    def snapshot(self):
+        bot_config = self.get(self.config_file)
+        prompts = self.get(self.prompts_file)
+        return ConfigSnapshot(self._version, bot_config, prompts)
+
+    def on_change(self, callback):
+        self._callbacks.append(callback)
+        return callback
+
+
+CONFIG_SERVICE = ConfigService(BOT_CONFIG_FILE, BOT_PROMPTS_FILE)
+
+
+@CONFIG_SERVICE.on_change
+def log_config_change(path, old, new):
+    changed = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+    print(f"[설정] {os.path.basename(path)} 변경 반영: {', '.join(changed[:10])}{'...' if len(changed) > 10 else ''}")
+
+
 def load_query_prompt():
     """bot_prompts.json에서 Query Agent 프롬프트 로드. 없거나 비어 있으면 기본값."""
-    if os.path.exists(BOT_PROMPTS_FILE):
-        try:
-            with open(BOT_PROMPTS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                p = (data.get("query_prompt") or "").strip()
-                if p:
-                    return p
-        except Exception:
-            pass
+    p = (CONFIG_SERVICE.get(BOT_PROMPTS_FILE).get("query_prompt") or "").strip()
+    if p:
+        return p
     return DEFAULT_QUERY_PROMPT
 
 def load_answer_prompt():
     """bot_prompts.json에서 Answer Agent 프롬프트 로드. 없거나 비어 있으면 기본값."""
-    if os.path.exists(BOT_PROMPTS_FILE):
-        try:
-            with open(BOT_PROMPTS_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                p = (data.get("answer_prompt") or "").strip()
-                if p:
-                    return p
-        except Exception:
-            pass
+    p = (CONFIG_SERVICE.get(BOT_PROMPTS_FILE).get("answer_prompt") or "").strip()
+    if p:
+        return p
     return DEFAULT_ANSWER_PROMPT.strip()
 
 
@@ -154,100 +258,324 @@ def format_training_examples(examples, max_examples=78):
 
 
 # ==========================================
-# [학습 데이터] comment_history.json에서 실시간 로드
+# [학습 데이터] comment_history.json에서 예시 풀 로드 (파일이 바뀐 카페만 다시 읽음)
 # ==========================================
 # 학습 데이터 공유 카페 목록 (수만휘, 수험생카페, 맘카페)
 SHARED_TRAINING_CAFES = ["suhui", "pnmath", "gangmok"]
 
-def load_comment_history_for_training():
-    """
-    여러 카페의 comment_history.json에서 학습용 데이터 로드 (원본 훼손 없이 복사하여 사용)
-    - 수만휘, 수험생카페, 맘카페의 학습 데이터를 공유하여 사용
-    """
-    all_history = []
-    cafes_dir = os.path.join(SCRIPT_DIR, "cafes")
+def strip_intro_outro(comment):
+    """댓글에서 intro(첫 줄)와 outro(마지막 줄)를 제거하고 본문만 반환"""
+    if not comment:
+        return comment
     
-    for cafe_id in SHARED_TRAINING_CAFES:
-        history_file = os.path.join(cafes_dir, cafe_id, "comment_history.json")
-        if not os.path.exists(history_file):
-            continue
-        
-        try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                history = json.load(f)
-            # 원본 훼손 방지: 깊은 복사 후 추가
-            all_history.extend(copy.deepcopy(history))
-        except Exception as e:
-            print(f"  -> [학습 데이터] {cafe_id} comment_history 로드 실패: {e}")
-            continue
+    # 빈 줄 기준으로 분리
+    paragraphs = comment.strip().split('\n\n')
     
-    print(f"  -> [학습 데이터] 총 {len(all_history)}개 로드 (카페: {', '.join(SHARED_TRAINING_CAFES)})")
-    return all_history
+    # 3개 이상의 단락이 있으면 첫 번째와 마지막 제거
+    if len(paragraphs) >= 3:
+        # 중간 단락들만 반환
+        return '\n\n'.join(paragraphs[1:-1])
+    elif len(paragraphs) == 2:
+        # 2개면 첫 번째만 제거 (마지막은 본문일 수 있음)
+        return paragraphs[1]
+    else:
+        # 1개면 그대로 반환
+        return comment
 
 
-def get_answer_agent_examples(max_good=5, max_bad=5):
-    """
-    Answer Agent용 학습 예시 가져오기
-    - 좋은 예시: 게시완료(posted), 승인됨(approved) 중 랜덤 5개
-    - 나쁜 예시: 취소됨(cancelled) 중 cancel_reason이 '최종답변부실'인 것만 랜덤 5개
-    - intro/outro는 제거하고 본문만 학습 데이터로 사용
+def classify_training_example(record):
+    """댓글 기록 하나를 학습 예시로 변환 → (풀 이름, 예시) 또는 None
     
-    Returns:
-        tuple: (good_examples, bad_examples)
+    - good: 게시완료(posted), 승인됨(approved) → 원글 + intro/outro 제거한 답변
+    - bad: 취소됨(cancelled) 중 cancel_reason이 '최종답변부실' → 원글 + intro/outro 제거한 답변
+    - inappropriate: 취소됨(cancelled) 중 cancel_reason이 '부적절한 글' → 원글만
     """
-    history = load_comment_history_for_training()
-    
-    def strip_intro_outro(comment):
-        """댓글에서 intro(첫 줄)와 outro(마지막 줄)를 제거하고 본문만 반환"""
-        if not comment:
-            return comment
-        
-        # 빈 줄 기준으로 분리
-        paragraphs = comment.strip().split('\n\n')
-        
-        # 3개 이상의 단락이 있으면 첫 번째와 마지막 제거
-        if len(paragraphs) >= 3:
-            # 중간 단락들만 반환
-            return '\n\n'.join(paragraphs[1:-1])
-        elif len(paragraphs) == 2:
-            # 2개면 첫 번째만 제거 (마지막은 본문일 수 있음)
-            return paragraphs[1]
-        else:
-            # 1개면 그대로 반환
-            return comment
+    status = record.get("status", "")
+    cancel_reason = record.get("cancel_reason", "")
+    post_content = record.get("post_content", "") or record.get("post_title", "")
+    comment = record.get("comment", "")
+    if not post_content:
+        return None
     
-    # 상태별 분류
-    good_examples = []  # posted, approved
-    bad_examples = []   # cancelled with reason '최종답변부실'
+    if status == "cancelled" and cancel_reason == "부적절한 글":
+        return "inappropriate", {"post_content": post_content[:500]}  # 원글 (500자 제한)
+    if not comment:
+        return None
+    example = {
+        "post_content": post_content[:500],  # 원글 (500자 제한)
+        "comment": strip_intro_outro(comment)  # 최종답변 (intro/outro 제거)
+    }
+    if status in ["posted", "approved"]:
+        return "good", example
+    if status == "cancelled" and cancel_reason == "최종답변부실":
+        return "bad", example
+    return None
+
+
+# 유사 예시 검색: 원글을 문자 2~3-gram TF-IDF 벡터로 만들어 지금 글과 코사인 유사도가 높은 예시만 프롬프트에 넣음
+# - numpy가 없거나 풀이 비어 있으면 기존처럼 랜덤 선택
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CharNgramIndex:
+    """문자 n-gram TF-IDF 검색 인덱스
     
-    for item in history:
-        status = item.get("status", "")
-        cancel_reason = item.get("cancel_reason", "")
-        post_content = item.get("post_content", "") or item.get("post_title", "")
-        comment = item.get("comment", "")
+    문서×n-gram 행렬은 numpy COO 배열(rows/indices/data: 행 번호, 열 번호, 값)로 두고, 질의는 해당 n-gram 열만 곱해서
+    행 번호별로 더해(bincount) 점수를 냅니다.
+    vocab(n-gram -> 열 번호)과 cache(텍스트 -> (열 번호 배열, 개수 배열))를 넘겨 받아 재구성 시 새 문서만 새로 셉니다.
+    """
+
+    NGRAM_SIZES = (2, 3)
+
+    @classmethod
+    def ngrams(cls, text):
+        text = " ".join((text or "").lower().split())
+        return collections.Counter(text[i:i + n] for n in cls.NGRAM_SIZES for i in range(len(text) - n + 1))
+
+    def __init__(self, texts, cache=None, vocab=None):
+        cache = {} if cache is None else cache
+        self.vocab = {} if vocab is None else vocab
+        columns, counts = [], []
+        for text in texts:
+            entry = cache.get(text)
+            if entry is None:
+                grams = self.ngrams(text)
+                entry = cache[text] = (
+                    np.fromiter((self.vocab.setdefault(gram, len(self.vocab)) for gram in grams), dtype=np.int64, count=len(grams)),
+                    np.fromiter(grams.values(), dtype=np.float64, count=len(grams)),
+                )
+            columns.append(entry[0])
+            counts.append(entry[1])
         
-        if not post_content or not comment:
-            continue
+        self.size = len(texts)
+        self.indices = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        self.rows = np.repeat(np.arange(self.size), [len(c) for c in columns])
+        df = np.bincount(self.indices, minlength=len(self.vocab))
+        self.idf = np.where(df > 0, np.log((1.0 + self.size) / (1.0 + df)) + 1.0, 0.0)  # 지금 문서에 없는 n-gram은 무시
+        data = (1.0 + np.log(np.concatenate(counts) if counts else np.zeros(0))) * self.idf[self.indices]
+        norms = np.sqrt(np.bincount(self.rows, weights=data * data, minlength=self.size))
+        self.data = data / np.maximum(norms, 1e-12)[self.rows]
+
+    def vector(self, text):
+        """문서 행과 같은 방식(TF-IDF, 길이 1)으로 만든 text의 벡터 (겹치는 n-gram이 없으면 None)"""
+        vector = np.zeros(len(self.idf))
+        for gram, count in self.ngrams(text).items():
+            column = self.vocab.get(gram)
+            if column is not None and column < len(self.idf):
+                vector[column] = (1.0 + math.log(count)) * self.idf[column]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def query(self, text, k):
+        """유사도가 0보다 큰 상위 k개 문서 → [(문서 번호, 유사도)] (유사도 내림차순)"""
+        if not self.size or k <= 0:
+            return []
+        vector = self.vector(text)
+        if vector is None:
+            return []
+        scores = np.bincount(self.rows, weights=self.data * vector[self.indices], minlength=self.size)
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+class TrainingExamplePool:
+    """공유 카페들의 학습 예시 풀 (good / bad / inappropriate), 프로세스당 하나
+    
+    - 카페별 comment_history.json + history_archive/ 파티션의 (mtime, 크기)가 바뀐 카페만 다시 읽음
+    - 이 프로세스에서 바뀐 라벨은 record_label로 바로 반영 (파일을 다시 읽지 않음)
+    - 예시 선택은 미리 만들어 둔 목록에서 random.sample만 함
+    """
+
+    POOLS = ("good", "bad", "inappropriate")
+
+    def __init__(self, cafes_dir, cafe_ids):
+        self.cafes_dir = cafes_dir
+        self.cafe_ids = list(cafe_ids)
+        self._lock = threading.Lock()
+        self._cafes = {}  # cafe_id -> {"state": 파일 상태, "examples": {기록 id: (풀 이름, 예시)}}
+        self._pools = None  # 풀 이름 -> 예시 목록 (바뀌면 None으로 두고 다음 선택 때 다시 모음)
+        self._indexes = {}  # 풀 이름 -> CharNgramIndex (풀을 다시 모으면 비움)
+        self._ngram_cache = {}  # 풀 이름 -> {원글: (열 번호 배열, 개수 배열)} (새 라벨만 새로 셈)
+        self._ngram_vocab = {}  # 풀 이름 -> {n-gram: 열 번호} (늘어나기만 함, 캐시된 열 번호가 계속 유효하도록)
+
+    def _cafe_path(self, cafe_id):
+        return os.path.join(self.cafes_dir, cafe_id)
+
+    def _cafe_state(self, cafe_id):
+        cafe_path = self._cafe_path(cafe_id)
+        parts = []
+        for path in [os.path.join(cafe_path, "comment_history.json")] + list_archive_partitions(
+                os.path.join(cafe_path, "history_archive")):
+            try:
+                st = os.stat(path)
+                parts.append(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                continue
+        return "|".join(parts)
+
+    def _load_cafe(self, cafe_id):
+        """카페 하나의 기록을 읽어 예시로 변환 (보관 → 활성 순, 같은 id는 활성 기록이 우선)"""
+        cafe_path = self._cafe_path(cafe_id)
+        examples = {}
         
-        # intro/outro 제거한 본문만 사용
-        comment_body = strip_intro_outro(comment)
+        def add(record):
+            classified = classify_training_example(record)
+            if classified:
+                examples[record.get("id")] = classified
+            else:
+                examples.pop(record.get("id"), None)
         
-        example = {
-            "post_content": post_content[:500],  # 원글 (500자 제한)
-            "comment": comment_body  # 최종답변 (intro/outro 제거)
-        }
+        for record in iter_archived_comments(os.path.join(cafe_path, "history_archive")):
+            add(record)
+        history_file = os.path.join(cafe_path, "comment_history.json")
+        if os.path.exists(history_file):
+            try:
+                with open(history_file, "r", encoding="utf-8") as f:
+                    for record in json.load(f):
+                        add(record)
+            except Exception as e:
+                print(f"  -> [학습 데이터] {cafe_id} comment_history 로드 실패: {e}")
+                return None
+        return examples
+
+    def refresh(self):
+        """파일이 바뀐 카페만 다시 읽기 (안 바뀌었으면 stat만)"""
+        with self._lock:
+            for cafe_id in self.cafe_ids:
+                state = self._cafe_state(cafe_id)
+                cached = self._cafes.get(cafe_id)
+                if cached and cached["state"] == state:
+                    continue
+                examples = self._load_cafe(cafe_id)
+                if examples is None:
+                    continue  # 쓰는 중이면 이전 풀 유지, 다음 기회에
+                self._cafes[cafe_id] = {"state": state, "examples": examples}
+                self._pools = None
+                print(f"  -> [학습 데이터] {cafe_id} 예시 {len(examples)}개 다시 로드")
+
+    def _cafe_for(self, cafe_dir):
+        cafe_dir = os.path.abspath(cafe_dir or CAFE_DIR)
+        for cafe_id in self.cafe_ids:
+            if os.path.abspath(self._cafe_path(cafe_id)) == cafe_dir:
+                return cafe_id
+        return None
+
+    def write_checkpoint(self, cafe_dir=None):
+        """이 프로세스가 댓글 기록을 쓰기 직전 호출 → record_labels에 넘길 (카페, 쓰기 전 파일 상태)"""
+        cafe_id = self._cafe_for(cafe_dir)
+        return (cafe_id, self._cafe_state(cafe_id)) if cafe_id else None
+
+    def record_labels(self, records, checkpoint):
+        """방금 쓴 기록들을 풀에 바로 반영 (파일을 다시 읽지 않음)
+        
+        쓰기 전 파일이 캐시와 같았을 때만 적용합니다. 그 사이 관리 페이지 등이 파일을 고쳤으면
+        (저장소가 그 내용을 가져와 함께 내보냈으므로) 다음 refresh에서 파일을 다시 읽습니다.
+        """
+        if not checkpoint:
+            return  # 공유 카페가 아님
+        cafe_id, state_before = checkpoint
+        with self._lock:
+            cached = self._cafes.get(cafe_id)
+            if cached is None or cached["state"] != state_before:
+                return
+            for record in records:
+                classified = classify_training_example(record)
+                if classified:
+                    cached["examples"][record.get("id")] = classified
+                else:
+                    cached["examples"].pop(record.get("id"), None)
+            cached["state"] = self._cafe_state(cafe_id)
+            self._pools = None
+
+    def pools(self):
+        """풀 이름 -> 예시 목록 (읽기 전용으로 사용)"""
+        self.refresh()
+        with self._lock:
+            if self._pools is None:
+                pools = {name: [] for name in self.POOLS}
+                for cafe_id in self.cafe_ids:
+                    cached = self._cafes.get(cafe_id)
+                    if cached:
+                        for name, example in cached["examples"].values():
+                            pools[name].append(example)
+                self._pools = pools
+                self._indexes = {}
+            return self._pools
+
+    def sample(self, name, count):
+        """풀에서 최대 count개 랜덤 선택 (복사본)"""
+        pool = self.pools()[name]
+        return [dict(example) for example in random.sample(pool, min(count, len(pool)))]
+
+    def similar(self, name, text, count):
+        """풀에서 text와 원글이 가장 비슷한 예시 최대 count개 (복사본, 유사도 순)
         
-        if status in ["posted", "approved"]:
-            good_examples.append(example)
-        elif status == "cancelled" and cancel_reason == "최종답변부실":
-            # 나쁜 예시는 '최종답변부실' 사유가 있는 것만
-            bad_examples.append(example)
+        numpy가 없거나 비슷한 예시가 하나도 없으면 랜덤 선택으로 대신합니다.
+        """
+        pools = self.pools()
+        pool = pools[name]
+        if np is None or not pool or not (text or "").strip():
+            return self.sample(name, count)
+        with self._lock:
+            current = self._pools is pools  # 그 사이 라벨이 바뀌어 풀을 다시 모을 예정이면 인덱스를 저장하지 않음
+            index = self._indexes.get(name) if current else None
+            if index is None:
+                old_cache = self._ngram_cache.get(name, {})
+                cache = {ex["post_content"]: old_cache[ex["post_content"]]
+                         for ex in pool if ex["post_content"] in old_cache}  # 풀에서 빠진 글은 버림
+                index = CharNgramIndex([ex["post_content"] for ex in pool], cache,
+                                       self._ngram_vocab.setdefault(name, {}))
+                if current:
+                    self._indexes[name] = index
+                    self._ngram_cache[name] = cache
+        hits = index.query(text, count)
+        if not hits:
+            return self.sample(name, count)
+        return [dict(pool[i]) for i, _ in hits]
+
+
+TRAINING_POOL = TrainingExamplePool(os.path.join(SCRIPT_DIR, "cafes"), SHARED_TRAINING_CAFES)
+
+FEW_SHOT_RANDOM_COUNTS = {"good": 10, "bad": 10, "inappropriate": 20}  # 랜덤 선택일 때 예시 수 (유사 예시 도입 전과 같음)
+
+
+def few_shot_selection(bot_config, title, content):
+    """학습 예시 선택 방식 → (post_text, 풀 이름별 예시 수)
+    
+    유사 예시 검색이 실제로 쓰일 때(few_shot_retrieval 켜짐 + numpy 설치)만 few_shot_* 개수로 줄이고,
+    아니면 post_text=None(랜덤)과 기존 개수를 돌려줍니다.
+    """
+    if bot_config.get("few_shot_retrieval") and np is not None:
+        return f"{title}\n{(content or '')[:500]}", {
+            "good": bot_config.get("few_shot_good", 4),
+            "bad": bot_config.get("few_shot_bad", 3),
+            "inappropriate": bot_config.get("few_shot_inappropriate", 6),
+        }
+    return None, dict(FEW_SHOT_RANDOM_COUNTS)
+
+
+def get_answer_agent_examples(max_good=5, max_bad=5, post_text=None):
+    """
+    Answer Agent용 학습 예시 가져오기
+    - 좋은 예시: 게시완료(posted), 승인됨(approved) 중 max_good개
+    - 나쁜 예시: 취소됨(cancelled) 중 cancel_reason이 '최종답변부실'인 것만 max_bad개
+    - post_text(지금 글 제목+본문)를 주면 원글이 비슷한 예시 순, 없으면 랜덤
+    - intro/outro는 제거하고 본문만 학습 데이터로 사용 (TRAINING_POOL에 미리 만들어 둠)
     
-    # 랜덤 선택
-    selected_good = random.sample(good_examples, min(max_good, len(good_examples))) if good_examples else []
-    selected_bad = random.sample(bad_examples, min(max_bad, len(bad_examples))) if bad_examples else []
+    Returns:
+        tuple: (good_examples, bad_examples)
+    """
+    pick = (lambda name, count: TRAINING_POOL.similar(name, post_text, count)) if post_text else TRAINING_POOL.sample
+    selected_good = pick("good", max_good)
+    selected_bad = pick("bad", max_bad)
     
-    print(f"  -> [학습 데이터] 좋은 예시 {len(selected_good)}개, 나쁜 예시(최종답변부실) {len(selected_bad)}개 로드 (intro/outro 제거됨)")
+    print(f"  -> [학습 데이터] 좋은 예시 {len(selected_good)}개, 나쁜 예시(최종답변부실) {len(selected_bad)}개 로드 "
+          f"({'유사 예시' if post_text else '랜덤'}, intro/outro 제거됨)")
     
     return selected_good, selected_bad
 
@@ -283,33 +611,22 @@ def format_answer_agent_examples(good_examples, bad_examples):
     return "\n".join(parts)
 
 
-def get_query_agent_examples(max_examples=10):
+def get_query_agent_examples(max_examples=10, post_text=None):
     """
     Query Agent용 학습 예시 가져오기
-    - 취소됨(cancelled) 중 cancel_reason이 '부적절한 글'인 것 랜덤 10개
+    - 취소됨(cancelled) 중 cancel_reason이 '부적절한 글'인 것 max_examples개
+    - post_text(지금 글 제목+본문)를 주면 원글이 비슷한 예시 순, 없으면 랜덤
     - 원글만 전달 (이런 글에는 답변하지 말라는 의미)
     
     Returns:
         list: 부적절한 글 예시 목록
     """
-    history = load_comment_history_for_training()
-    
-    inappropriate_posts = []
-    
-    for item in history:
-        status = item.get("status", "")
-        cancel_reason = item.get("cancel_reason", "")
-        post_content = item.get("post_content", "") or item.get("post_title", "")
-        
-        if status == "cancelled" and cancel_reason == "부적절한 글" and post_content:
-            inappropriate_posts.append({
-                "post_content": post_content[:500]  # 원글 (500자 제한)
-            })
-    
-    # 랜덤 선택
-    selected = random.sample(inappropriate_posts, min(max_examples, len(inappropriate_posts))) if inappropriate_posts else []
+    if post_text:
+        selected = TRAINING_POOL.similar("inappropriate", post_text, max_examples)
+    else:
+        selected = TRAINING_POOL.sample("inappropriate", max_examples)
     
-    print(f"  -> [Query Agent 학습] 부적절한 글 예시 {len(selected)}개 로드")
+    print(f"  -> [Query Agent 학습] 부적절한 글 예시 {len(selected)}개 로드 ({'유사 예시' if post_text else '랜덤'})")
     
     return selected
 
@@ -338,42 +655,606 @@ def load_bot_config():
         "min_delay_seconds": 50,
         "comments_per_hour_min": 5,
         "comments_per_hour_max": 10,
-        "rest_minutes": 3
+        "rest_minutes": 3,
+        "discovery_mode": "browser",  # browser(기존 Selenium 검색), http(카페 검색 API), feed(CAFE_MENU_IDS 게시판 최신글 + 로컬 키워드 매칭)
+        "article_fetch_mode": "",  # 본문 조회 방식: browser 또는 http (비우면 discovery_mode가 http일 때만 http)
+        "feed_match_body": False,  # feed 모드에서 제목에 키워드가 없는 새 글도 본문까지 보고 매칭
+        "incremental_crawl": True,  # 카페/키워드별 워터마크 이후의 새 글만 탐색
+        "max_pages_per_keyword": 5,  # 한 페이지가 전부 새 글일 때 넘겨볼 최대 페이지 수
+        "browser_workers": 1,  # 게시글 본문 조회용 headless Chrome 워커 수 (browser 모드)
+        "lean_fetch": False,  # 크롤러 경량 로딩 (이미지/폰트/광고 차단 + eager, Headless 모드 전용)
+        "jitter_seconds": {},  # 사람처럼 보이기 위한 지연 범위 덮어쓰기 (예: {"typing": [1, 2]}), 기본값은 DEFAULT_JITTER_SECONDS
+        "parallel_cafes": True,  # MULTI_CAFES가 여럿이면 카페마다 독립 스레드/주기로 크롤링
+        "max_backoff_minutes": 30,  # 카페별 연속 에러 시 최대 휴식 (지수 백오프 상한)
+        "ai_concurrency": 2,  # 전체 크롤러가 공유하는 AI 동시 호출 수 (바꾸면 다음 호출부터 적용)
+        "rag_concurrency": 2,  # 전체 크롤러가 공유하는 RAG API 동시 호출 수 (바꾸면 다음 호출부터 적용)
+        "keyword_schedule": "fixed",  # "fixed"(모든 키워드 순서대로) | "bandit"(수확률 높은 키워드를 더 자주)
+        "keywords_per_cycle": 0,  # bandit 모드에서 카페당 사이클마다 검색할 키워드 수 (0이면 절반)
+        "keyword_exploration": 1.0,  # bandit 탐색 보너스 가중치 (클수록 안 가본 키워드를 더 자주)
+        "keyword_stats_decay": 0.97,  # 사이클마다 키워드 통계에 곱하는 감쇠 (최근 수확률 우선)
+        "prefilter": True,  # 목록의 제목/날짜/작성자/댓글 수로 본문 조회 전에 거르기
+        "prefilter_max_comments": 0,  # 댓글이 이 수 이상인 글은 열지 않음 (0이면 사용 안 함)
+        "archive_after_days": 7,  # 작성 후 이 일수가 지난 게시/취소/실패 기록은 history_archive/로 옮김 (삭제 안 함)
+        "keyword_ignore_spaces": False,  # 금지/크롤링 키워드 매칭 시 공백 무시
+        "keyword_jamo_match": False,  # 금지/크롤링 키워드를 한글 자모 단위로 매칭 (호환 자모 입력도 매칭)
+        "query_cache": True,  # 같은 글(재게시/수정)의 Query Agent 결과를 query_cache.db에서 재사용
+        "query_cache_ttl_hours": 72,  # Query 캐시 유효 시간
+        "query_cache_max_entries": 5000,  # Query 캐시 최대 항목 수 (넘으면 오래 안 쓴 항목부터 삭제)
+        "pass_classifier": "shadow",  # 로컬 PASS 분류기: off | shadow(LLM과 일치율만 로그) | on(확실한 PASS는 Query Agent 생략)
+        "pass_classifier_threshold": 0.9,  # on 모드에서 이 확률 이상이면 PASS
+        "ai_retry_attempts": 3,  # AI 인프라 에러(429/타임아웃/5xx) 시 제공자 전체를 다시 시도하는 횟수
+        "ai_backoff_base_seconds": 2,  # 재시도 대기 기본값 (지터 지수 백오프)
+        "ai_backoff_max_seconds": 30,  # 재시도 대기 상한
+        "ai_timeout_seconds": 60,  # AI 호출 한 번의 제한 시간
+        "ai_breaker_failures": 5,  # 제공자별 연속 인프라 에러가 이 수면 회로 열림 (호출 건너뜀)
+        "ai_breaker_cooldown_seconds": 60,  # 회로가 열린 뒤 시험 호출까지 대기
+        "ai_hedging": False,  # 1순위 제공자 응답이 늦으면 2순위에도 보내 먼저 온 답 사용 (Azure + Gemini 둘 다 필요)
+        "ai_hedge_percentile": 95,  # 헤지 기준: 1순위 제공자 최근 응답 시간의 이 분위수
+        "ai_hedge_default_seconds": 20,  # 응답 시간 표본이 부족할 때 헤지 기준 시간
+        "ai_hedge_min_samples": 20,  # 분위수를 쓰기 위한 최소 표본 수
+        "ai_hedge_budget": 0.1,  # 헤지로 추가 호출할 수 있는 비율 (전체 AI 호출 대비)
+        "ai_hedge_concurrency": 1,  # ai_concurrency가 꽉 찼을 때 헤지만 쓸 수 있는 추가 동시 호출 수
+        "deferred_retry_minutes": 10,  # 제공자 장애로 못 본 글을 다시 분석하기까지 대기 (시도마다 2배)
+        "deferred_max_attempts": 5,  # 지연 재시도 최대 횟수
+        "pipeline": True,  # 본문 조회와 AI/RAG 분석을 단계별 스레드로 겹쳐서 처리 (False면 글 하나씩 차례로)
+        "pipeline_ai_workers": 2,  # Query/Answer Agent 단계 스레드 수 (실제 동시 호출은 ai_concurrency로도 제한)
+        "pipeline_rag_workers": 2,  # RAG 단계 스레드 수 (실제 동시 호출은 rag_concurrency로도 제한)
+        "pipeline_queue_size": 4,  # 단계 사이 대기열 크기 (차면 본문 조회가 기다림)
+        "few_shot_retrieval": True,  # 학습 예시를 랜덤 대신 지금 글과 비슷한 원글 순으로 (numpy 필요, 없으면 랜덤)
+        "few_shot_good": 4,  # 유사 예시일 때 Answer Agent 좋은 예시 수 (랜덤이면 기존대로 10)
+        "few_shot_bad": 3,  # 유사 예시일 때 Answer Agent 나쁜 예시 수 (랜덤이면 기존대로 10)
+        "few_shot_inappropriate": 6  # 유사 예시일 때 Query Agent 부적절한 글 예시 수 (랜덤이면 기존대로 20)
     }
-    if os.path.exists(BOT_CONFIG_FILE):
+    # 파일이 바뀌었을 때만 다시 파싱 (CONFIG_SERVICE), 호출자가 고쳐도 되도록 일반 dict로 복사
+    default_config.update(thaw_json(CONFIG_SERVICE.get(BOT_CONFIG_FILE)))
+    return default_config
+
+# ==========================================
+# [상태 저장소] comment_history / skip_links를 SQLite(WAL)로 관리
+# ==========================================
+# 크롤러(댓글 추가)와 게시 워커(상태 변경)가 같은 JSON 파일을 통째로 읽고-고쳐-쓰면서 서로의 변경을 덮어쓰던 문제를
+# 트랜잭션으로 해결합니다. id / article_id / status에 인덱스가 있어 상태 변경과 승인 목록 조회가 파일 크기와 무관합니다.
+# - comment_history.json: 관리 페이지/학습 데이터용 내보내기 (활성 기록 전체를 원자적으로 교체)
+#   쓰기마다 내보내지 않고 EXPORT_INTERVAL_SECONDS에 한 번만 (밀린 내보내기는 다음 조회/쓰기/종료 때)
+#   관리 페이지가 바로 최신 파일이 필요하면 EXPORT_REQUEST_FILE을 만들면 다음 조회 때 즉시 내보냄
+# - 기준(source of truth)은 state.db: 관리 페이지가 파일을 고치면(mtime 변경) 마지막 내보내기 내용과 비교해
+#   바뀐 필드만 반영하고, 마지막 내보내기에 있었는데 파일에서 빠진 기록은 삭제로 보고 저장소에서도 지움
+# - 활성 기록: pending/approved 전부 + 작성 후 archive_after_days가 지나지 않은 끝난(posted/cancelled/failed) 기록
+#   그보다 오래된 끝난 기록은 history_archive/comments-YYYY-MM.jsonl.gz(작성 월별)로 옮기고 지우지 않음
+#   (gzip 멤버를 이어 붙이는 append 방식이라 쓰기 비용은 옮기는 기록 수에만 비례, 읽기는 줄 단위 스트리밍)
+# - skip_links.json: 관리 페이지가 관리, 바뀌었을 때만 테이블로 다시 읽음
+# - 처음 열 때 기존 comment_history.json / skip_links.json을 가져옴
+STATE_DB_FILE = os.path.join(CAFE_DIR, "state.db")
+HISTORY_ARCHIVE_DIR = os.path.join(CAFE_DIR, "history_archive")
+ARCHIVE_STATUSES = ("posted", "cancelled", "failed")
+ARCHIVE_CHECK_SECONDS = 3600  # 보관 이동은 최대 1시간에 한 번
+EXPORT_INTERVAL_SECONDS = 10  # comment_history.json 내보내기는 최대 10초에 한 번
+EXPORT_REQUEST_FILE = os.path.join(CAFE_DIR, ".export_history")  # 관리 페이지가 만들면 즉시 내보내기
+
+
+def list_archive_partitions(archive_dir):
+    """보관 파티션 파일 목록 (오래된 월부터)"""
+    if not archive_dir or not os.path.isdir(archive_dir):
+        return []
+    names = sorted(name for name in os.listdir(archive_dir) if name.startswith("comments-") and name.endswith(".jsonl.gz"))
+    return [os.path.join(archive_dir, name) for name in names]
+
+
+def iter_archived_comments(archive_dir, paths=None):
+    """보관된 댓글 기록을 파티션 순서대로 한 건씩 읽기 (전체를 메모리에 올리지 않음)
+    
+    보관 도중 중단되어 같은 기록이 두 번 들어간 경우 처음 것만 돌려줍니다.
+    paths를 주면 그 파티션 파일들만 읽습니다.
+    """
+    import gzip
+    seen_ids = set()
+    for path in (list_archive_partitions(archive_dir) if paths is None else paths):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("id") in seen_ids:
+                        continue
+                    seen_ids.add(record.get("id"))
+                    yield record
+        except (OSError, EOFError, ValueError) as e:
+            # 마지막 멤버가 덜 쓰인 파티션: 읽은 데까지만 사용
+            print(f"[보관] {os.path.basename(path)} 읽기 중단: {e}")
+
+
+class StateStore:
+    """댓글 기록/스킵 링크 저장소 (SQLite WAL, 스레드마다 연결, 여러 프로세스 공유)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS comments (
+            id TEXT PRIMARY KEY,
+            article_id TEXT,
+            status TEXT,
+            timestamp TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_comments_article_id ON comments(article_id);
+        CREATE INDEX IF NOT EXISTS idx_comments_status ON comments(status);
+        CREATE TABLE IF NOT EXISTS archived_articles (
+            article_id TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS skip_links (
+            article_id TEXT PRIMARY KEY,
+            record TEXT
+        );
+        CREATE TABLE IF NOT EXISTS exported (
+            id TEXT PRIMARY KEY,
+            record TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path, export_file, skip_links_file=None, archive_dir=None, archive_after_days=7,
+                 export_interval_seconds=EXPORT_INTERVAL_SECONDS, export_request_file=None):
+        self.db_path = db_path
+        self.export_file = export_file
+        self.export_interval_seconds = export_interval_seconds
+        self.export_request_file = export_request_file
+        self.skip_links_file = skip_links_file
+        self.archive_dir = archive_dir
+        self.archive_after_days = archive_after_days
+        self._local = threading.local()
+
+    # ---- 연결/트랜잭션 ----
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+            with self._transaction():
+                if self._meta("migrated") is None:
+                    self._import_comments(force=True)
+                    self._sync_skip_links(force=True)
+                    self._set_meta("migrated", datetime.now().isoformat())
+        return conn
+
+    def _transaction(self):
+        store = self
+
+        class _Transaction:
+            def __enter__(self):
+                store._local.conn.execute("BEGIN IMMEDIATE")  # 쓰기 잠금을 먼저 잡아 읽고-쓰기 사이 끼어들기 방지
+
+            def __exit__(self, exc_type, exc, tb):
+                store._local.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return _Transaction()
+
+    def _meta(self, key):
+        row = self._local.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._local.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _file_state(path):
+        if not path or not os.path.exists(path):
+            return ""
+        st = os.stat(path)
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    @staticmethod
+    def _row(record):
+        post_url = record.get("post_url", "")
+        return (record.get("id"), extract_article_id(post_url) or post_url, record.get("status"),
+                record.get("timestamp"), json.dumps(record, ensure_ascii=False))
+
+    # ---- comment_history.json 가져오기/내보내기 ----
+    @staticmethod
+    def _merge_admin_edit(base, theirs, ours):
+        """마지막 내보내기(base) 대비 관리 페이지(theirs)가 바꾼 필드만 저장소 기록(ours)에 적용한 복사본
+        
+        action_history는 관리 페이지 쪽 목록 뒤에 내보내기 이후 저장소에서 붙은 항목을 이어 붙입니다.
+        """
+        merged = dict(ours)
+        for key in set(base) | set(theirs):
+            if key in ("id", "action_history"):
+                continue
+            if key not in theirs:
+                merged.pop(key, None)
+            elif key not in base or theirs[key] != base[key]:
+                merged[key] = theirs[key]
+        base_actions = base.get("action_history") or []
+        our_actions = ours.get("action_history") or []
+        ours_since_export = our_actions[len(base_actions):] if our_actions[:len(base_actions)] == base_actions else []
+        merged["action_history"] = (theirs.get("action_history") or []) + ours_since_export
+        return merged
+
+    def _import_comments(self, force=False):
+        """관리 페이지 등이 comment_history.json을 고쳤으면 반영 (트랜잭션 안에서 호출)
+        
+        파일의 각 기록을 마지막 내보내기(exported 테이블)와 비교해 바뀐 것만 반영합니다.
+        - 마지막 내보내기에 있었는데 파일에서 빠진 기록: 관리 페이지에서 삭제 → 저장소에서도 삭제
+        - 파일에만 있는 새 id: 관리 페이지에서 추가 → 저장소에 추가 (이미 보관된 글은 제외)
+        - 내보내기 이후 저장소에 추가된 기록(아직 파일에 없음)은 그대로 둠
+        """
+        state = self._file_state(self.export_file)
+        if not state or (not force and state == self._meta("export_state")):
+            return
         try:
-            with open(BOT_CONFIG_FILE, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-                default_config.update(loaded)
+            with open(self.export_file, "r", encoding="utf-8") as f:
+                history = json.load(f)
         except:
-            pass
-    return default_config
+            return  # 쓰는 중이면 다음 기회에
+        
+        conn = self._local.conn
+        exported = {comment_id: json.loads(record) for comment_id, record
+                    in conn.execute("SELECT id, record FROM exported").fetchall()}
+        file_records = {}
+        changed = 0
+        for record in history:
+            if not record.get("id"):
+                continue
+            file_records[record["id"]] = record
+            base = exported.get(record["id"])
+            if base == record:
+                continue  # 관리 페이지가 고치지 않은 기록
+            row = conn.execute("SELECT record FROM comments WHERE id = ?", (record["id"],)).fetchone()
+            if row:
+                current = json.loads(row[0])
+                # 내보내기 기록이 없으면(이전 버전 저장소) 파일과 저장소가 같았다고 보고 비교
+                merged = self._merge_admin_edit(base if base is not None else current, record, current)
+                conn.execute("UPDATE comments SET article_id = ?, status = ?, timestamp = ?, record = ? WHERE id = ?",
+                             self._row(merged)[1:] + (record["id"],))  # 순서(rowid) 유지
+                changed += 1
+                continue
+            if base is not None:
+                continue  # 내보내기 이후 저장소에서 보관된 기록
+            post_url = record.get("post_url", "")
+            if record.get("status") in ARCHIVE_STATUSES and conn.execute(
+                    "SELECT 1 FROM archived_articles WHERE article_id = ?",
+                    (extract_article_id(post_url) or post_url,)).fetchone():
+                continue  # 보관 이전에 만들어진 파일을 고친 경우: 이미 보관된 기록은 되살리지 않음
+            conn.execute("INSERT INTO comments (id, article_id, status, timestamp, record) VALUES (?, ?, ?, ?, ?)",
+                         self._row(record))
+            changed += 1
+        
+        deleted = [comment_id for comment_id in exported if comment_id not in file_records]
+        conn.executemany("DELETE FROM comments WHERE id = ?", [(comment_id,) for comment_id in deleted])
+        if deleted:
+            print(f"[저장소] 관리 페이지에서 삭제된 댓글 기록 {len(deleted)}건 반영")
+        
+        # 이제 파일 내용이 비교 기준, 저장소 쪽이 더 진행된 기록이 있으면 다음 내보내기 때 반영
+        conn.execute("DELETE FROM exported")
+        conn.executemany("INSERT INTO exported (id, record) VALUES (?, ?)",
+                         [(comment_id, json.dumps(record, ensure_ascii=False)) for comment_id, record in file_records.items()])
+        self._set_meta("export_state", state)
+        if changed:
+            self._set_meta("export_dirty", "1")
+
+    def _export_comments(self):
+        """활성 기록을 comment_history.json으로 내보내기 (트랜잭션 안에서 호출해 순서 보장)"""
+        rows = self._local.conn.execute("SELECT id, record FROM comments ORDER BY rowid").fetchall()
+        tmp_file = self.export_file + f".{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump([json.loads(row[1]) for row in rows], f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.export_file)
+        conn = self._local.conn
+        conn.execute("DELETE FROM exported")
+        conn.executemany("INSERT INTO exported (id, record) VALUES (?, ?)", rows)
+        self._set_meta("export_state", self._file_state(self.export_file))
+        self._set_meta("export_dirty", "0")
+        self._set_meta("last_export_at", str(time.time()))
+
+    def _export_requested(self):
+        return bool(self.export_request_file) and os.path.exists(self.export_request_file)
+
+    def _export_due(self):
+        """밀린 내보내기가 있고 마지막 내보내기 후 export_interval_seconds가 지났는지 (또는 관리 페이지가 요청)"""
+        if self._meta("export_dirty") != "1":
+            return False
+        last = self._meta("last_export_at")
+        return (not last or time.time() - float(last) >= self.export_interval_seconds
+                or self._export_requested())
+
+    def _mark_dirty(self):
+        """쓰기 후 호출 (트랜잭션 안): 내보내기를 표시하고 간격이 지났으면 바로 내보냄"""
+        self._set_meta("export_dirty", "1")
+        if self._export_due():
+            self._export_comments()
+
+    def flush_export(self):
+        """밀린 내보내기를 바로 실행 (종료 시/관리 페이지 요청 시), 내보냈으면 True"""
+        self._conn()
+        requested = self._export_requested()
+        if requested:
+            try:
+                os.remove(self.export_request_file)
+            except OSError:
+                pass
+        if self._meta("export_dirty") != "1" and not requested:
+            return False
+        with self._transaction():
+            self._import_comments()
+            self._export_comments()
+        return True
+
+    def _sync_skip_links(self, force=False):
+        state = self._file_state(self.skip_links_file)
+        if not force and state == (self._meta("skip_links_state") or ""):
+            return
+        skip_links = []
+        if state:
+            try:
+                with open(self.skip_links_file, "r", encoding="utf-8") as f:
+                    skip_links = json.load(f)
+            except:
+                return
+        conn = self._local.conn
+        conn.execute("DELETE FROM skip_links")
+        conn.executemany("INSERT OR REPLACE INTO skip_links (article_id, record) VALUES (?, ?)",
+                         [(item["article_id"], json.dumps(item, ensure_ascii=False))
+                          for item in skip_links if item.get("article_id")])
+        self._set_meta("skip_links_state", state)
+
+    def refresh(self):
+        """외부에서 고친 JSON 파일 반영 (바뀐 게 없으면 stat만)"""
+        self._conn()
+        if self._export_requested():
+            self.flush_export()
+        if (self._file_state(self.export_file) == self._meta("export_state")
+                and self._file_state(self.skip_links_file) == (self._meta("skip_links_state") or "")
+                and not self._export_due()):
+            return
+        with self._transaction():
+            self._import_comments()
+            self._sync_skip_links()
+            if self._export_due():
+                self._export_comments()
+
+    # ---- 보관 ----
+    def _archive_finished(self, now=None):
+        """작성된 지 오래된 끝난 기록을 월별 gzip 파티션으로 옮기기 (트랜잭션 안에서 호출)
+        
+        파티션에 먼저 쓰고 나서 행을 지우므로, 중간에 끊기면 다음 보관 때 같은 기록이 한 번 더 쓰일 뿐 잃지 않습니다.
+        """
+        import gzip
+        if not self.archive_dir or self.archive_after_days is None:
+            return 0
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.archive_after_days)).isoformat()
+        placeholders = ",".join("?" * len(ARCHIVE_STATUSES))
+        rows = self._local.conn.execute(
+            f"SELECT id, article_id, timestamp, record FROM comments "
+            f"WHERE status IN ({placeholders}) AND timestamp < ? ORDER BY rowid",
+            ARCHIVE_STATUSES + (cutoff,)
+        ).fetchall()
+        if not rows:
+            return 0
+        
+        partitions = {}
+        for comment_id, article_id, timestamp, record in rows:
+            partitions.setdefault((timestamp or "unknown")[:7], []).append(record)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for month, records in partitions.items():
+            path = os.path.join(self.archive_dir, f"comments-{month}.jsonl.gz")
+            with gzip.open(path, "at", encoding="utf-8") as f:
+                f.write("".join(record + "\n" for record in records))
+        
+        conn = self._local.conn
+        conn.executemany("INSERT OR IGNORE INTO archived_articles (article_id) VALUES (?)",
+                         [(article_id,) for _, article_id, _, _ in rows if article_id])
+        conn.executemany("DELETE FROM comments WHERE id = ?", [(comment_id,) for comment_id, _, _, _ in rows])
+        print(f"[보관] 끝난 댓글 기록 {len(rows)}건 보관 ({', '.join(sorted(partitions))})")
+        return len(rows)
+
+    def _maybe_archive(self):
+        last = self._meta("last_archive_at")
+        if last and time.time() - float(last) < ARCHIVE_CHECK_SECONDS:
+            return
+        self._archive_finished()
+        self._set_meta("last_archive_at", str(time.time()))
+
+    def archive_now(self, now=None):
+        """보관 즉시 실행 (테스트/수동 정리용)"""
+        self._conn()
+        with self._transaction():
+            self._import_comments()
+            count = self._archive_finished(now)
+            self._export_comments()
+        return count
+
+    def iter_history(self):
+        """보관 파티션 → 활성 기록 순서로 모든 댓글 기록을 한 건씩 (학습/통계용)"""
+        for record in iter_archived_comments(self.archive_dir):
+            yield record
+        for record in self.comments():
+            yield record
+
+    # ---- 댓글 기록 ----
+    def add_comment(self, record):
+        self._conn()
+        with self._transaction():
+            self._import_comments()
+            self._local.conn.execute(
+                "INSERT OR REPLACE INTO comments (id, article_id, status, timestamp, record) VALUES (?, ?, ?, ?, ?)",
+                self._row(record)
+            )
+            self._maybe_archive()
+            self._mark_dirty()
+        return record["id"]
+
+    def update_comment(self, comment_id, mutate):
+        """id로 기록 하나를 읽어 mutate(record)로 고친 뒤 저장 (없으면 False)"""
+        self._conn()
+        with self._transaction():
+            self._import_comments()
+            row = self._local.conn.execute("SELECT record FROM comments WHERE id = ?", (comment_id,)).fetchone()
+            if not row:
+                return False
+            record = json.loads(row[0])
+            mutate(record)
+            self._local.conn.execute(
+                "UPDATE comments SET article_id = ?, status = ?, timestamp = ?, record = ? WHERE id = ?",
+                self._row(record)[1:] + (comment_id,)
+            )
+            self._mark_dirty()
+        return True
+
+    def comments(self, statuses=None):
+        """댓글 기록 목록 (저장 순서), statuses를 주면 해당 상태만 (status 인덱스 사용)"""
+        self.refresh()
+        if statuses:
+            placeholders = ",".join("?" * len(statuses))
+            rows = self._local.conn.execute(
+                f"SELECT record FROM comments WHERE status IN ({placeholders}) ORDER BY rowid", tuple(statuses)
+            ).fetchall()
+        else:
+            rows = self._local.conn.execute("SELECT record FROM comments ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def has_article(self, article_id):
+        """댓글 기록(활성 + 보관)에 있는 글인지"""
+        self.refresh()
+        conn = self._local.conn
+        return (conn.execute("SELECT 1 FROM comments WHERE article_id = ? LIMIT 1", (str(article_id),)).fetchone() is not None
+                or conn.execute("SELECT 1 FROM archived_articles WHERE article_id = ?", (str(article_id),)).fetchone() is not None)
+
+    def is_skipped(self, article_id):
+        self.refresh()
+        return self._local.conn.execute(
+            "SELECT 1 FROM skip_links WHERE article_id = ?", (str(article_id),)
+        ).fetchone() is not None
+
+
+STATE_STORE = StateStore(STATE_DB_FILE, COMMENT_HISTORY_FILE, SKIP_LINKS_FILE, HISTORY_ARCHIVE_DIR,
+                         archive_after_days=load_bot_config().get("archive_after_days", 7),
+                         export_request_file=EXPORT_REQUEST_FILE)
+atexit.register(STATE_STORE.flush_export)  # 종료 전에 밀린 comment_history.json 내보내기
+
+
+@CONFIG_SERVICE.on_change
+def apply_archive_config(path, old, new):
+    if path == BOT_CONFIG_FILE:
+        STATE_STORE.archive_after_days = load_bot_config().get("archive_after_days", 7)
+
+# ==========================================
+# [블롭 저장소] 큰 필드(RAG 함수결과/원글)를 내용 주소 방식으로 분리 저장
+# ==========================================
+# 댓글 기록에는 앞부분 미리보기 + "<필드>_ref" 해시 참조만 남기고 전체 내용은 blobs/<해시 앞 2자리>/<해시>.z(.zst)에 압축 저장
+# - 같은 내용(같은 RAG 컨텍스트)은 파일 하나를 공유 (해시가 같으면 다시 쓰지 않음)
+# - zstandard 패키지가 있으면 zstd, 없으면 zlib (읽기는 두 형식 모두 지원)
+# - 관리 페이지/재실행에서 전체 내용이 필요할 때만 BlobStore.get / resolve_record_blobs로 읽음
+#   (외부 프로그램은 ref "sha256:<hex>" → blobs/<hex[:2]>/<hex>.z 를 zlib 해제(.zst면 zstd 해제)한 UTF-8 텍스트로 읽으면 됨)
+BLOB_DIR = os.path.join(CAFE_DIR, "blobs")
+BLOB_INLINE_MAX_CHARS = 1000  # 이보다 긴 필드만 분리
+BLOB_FIELDS = {"function_result": 300, "post_content": 500}  # 필드별 기록에 남길 미리보기 길이 (post_content 500자는 학습 예시 길이)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BlobStore:
+    """내용 주소(sha256) 압축 블롭 저장소"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def put(self, text):
+        """text 저장 후 참조 문자열("sha256:<hex>") 반환 (이미 있으면 쓰지 않음)"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if os.path.exists(self._path(digest, ".zst")) or os.path.exists(self._path(digest, ".z")):
+            return f"sha256:{digest}"
+        
+        if zstandard is not None:
+            path, payload = self._path(digest, ".zst"), zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            import zlib
+            path, payload = self._path(digest, ".z"), zlib.compress(data, 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return f"sha256:{digest}"
+
+    def get(self, ref):
+        """참조 문자열로 내용 읽기 (없으면 None)"""
+        digest = (ref or "").split(":", 1)[-1]
+        if not re.fullmatch(r"[0-9a-f]{64}", digest):
+            return None
+        zst_path = self._path(digest, ".zst")
+        if os.path.exists(zst_path):
+            if zstandard is None:
+                print(f"[블롭] zstd 블롭을 읽으려면 zstandard 패키지가 필요합니다: {ref}")
+                return None
+            with open(zst_path, "rb") as f:
+                return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+        z_path = self._path(digest, ".z")
+        if os.path.exists(z_path):
+            import zlib
+            with open(z_path, "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        return None
+
+
+BLOB_STORE = BlobStore(BLOB_DIR)
+
+
+def offload_record_blobs(record, blob_store=None):
+    """기록의 큰 필드를 블롭으로 옮기고 미리보기 + "<필드>_ref"만 남김 (제자리 수정)"""
+    blob_store = blob_store or BLOB_STORE
+    for field, preview_chars in BLOB_FIELDS.items():
+        value = record.get(field)
+        if not isinstance(value, str) or len(value) <= BLOB_INLINE_MAX_CHARS:
+            continue
+        try:
+            record[field + "_ref"] = blob_store.put(value)
+            record[field] = value[:preview_chars] + f"… (전체 {len(value)}자)"
+        except Exception as e:
+            print(f"[블롭] {field} 저장 실패 (원문 유지): {e}")
+    return record
+
+
+def resolve_record_blobs(record, blob_store=None):
+    """블롭으로 옮긴 필드를 전체 내용으로 되돌린 복사본 반환 (관리 페이지/재실행용)"""
+    blob_store = blob_store or BLOB_STORE
+    resolved = dict(record)
+    for field in BLOB_FIELDS:
+        ref = record.get(field + "_ref")
+        if ref:
+            value = blob_store.get(ref)
+            if value is not None:
+                resolved[field] = value
+    return resolved
+
+
+# 가실행 모드(dry_run_history.json)는 한 프로세스만 쓰므로 기존 JSON 방식 유지, 스레드끼리만 보호
+HISTORY_WRITE_LOCK = threading.Lock()
+
 
 def save_comment_history(post_url, post_title, comment_content, success=True,
                          post_content=None, query=None, function_result=None,
-                         status="pending", comment_id=None):
+                         status="pending", comment_id=None, keywords=None):
     """댓글 기록 저장 (반자동 시스템용)
     
     Args:
         status: pending(대기중), approved(승인됨), cancelled(취소됨), posted(게시완료)
         comment_id: 고유 ID (없으면 자동 생성)
+        keywords: 글을 찾은 검색 키워드 (키워드별 수확률 집계용)
     """
     import uuid
     
-    # 가실행 모드는 별도 파일에 기록
-    if DRY_RUN:
-        history_file = DRY_RUN_HISTORY_FILE
-    else:
-        history_file = COMMENT_HISTORY_FILE
-    
-    history = []
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                history = json.load(f)
-        except:
-            history = []
-    
     now = datetime.now().isoformat()
     record = {
         "id": comment_id or str(uuid.uuid4()),
@@ -393,17 +1274,102 @@ def save_comment_history(post_url, post_title, comment_content, success=True,
         record["query"] = query
     if function_result is not None:
         record["function_result"] = function_result
-    history.append(record)
+    if keywords:
+        record["keywords"] = list(keywords)
+    # 큰 RAG 함수결과/원글은 블롭 저장소로 (기록에는 미리보기 + 참조만)
+    offload_record_blobs(record)
     
-    # 최근 500개만 유지
-    if len(history) > 500:
-        history = history[-500:]
-    
-    with open(history_file, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    # 가실행 모드는 별도 파일에 기록
+    if DRY_RUN:
+        with HISTORY_WRITE_LOCK:
+            history = []
+            if os.path.exists(DRY_RUN_HISTORY_FILE):
+                try:
+                    with open(DRY_RUN_HISTORY_FILE, "r", encoding="utf-8") as f:
+                        history = json.load(f)
+                except:
+                    history = []
+            history.append(record)
+            
+            # 최근 500개만 유지
+            if len(history) > 500:
+                history = history[-500:]
+            
+            with open(DRY_RUN_HISTORY_FILE, "w", encoding="utf-8") as f:
+                json.dump(history, f, ensure_ascii=False, indent=2)
+        return record["id"]
     
+    # 저장소에 추가 (comment_history.json은 활성 기록으로 내보내짐, 오래된 끝난 기록은 보관 파티션으로)
+    checkpoint = TRAINING_POOL.write_checkpoint()
+    STATE_STORE.add_comment(record)
+    TRAINING_POOL.record_labels([record], checkpoint)
     return record["id"]
 
+# ==========================================
+# [대기] 조건 기반 대기 + 사람처럼 보이기 위한 지연 정책
+# ==========================================
+# 준비 대기(readiness): 조건이 만족되는 즉시 반환, 시간 초과 시 False를 돌려주고 호출자는 기존 방식대로 진행
+# 지연(jitter): 사람처럼 보이기 위한 의도적 지연만 담당, bot_config.json "jitter_seconds"로 조정
+WAIT_TIMEOUT_SECONDS = 10
+WAIT_POLL_SECONDS = 0.2
+
+DEFAULT_JITTER_SECONDS = {
+    "crawl_page": [0.3, 0.8],   # 크롤러: 게시글/검색 페이지 로딩 후 (카페 요청 간격 유지)
+    "typing": [0.5, 1.0],       # 게시 워커: 댓글창 클릭 후, 입력 후
+    "error": [2, 2],            # 에러 직후 잠깐 쉬기
+}
+
+
+def human_pause(kind):
+    """jitter 정책에 따라 잠깐 쉬기 (준비 대기와 별개인 의도적 지연)"""
+    policy = dict(DEFAULT_JITTER_SECONDS)
+    policy.update(load_bot_config().get("jitter_seconds") or {})
+    low, high = policy.get(kind, [0, 0])
+    if high > 0:
+        time.sleep(random.uniform(low, high))
+
+
+def wait_until(driver, condition, timeout=WAIT_TIMEOUT_SECONDS, what="조건"):
+    """condition이 참이 되는 즉시 그 값을 반환, timeout 초과 시 False"""
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_SECONDS).until(condition)
+    except TimeoutException:
+        print(f"  -> [대기] {what} {timeout}초 초과 - 그대로 진행")
+        return False
+
+
+def wait_for_page_loaded(driver, timeout=WAIT_TIMEOUT_SECONDS):
+    """document.readyState가 complete가 될 때까지 대기"""
+    return wait_until(driver, lambda d: d.execute_script("return document.readyState") == "complete",
+                      timeout, "페이지 로딩")
+
+
+def switch_to_cafe_frame(driver, timeout=WAIT_TIMEOUT_SECONDS):
+    """cafe_main iframe이 준비되는 즉시 전환 (시간 초과 시 기존처럼 한 번 시도하고 진행)"""
+    if wait_until(driver, EC.frame_to_be_available_and_switch_to_it("cafe_main"), timeout, "cafe_main iframe"):
+        return True
+    try:
+        driver.switch_to.frame("cafe_main")
+        return True
+    except:
+        return False
+
+
+def wait_for_article_content(driver, timeout=WAIT_TIMEOUT_SECONDS):
+    """cafe_main iframe 안에서 게시글 본문 컨테이너가 나타날 때까지 대기"""
+    return wait_until(driver, EC.presence_of_element_located(
+        (By.CSS_SELECTOR, "div.se-main-container, div.ContentRenderer, h3.title_text")), timeout, "본문 컨테이너")
+
+
+def wait_for_search_results(driver, timeout=3):
+    """검색 결과 목록(또는 결과 없음 표시)이 나타날 때까지 대기"""
+    def results_ready(d):
+        if d.find_elements(By.XPATH, "//a[contains(@href, '/articles/')]"):
+            return True
+        return bool(d.find_elements(By.CSS_SELECTOR, "[class*='nodata'], [class*='NoData'], [class*='no_result'], [class*='EmptyList']"))
+    return wait_until(driver, results_ready, timeout, "검색 결과")
+
+
 def load_cookies(driver):
     """쿠키 파일로 로그인"""
     if not os.path.exists(COOKIE_FILE):
@@ -413,7 +1379,7 @@ def load_cookies(driver):
     
     try:
         driver.get("https://naver.com")
-        time.sleep(2)
+        wait_for_page_loaded(driver)
         
         with open(COOKIE_FILE, "rb") as f:
             cookies = pickle.load(f)
@@ -428,7 +1394,7 @@ def load_cookies(driver):
                 pass
         
         driver.refresh()
-        time.sleep(2)
+        wait_for_page_loaded(driver)
         
         # 로그인 확인
         page_source = driver.page_source
@@ -461,15 +1427,9 @@ AZURE_OPENAI_DEPLOYMENT = getattr(config, 'AZURE_OPENAI_DEPLOYMENT', 'gpt-5.2-ch
 def load_model_config():
     """bot_config.json에서 AI 모델 설정 로드"""
     global AI_MODEL_PROVIDER
-    if os.path.exists(BOT_CONFIG_FILE):
-        try:
-            with open(BOT_CONFIG_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                provider = data.get("ai_model_provider", "").strip()
-                if provider in ["gemini", "azure"]:
-                    return provider
-        except Exception:
-            pass
+    provider = (CONFIG_SERVICE.get(BOT_CONFIG_FILE).get("ai_model_provider") or "").strip()
+    if provider in ["gemini", "azure"]:
+        return provider
     return AI_MODEL_PROVIDER
 
 # Azure OpenAI 클라이언트 초기화
@@ -518,71 +1478,444 @@ current_provider = load_model_config()
 print(f"[INFO] 현재 AI 모델 제공자: {current_provider.upper()}")
 
 
-def call_ai_model(prompt, is_json_response=False, temperature=0.3, max_tokens=2048):
-    """
-    AI 모델 호출 (Gemini 또는 Azure OpenAI)
-    
-    Args:
-        prompt: 프롬프트 문자열
-        is_json_response: JSON 응답 여부 (Query Agent용)
-        temperature: 온도 설정
-        max_tokens: 최대 토큰 수
+class ConcurrencyLimit:
+    """bot_config 값으로 크기가 정해지는 동시 호출 한도 (with 문 또는 acquire/release)
     
-    Returns:
-        str: AI 응답 텍스트
-        None: 에러 발생 시
+    한도는 acquire 때마다 CONFIG_SERVICE 스냅샷에서 읽으므로 설정을 바꾸면 재시작 없이 다음 호출부터 적용됩니다.
+    한도를 줄여도 이미 실행 중인 호출은 끝날 때까지 두고, 새 호출만 자리가 날 때까지 기다립니다.
     """
-    provider = load_model_config()
-    
-    if provider == "azure" and azure_client:
-        try:
-            messages = [{"role": "user", "content": prompt}]
-            
-            response = azure_client.chat.completions.create(
-                model=AZURE_OPENAI_DEPLOYMENT,
-                messages=messages,
-                temperature=temperature,
-                max_completion_tokens=max_tokens,
-                response_format={"type": "json_object"} if is_json_response else None
-            )
-            
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"  -> [Azure OpenAI 에러] {e}")
-            # Fallback to Gemini
-            if query_agent_gemini or answer_agent_gemini:
-                print("  -> [Fallback] Gemini로 전환...")
-                provider = "gemini"
-            else:
-                return None
-    
-    if provider == "gemini":
-        try:
-            agent = query_agent_gemini if is_json_response else answer_agent_gemini
-            if not agent:
-                print("  -> [에러] Gemini 모델이 초기화되지 않음")
-                return None
-            
-            generation_config = {
-                "temperature": temperature,
-                "max_output_tokens": max_tokens
-            }
-            if is_json_response:
-                generation_config["response_mime_type"] = "application/json"
-            
-            response = agent.generate_content(prompt, generation_config=generation_config)
-            return (response.text or "").strip()
-        except Exception as e:
-            print(f"  -> [Gemini 에러] {e}")
-            return None
-    
-    print(f"  -> [에러] 알 수 없는 AI 제공자: {provider}")
-    return None
 
+    def __init__(self, config_key, default):
+        self.config_key = config_key
+        self.default = default
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def limit(self):
+        return max(1, int(CONFIG_SERVICE.get(BOT_CONFIG_FILE).get(self.config_key, self.default) or 1))
+
+    def acquire(self, blocking=True):
+        """자리를 잡으면 True (blocking=False면 빈자리가 없을 때 바로 False)"""
+        with self._cond:
+            while self.active >= self.limit():
+                if not blocking:
+                    return False
+                self._cond.wait(1.0)  # 설정으로 한도가 늘어날 수 있어 주기적으로 다시 확인
+            self.active += 1
+            return True
 
-# 레거시 호환성을 위한 변수 (기존 코드에서 사용)
-query_agent = query_agent_gemini
-answer_agent = answer_agent_gemini
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# 카페별 크롤러 스레드가 함께 쓰는 AI/RAG 동시 호출 한도 (bot_config "ai_concurrency", "rag_concurrency")
+AI_CALL_LIMIT = ConcurrencyLimit("ai_concurrency", 2)
+RAG_CALL_LIMIT = ConcurrencyLimit("rag_concurrency", 2)
+# 헤지 호출 전용 여유분: AI_CALL_LIMIT가 꽉 차 있어도 느린 1순위 뒤에 줄 서지 않고 바로 보낼 수 있게 (bot_config "ai_hedge_concurrency")
+AI_HEDGE_LIMIT = ConcurrencyLimit("ai_hedge_concurrency", 1)
+
+
+# ==========================================
+# [AI 제공자] 에러 분류 + 지터 백오프 재시도 + 제공자별 서킷 브레이커
+# ==========================================
+# - 에러 종류: rate_limit(429/쿼터), timeout, server(5xx/연결), safety(안전 필터 차단), client(잘못된 요청 등), unavailable(미초기화)
+# - rate_limit/timeout/server는 "인프라" 에러: 다른 제공자로 넘기고, 모두 실패하면 지터 백오프 후 재시도
+# - safety/client는 "내용" 에러: 다른 제공자만 시도하고 재시도하지 않음
+# - 제공자별로 인프라 에러가 연속 "ai_breaker_failures"번이면 회로를 열어 "ai_breaker_cooldown_seconds" 동안 건너뜀,
+#   쿨다운이 지나면 한 호출만 시험(half-open)해서 성공하면 닫고 실패하면 다시 염
+# - 재시도까지 모두 인프라 에러로 실패하면 AIUnavailableError → 호출한 글은 지연 재시도 대기열로 (DEFERRED_QUEUE)
+class AIProviderError(Exception):
+    """분류된 AI 호출 에러"""
+
+    INFRASTRUCTURE = ("rate_limit", "timeout", "server")
+
+    def __init__(self, provider, kind, message):
+        super().__init__(f"[{provider}] {kind}: {message}")
+        self.provider = provider
+        self.kind = kind
+
+    @property
+    def infrastructure(self):
+        return self.kind in self.INFRASTRUCTURE
+
+
+class AIUnavailableError(Exception):
+    """모든 제공자가 인프라 에러/회로 열림으로 실패 (내용 문제가 아니므로 나중에 다시 시도할 글)"""
+
+
+def classify_ai_error(provider, error):
+    """제공자 SDK 예외 → AIProviderError (상태 코드 → 예외 이름/메시지 순으로 판단)"""
+    if isinstance(error, AIProviderError):
+        return error
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    status = status if isinstance(status, int) else None
+    name = type(error).__name__
+    text = f"{name} {error}".lower()
+    
+    if status == 429 or any(word in text for word in ("ratelimit", "rate limit", "resourceexhausted", "quota", "429")):
+        kind = "rate_limit"
+    elif isinstance(error, TimeoutError) or any(word in text for word in ("timeout", "timed out", "deadlineexceeded")):
+        kind = "timeout"
+    elif any(word in text for word in ("content_filter", "content management policy", "safety", "finish_reason", "blocked")):
+        kind = "safety"
+    elif (status and status >= 500) or isinstance(error, ConnectionError) or any(word in text for word in (
+            "internalservererror", "serviceunavailable", "apiconnectionerror", "connection", " 500", " 502", " 503", " 504")):
+        kind = "server"
+    else:
+        kind = "client"
+    return AIProviderError(provider, kind, str(error)[:200])
+
+
+class CircuitBreaker:
+    """제공자 하나의 회로 차단기 (closed → open → half_open → closed)"""
+
+    def __init__(self, name, failure_threshold=5, cooldown_seconds=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """이번 호출을 보내도 되는지 (half_open이면 한 호출만 시험)"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.time() - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = "half_open"
+                self.probing = False
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"  -> [AI 회로] {self.name} 복구 (닫힘)")
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+
+    def release(self):
+        """시험 호출을 보내지 못했을 때 다음 호출이 시험할 수 있게 풀어줌"""
+        with self._lock:
+            self.probing = False
+
+    def record_failure(self):
+        """인프라 에러 기록 (내용 에러는 기록하지 않음)"""
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"  -> [AI 회로] {self.name} 열림 ({self.failures}회 연속 실패, {self.cooldown_seconds}초 동안 건너뜀)")
+                self.state = "open"
+                self.opened_at = time.time()
+
+
+def _invoke_azure(prompt, is_json_response, temperature, max_tokens, timeout):
+    if not azure_client:
+        raise AIProviderError("azure", "unavailable", "Azure OpenAI 클라이언트가 초기화되지 않음")
+    response = azure_client.chat.completions.create(
+        model=AZURE_OPENAI_DEPLOYMENT,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_completion_tokens=max_tokens,
+        response_format={"type": "json_object"} if is_json_response else None,
+        timeout=timeout
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+def _invoke_gemini(prompt, is_json_response, temperature, max_tokens, timeout):
+    agent = query_agent_gemini if is_json_response else answer_agent_gemini
+    if not agent:
+        raise AIProviderError("gemini", "unavailable", "Gemini 모델이 초기화되지 않음")
+    generation_config = {
+        "temperature": temperature,
+        "max_output_tokens": max_tokens
+    }
+    if is_json_response:
+        generation_config["response_mime_type"] = "application/json"
+    response = agent.generate_content(prompt, generation_config=generation_config, request_options={"timeout": timeout})
+    return (response.text or "").strip()  # 안전 필터로 막힌 응답은 여기서 ValueError(finish_reason) → safety
+
+
+AI_PROVIDER_INVOKERS = {"azure": _invoke_azure, "gemini": _invoke_gemini}
+AI_BREAKERS = {name: CircuitBreaker(name) for name in AI_PROVIDER_INVOKERS}
+
+
+def ai_provider_order():
+    """이번 호출에서 시도할 제공자 순서 (bot_config 제공자 우선, 나머지는 대체)"""
+    primary = load_model_config()
+    return [primary] + [name for name in AI_PROVIDER_INVOKERS if name != primary]
+
+
+def ai_provider_ready(name):
+    """제공자 클라이언트/모델이 초기화되어 있는지 (헤지 대상 선택용)"""
+    if name == "azure":
+        return azure_client is not None
+    return bool(query_agent_gemini or answer_agent_gemini)
+
+
+class AILatencyStats:
+    """제공자별 최근 성공 응답 시간(p50/p95/p99)과 헤지 예산 집계"""
+
+    def __init__(self, window=200, log_every=50):
+        self.window = window
+        self.log_every = log_every
+        self.samples = {}
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.samples.setdefault(name, collections.deque(maxlen=self.window)).append(seconds)
+
+    def percentiles(self, name):
+        """{"p50", "p95", "p99", "count"} (기록이 없으면 None)"""
+        with self._lock:
+            samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return None
+        
+        def pick(q):
+            return samples[min(len(samples) - 1, int(math.ceil(q / 100.0 * len(samples))) - 1)]
+        return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "count": len(samples)}
+
+    def deadline(self, name, percentile, default_seconds, min_samples=20):
+        """헤지 기준 시간: 표본이 충분하면 해당 제공자의 percentile 응답 시간, 아니면 default_seconds"""
+        with self._lock:
+            samples = sorted(self.samples.get(name, ()))
+        if len(samples) < min_samples:
+            return default_seconds
+        return samples[min(len(samples) - 1, int(math.ceil(percentile / 100.0 * len(samples))) - 1)]
+
+    def note_call(self):
+        """call_ai_model 호출 수 (헤지 예산 기준), log_every번마다 지연 통계 로그"""
+        with self._lock:
+            self.calls += 1
+            should_log = self.calls % self.log_every == 0
+        if should_log:
+            self.log_summary()
+
+    def try_hedge(self, budget):
+        """헤지 호출 수가 전체 호출의 budget 비율 안이면 예약하고 True"""
+        with self._lock:
+            if self.hedges + 1 > budget * max(self.calls, 1):
+                return False
+            self.hedges += 1
+            return True
+
+    def log_summary(self):
+        parts = []
+        for name in sorted(self.samples):
+            stats = self.percentiles(name)
+            if stats:
+                parts.append(f"{name} p50 {stats['p50']:.1f}초 p95 {stats['p95']:.1f}초 p99 {stats['p99']:.1f}초 (n={stats['count']})")
+        print(f"[AI 지연] {' | '.join(parts) or '기록 없음'} | 헤지 {self.hedges}/{self.calls}")
+
+
+AI_LATENCY = AILatencyStats()
+
+
+def call_ai_provider(name, prompt, is_json_response, temperature, max_tokens, timeout, permit=None):
+    """제공자 하나 호출 (전역 동시 호출 한도 적용, 성공 시 응답 시간 기록, 에러는 AIProviderError로 분류해서 던짐)
+    
+    permit: 호출자가 이미 잡아 둔 ConcurrencyLimit (헤지 호출용, 호출이 끝나면 여기서 놓음)
+            없으면 AI_CALL_LIMIT에 자리가 날 때까지 기다림
+    """
+    if permit is None:
+        permit = AI_CALL_LIMIT
+        permit.acquire()
+    try:
+        started = time.time()
+        try:
+            result = AI_PROVIDER_INVOKERS[name](prompt, is_json_response, temperature, max_tokens, timeout)
+        except Exception as e:
+            raise classify_ai_error(name, e)
+        AI_LATENCY.record(name, time.time() - started)
+        return result
+    finally:
+        permit.release()
+
+
+def acquire_hedge_permit():
+    """헤지 호출 자리를 기다리지 않고 잡기 (AI_CALL_LIMIT 빈자리 → AI_HEDGE_LIMIT 순, 둘 다 차 있으면 None)"""
+    for limit in (AI_CALL_LIMIT, AI_HEDGE_LIMIT):
+        if limit.acquire(blocking=False):
+            return limit
+    return None
+
+
+def attempt_ai_provider(name, prompt, is_json_response, temperature, max_tokens, timeout, permit=None):
+    """제공자 하나 호출 + 회로 차단기 기록 → (True, 응답) 또는 (False, AIProviderError)"""
+    breaker = AI_BREAKERS[name]
+    try:
+        result = call_ai_provider(name, prompt, is_json_response, temperature, max_tokens, timeout, permit=permit)
+    except AIProviderError as e:
+        if e.kind == "unavailable":
+            breaker.release()  # 설정되지 않은 제공자는 조용히 건너뜀
+            return False, e
+        if e.infrastructure:
+            breaker.record_failure()
+        else:
+            breaker.record_success()  # 응답은 받았으므로 제공자 자체는 정상
+        print(f"  -> [AI 에러] {e}")
+        return False, e
+    breaker.record_success()
+    return True, result
+
+
+def hedged_ai_round(providers, prompt, is_json_response, temperature, max_tokens, timeout, bot_config):
+    """헤지 호출 한 라운드: 1순위 제공자가 기준 시간 안에 답하지 않으면 다음 제공자에도 같은 프롬프트를 보내 먼저 온 답을 사용
+    
+    늦게 온 쪽은 기다리지 않고 버립니다 (스레드는 끝까지 돌며 응답 시간/회로 상태만 기록).
+    헤지는 동시 호출 자리를 기다리지 않습니다 (acquire_hedge_permit, 자리가 없으면 헤지 생략).
+    1순위가 기준 시간 전에 에러로 끝나면 헤지가 아니라 보통의 대체 호출로 다음 제공자를 시도합니다.
+    
+    Returns:
+        tuple: (성공 여부, 응답 또는 마지막 AIProviderError, 인프라 에러가 있었는지)
+    """
+    results = queue.Queue()
+    remaining = list(providers)  # 실제로 요청을 보낸 제공자만 빠짐 (헤지를 생략한 제공자는 대체 호출용으로 남김)
+    
+    def launch_next(hedge=False):
+        while remaining:
+            name = remaining[0]
+            if not ai_provider_ready(name) or not AI_BREAKERS[name].allow():
+                remaining.pop(0)
+                continue
+            permit = None
+            if hedge:
+                permit = acquire_hedge_permit()
+                if permit is None:
+                    print(f"  -> [AI 헤지] 빈 동시 호출 자리 없음 - 헤지 생략")
+                elif not AI_LATENCY.try_hedge(bot_config.get("ai_hedge_budget", 0.1)):
+                    permit.release()
+                    permit = None
+                if permit is None:
+                    AI_BREAKERS[name].release()
+                    return None
+            remaining.pop(0)
+            threading.Thread(target=lambda: results.put((name, attempt_ai_provider(
+                name, prompt, is_json_response, temperature, max_tokens, timeout, permit=permit))), daemon=True).start()
+            return name
+        return None
+    
+    primary = launch_next()
+    if primary is None:
+        return False, None, True  # 모든 회로가 열림
+    wait = AI_LATENCY.deadline(primary, bot_config.get("ai_hedge_percentile", 95),
+                               bot_config.get("ai_hedge_default_seconds", 20), bot_config.get("ai_hedge_min_samples", 20))
+    in_flight = 1
+    infrastructure_failure = False
+    last_error = None
+    while in_flight:
+        try:
+            name, (ok, value) = results.get(timeout=wait)
+        except queue.Empty:
+            wait = None  # 헤지는 한 번만
+            hedge = launch_next(hedge=True)
+            if hedge:
+                print(f"  -> [AI 헤지] {primary} 응답 지연 → {hedge}에도 요청")
+                in_flight += 1
+            continue
+        in_flight -= 1
+        if ok:
+            if name != primary:
+                print(f"  -> [AI 헤지] {name} 응답 사용")
+            return True, value, infrastructure_failure
+        if value.kind != "unavailable":
+            last_error = value
+        infrastructure_failure = infrastructure_failure or value.infrastructure
+        if not in_flight and launch_next():
+            in_flight += 1
+            wait = None
+    return False, last_error, infrastructure_failure
+
+
+def call_ai_model(prompt, is_json_response=False, temperature=0.3, max_tokens=2048):
+    """
+    AI 모델 호출 (bot_config 제공자 → 대체 제공자, 인프라 에러는 지터 백오프로 재시도)
+    
+    bot_config "ai_hedging"이 켜져 있으면 1순위 제공자가 최근 응답 시간의 "ai_hedge_percentile" 분위수 안에
+    답하지 않을 때 2순위 제공자에도 보내 먼저 온 답을 씁니다 (추가 호출은 전체의 "ai_hedge_budget" 비율까지).
+    
+    Args:
+        prompt: 프롬프트 문자열
+        is_json_response: JSON 응답 여부 (Query Agent용)
+        temperature: 온도 설정
+        max_tokens: 최대 토큰 수
+    
+    Returns:
+        str: AI 응답 텍스트
+        None: 내용 에러(안전 필터/잘못된 요청 등)로 응답을 받을 수 없을 때
+    
+    Raises:
+        AIUnavailableError: 모든 제공자가 인프라 에러/회로 열림으로 실패 (나중에 다시 시도)
+    """
+    bot_config = load_bot_config()
+    attempts = max(1, int(bot_config.get("ai_retry_attempts", 3)))
+    base = bot_config.get("ai_backoff_base_seconds", 2)
+    cap = bot_config.get("ai_backoff_max_seconds", 30)
+    timeout = bot_config.get("ai_timeout_seconds", 60)
+    hedging = bot_config.get("ai_hedging", False)
+    for breaker in AI_BREAKERS.values():
+        breaker.failure_threshold = bot_config.get("ai_breaker_failures", 5)
+        breaker.cooldown_seconds = bot_config.get("ai_breaker_cooldown_seconds", 60)
+    AI_LATENCY.note_call()
+    
+    last_error = None
+    for attempt in range(attempts):
+        if hedging:
+            ok, result, infrastructure_failure = hedged_ai_round(
+                ai_provider_order(), prompt, is_json_response, temperature, max_tokens, timeout, bot_config)
+            if ok:
+                return result
+            last_error = result or last_error
+        else:
+            infrastructure_failure = False
+            for name in ai_provider_order():
+                if not AI_BREAKERS[name].allow():
+                    infrastructure_failure = True
+                    continue
+                ok, result = attempt_ai_provider(name, prompt, is_json_response, temperature, max_tokens, timeout)
+                if ok:
+                    return result
+                if result.kind != "unavailable":
+                    last_error = result
+                infrastructure_failure = infrastructure_failure or result.infrastructure
+        
+        if not infrastructure_failure:
+            return None  # 내용 에러/미초기화뿐이면 재시도해도 같음
+        if attempt + 1 < attempts:
+            delay = random.uniform(0, min(cap, base * (2 ** attempt)))  # full jitter
+            print(f"  -> [AI 재시도] {attempt + 1}/{attempts - 1}회, {delay:.1f}초 후")
+            time.sleep(delay)
+    
+    raise AIUnavailableError(f"모든 AI 제공자 실패 (마지막 에러: {last_error or '회로 열림'})")
+
+
+# 레거시 호환성을 위한 변수 (기존 코드에서 사용)
+query_agent = query_agent_gemini
+answer_agent = answer_agent_gemini
 
 # 기본 키워드 (bot_config.json에 없을 때 사용)
 DEFAULT_KEYWORDS = [
@@ -607,42 +1940,168 @@ DEFAULT_KEYWORDS = [
 
 def load_keywords():
     """bot_config.json에서 검색 키워드 로드. 없거나 비어 있으면 기본값 사용."""
-    if os.path.exists(BOT_CONFIG_FILE):
-        try:
-            with open(BOT_CONFIG_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                keywords = data.get("keywords", [])
-                if keywords and len(keywords) > 0:
-                    return keywords
-        except Exception:
-            pass
+    keywords = CONFIG_SERVICE.get(BOT_CONFIG_FILE).get("keywords") or ()
+    if keywords and len(keywords) > 0:
+        return list(keywords)
     return DEFAULT_KEYWORDS
 
 
 def load_banned_keywords():
     """bot_config.json에서 금지 키워드 로드. 없으면 빈 리스트 반환."""
-    if os.path.exists(BOT_CONFIG_FILE):
+    return list(CONFIG_SERVICE.get(BOT_CONFIG_FILE).get("banned_keywords") or ())
+
+
+# ==========================================
+# [키워드 매칭] Aho-Corasick 다중 패턴 매칭 (금지 키워드 / 크롤링 키워드 공용)
+# ==========================================
+# 키워드 목록마다 오토마톤을 한 번만 만들어 두고(설정 스냅샷이 바뀌면 새로 만듦) 본문을 한 번만 훑어서
+# 걸린 키워드를 모두 찾습니다. 키워드 수와 관계없이 본문 길이에 비례하는 시간.
+# bot_config.json 옵션 (기본값은 기존과 같은 대소문자 무시 부분 문자열 매칭):
+# - "keyword_ignore_spaces": 공백 무시 ("정시 컨설팅" == "정시컨설팅")
+# - "keyword_jamo_match": 한글을 자모 단위로 비교 (호환 자모 "ㅈㅓㅇ"와 완성형 "정"을 같게 봄)
+#   ※ 자모 단위라 "가"가 "각"에도 걸리는 등 음절 경계를 넘는 매칭이 생길 수 있음
+def _build_jongseong_table():
+    """종성 자모 → 같은 이름의 초성 자모 (NFKD 후 "정"의 ㅇ과 호환 자모 ㅇ을 같게 보기 위함)"""
+    table = {}
+    for code in range(0x11A8, 0x11C3):
+        name = unicodedata.name(chr(code), "").replace("JONGSEONG", "CHOSEONG")
         try:
-            with open(BOT_CONFIG_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("banned_keywords", [])
-        except Exception:
-            pass
-    return []
+            table[code] = unicodedata.lookup(name)
+        except KeyError:
+            pass  # 겹받침(ㄺ 등)은 초성 형태가 없어 그대로 둠
+    return table
+
+
+JONGSEONG_TO_CHOSEONG = _build_jongseong_table()
+
+
+class KeywordMatcher:
+    """키워드 목록으로 만든 Aho-Corasick 오토마톤"""
+
+    def __init__(self, keywords, ignore_spaces=False, jamo=False):
+        self.keywords = list(keywords)
+        self.ignore_spaces = ignore_spaces
+        self.jamo = jamo
+        self.has_empty = "" in self.keywords  # 기존 금지 키워드 매칭에서는 ""가 모든 글에 걸렸음
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        
+        for index, keyword in enumerate(self.keywords):
+            pattern = self.normalize(keyword)
+            if not pattern:
+                continue  # 빈 키워드는 매칭하지 않음 (금지 키워드 쪽은 has_empty로 기존 동작 유지)
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = next_node
+            self._out[node] += (index,)
+        
+        # 실패 링크 (BFS), 출력은 실패 링크를 따라 미리 합쳐 둠
+        queue_ = collections.deque(self._goto[0].values())
+        while queue_:
+            node = queue_.popleft()
+            for char, child in self._goto[node].items():
+                queue_.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def normalize(self, text):
+        text = (text or "").lower()
+        if self.jamo:
+            text = unicodedata.normalize("NFKD", text).translate(JONGSEONG_TO_CHOSEONG)  # 완성형/호환 자모 → 조합형 자모
+        if self.ignore_spaces:
+            text = "".join(text.split())
+        return text
+
+    def _scan(self, text, first_only=False):
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        node = 0
+        for char in self.normalize(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                hits.update(out[node])
+                if first_only:
+                    break
+        return hits
+
+    def find(self, text):
+        """text에 걸린 키워드 목록 (키워드 목록 순서, 중복 없음)"""
+        return [self.keywords[index] for index in sorted(self._scan(text))]
+
+    def search(self, text):
+        """하나라도 걸리면 True (첫 매칭에서 멈춤)"""
+        return bool(self._scan(text, first_only=True))
+
+
+_keyword_matcher_cache = collections.OrderedDict()  # (키워드 튜플, 옵션) → 오토마톤
+_keyword_matcher_by_list = collections.OrderedDict()  # id(키워드 리스트) → (리스트, 만들 때의 내용 튜플, 오토마톤)
+_keyword_matcher_lock = threading.Lock()
+
+
+@CONFIG_SERVICE.on_change
+def clear_keyword_matchers(path, old, new):
+    """bot_config가 바뀌면(키워드/매칭 옵션) 오토마톤을 다음 매칭 때 다시 만듦"""
+    if path == BOT_CONFIG_FILE:
+        with _keyword_matcher_lock:
+            _keyword_matcher_cache.clear()
+            _keyword_matcher_by_list.clear()
+
+
+def get_keyword_matcher(keywords):
+    """키워드 목록 + 현재 매칭 옵션에 맞는 오토마톤 (설정이 바뀌었을 때만 새로 만듦)
+    
+    사이클 동안 같은 리스트 객체로 글마다 호출되므로 리스트 객체 기준으로 먼저 찾되,
+    리스트를 제자리에서 고쳤을 수 있어 만들 때의 내용과 같을 때만 씁니다 (오토마톤 생성보다 훨씬 가벼운 비교).
+    새 리스트거나 내용이 바뀌었으면 내용(튜플)으로 찾습니다. 설정 변경 시 clear_keyword_matchers가 비웁니다.
+    """
+    entry = _keyword_matcher_by_list.get(id(keywords))
+    if entry is not None and entry[0] is keywords and len(entry[1]) == len(keywords) \
+            and entry[1] == tuple(keywords):
+        return entry[2]
+    
+    options = CONFIG_SERVICE.get(BOT_CONFIG_FILE)
+    key = (tuple(keywords), bool(options.get("keyword_ignore_spaces")), bool(options.get("keyword_jamo_match")))
+    with _keyword_matcher_lock:
+        matcher = _keyword_matcher_cache.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(key[0], ignore_spaces=key[1], jamo=key[2])
+            _keyword_matcher_cache[key] = matcher
+            while len(_keyword_matcher_cache) > 8:  # 금지/크롤링 키워드 + 설정 변경 몇 번분만 유지
+                _keyword_matcher_cache.popitem(last=False)
+        _keyword_matcher_by_list[id(keywords)] = (keywords, key[0], matcher)  # 리스트를 잡아 둬서 id가 재사용되지 않음
+        while len(_keyword_matcher_by_list) > 8:
+            _keyword_matcher_by_list.popitem(last=False)
+    return matcher
+
+
+def find_banned_keywords(title, content, banned_keywords):
+    """제목/본문에 걸린 금지 키워드 목록"""
+    if not banned_keywords:
+        return []
+    matcher = get_keyword_matcher(banned_keywords)
+    # 빈 금지 키워드("")는 기존처럼 모든 글에 걸림 (오토마톤은 빈 패턴을 넣지 않으므로 따로 처리)
+    return ([""] if matcher.has_empty else []) + matcher.find((title or "") + " " + (content or ""))
 
 
 def contains_banned_keyword(title, content, banned_keywords):
-    """제목이나 본문에 금지 키워드가 포함되어 있는지 확인"""
+    """제목이나 본문에 금지 키워드가 포함되어 있는지 확인 (KeywordMatcher로 한 번에 매칭)"""
     if not banned_keywords:
         return False
-    
-    text = (title or "") + " " + (content or "")
-    text = text.lower()
-    
-    for keyword in banned_keywords:
-        if keyword.lower() in text:
-            return True
-    return False
+    matcher = get_keyword_matcher(banned_keywords)
+    return matcher.has_empty or matcher.search((title or "") + " " + (content or ""))
 
 # Backend API URL (config에서 가져오기, 기본값: 로컬)
 BACKEND_URL = getattr(config, 'BACKEND_URL', 'http://localhost:8000')
@@ -876,7 +2335,299 @@ DEFAULT_ANSWER_PROMPT = """
    - **중요** 생성한 댓글이 명확하게 도움되지 않거나, 학생이 공격적으로 느낄 수 있다고 느껴지면 빈 배열을 반환하세요.
 """
 
+# ==========================================
+# [Query 캐시] 같은 글(재게시/수정 후 재수집)의 Query Agent 결과 재사용
+# ==========================================
+# 키 = 정규화한 제목+본문 해시 + Query 프롬프트 버전(프롬프트 지침 + AI 제공자) 해시
+# - PASS(빈 배열)도 저장, 에러(None)는 저장하지 않음
+# - "query_cache_ttl_hours"가 지난 항목은 무시, "query_cache_max_entries"를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+# - 적중/미적중 수는 meta 테이블에 누적 (stats()로 조회)
+QUERY_CACHE_DB_FILE = os.path.join(CAFE_DIR, "query_cache.db")
+# 기존 댓글에 이 표시가 있으면 캐시를 쓰지 않음 (Query Agent가 직접 보고 PASS 해야 하는 글)
+BOT_COMMENT_MARKERS = ("uni2road", "입시 ai", "수험생 ai", "하늘담아", "도군")
+
+
+def normalize_post_text(title, content):
+    """재게시/사소한 수정에도 같은 값이 나오도록 제목+본문 정규화 (NFKC, 소문자, 공백/기호 제거)"""
+    text = unicodedata.normalize("NFKC", f"{title or ''}\n{content or ''}").lower()
+    return re.sub(r"[\W_]+", "", text)
+
+
+class QueryCache:
+    """Query Agent function_calls 캐시 (SQLite WAL, 스레드마다 연결, 여러 프로세스 공유)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS query_cache (
+            key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_query_cache_last_used ON query_cache(last_used);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path, ttl_hours=72, max_entries=5000):
+        self.db_path = db_path
+        self.ttl_hours = ttl_hours
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.hits = 0  # 이 프로세스 기준
+        self.misses = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(title, content, prompt_version):
+        content_hash = hashlib.sha256(normalize_post_text(title, content).encode("utf-8")).hexdigest()
+        prompt_hash = hashlib.sha256(prompt_version.encode("utf-8")).hexdigest()[:16]
+        return f"{prompt_hash}:{content_hash}"
+
+    def _count(self, conn, field):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, '1') "
+                     "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1", (field,))
+
+    def get(self, key):
+        """저장된 function_calls (없거나 만료면 None)"""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT result, created_at FROM query_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row[1] < self.ttl_hours * 3600:
+            conn.execute("UPDATE query_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+            self.hits += 1
+            return json.loads(row[0])
+        self._count(conn, "misses")
+        self.misses += 1
+        return None
+
+    def put(self, key, function_calls):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO query_cache (key, result, created_at, last_used) VALUES (?, ?, ?, ?)",
+                         (key, json.dumps(function_calls, ensure_ascii=False), now, now))
+            # 만료 항목 + 한도를 넘은 오래 안 쓴 항목 삭제
+            conn.execute("DELETE FROM query_cache WHERE created_at < ?", (now - self.ttl_hours * 3600,))
+            conn.execute("DELETE FROM query_cache WHERE key IN (SELECT key FROM query_cache "
+                         "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (max(1, int(self.max_entries)),))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        """적중률 통계 (process: 이 프로세스, total: 캐시 파일 누적)"""
+        conn = self._conn()
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('hits', 'misses')").fetchall())
+        total_hits, total_misses = int(meta.get("hits", 0)), int(meta.get("misses", 0))
+        entries = conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        
+        def rate(hits, misses):
+            return hits / (hits + misses) if hits + misses else 0.0
+        return {
+            "entries": entries,
+            "process": {"hits": self.hits, "misses": self.misses, "hit_rate": rate(self.hits, self.misses)},
+            "total": {"hits": total_hits, "misses": total_misses, "hit_rate": rate(total_hits, total_misses)},
+        }
+
+
+QUERY_CACHE = QueryCache(QUERY_CACHE_DB_FILE)
+
+
+# ==========================================
+# [PASS 분류기] 뻔한 PASS 글은 Query Agent 호출 전에 로컬에서 거르기
+# ==========================================
+# 라벨: TRAINING_POOL의 '부적절한 글'(PASS) vs 승인/게시된 글, 특징: 문자 2~3-gram TF-IDF (CharNgramIndex)
+# 모델: 로지스틱 회귀 (numpy 배치 경사하강, 클래스 불균형 보정) - 풀이 바뀌면 최대 PASS_CLASSIFIER_RETRAIN_SECONDS마다 다시 학습
+# bot_config.json "pass_classifier":
+# - "off": 사용 안 함
+# - "shadow"(기본): Query Agent는 그대로 호출하고, 분류기 판단과 LLM 결과가 얼마나 일치하는지만 로그
+# - "on": PASS 확률이 "pass_classifier_threshold" 이상이면 Query Agent 없이 PASS
+PASS_CLASSIFIER_MIN_EXAMPLES = 20  # 클래스마다 이보다 적으면 학습하지 않음
+PASS_CLASSIFIER_RETRAIN_SECONDS = 600
+
+
+class PassClassifier:
+    """게시글이 Query Agent PASS(부적절한 글)일 확률을 내는 로컬 분류기"""
+
+    def __init__(self, pool, min_examples=PASS_CLASSIFIER_MIN_EXAMPLES, retrain_seconds=PASS_CLASSIFIER_RETRAIN_SECONDS):
+        self.pool = pool
+        self.min_examples = min_examples
+        self.retrain_seconds = retrain_seconds
+        self._lock = threading.Lock()
+        self._model = None  # (CharNgramIndex, 가중치, 절편)
+        self._trained_pools = None
+        self._trained_at = 0
+        self.shadow = collections.Counter()  # (분류기 PASS 여부, LLM PASS 여부) -> 건수
+
+    @staticmethod
+    def fit(texts, labels, epochs=100, learning_rate=20.0, l2=1e-4):
+        """로지스틱 회귀 학습 → (index, weights, bias)"""
+        index = CharNgramIndex(texts)
+        y = np.asarray(labels, dtype=np.float64)
+        positives = max(y.sum(), 1.0)
+        negatives = max(len(y) - y.sum(), 1.0)
+        sample_weight = np.where(y > 0, len(y) / (2 * positives), len(y) / (2 * negatives))
+        weights = np.zeros(len(index.idf))
+        bias = 0.0
+        for _ in range(epochs):
+            z = np.bincount(index.rows, weights=index.data * weights[index.indices], minlength=index.size) + bias
+            error = (1.0 / (1.0 + np.exp(-z)) - y) * sample_weight / len(y)
+            gradient = np.bincount(index.indices, weights=index.data * error[index.rows], minlength=len(weights))
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * error.sum()
+        return index, weights, bias
+
+    @staticmethod
+    def score(model, text):
+        index, weights, bias = model
+        vector = index.vector(text)
+        z = bias + (float(vector @ weights) if vector is not None else 0.0)
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def _training_data(self, pools):
+        texts = [ex["post_content"] for ex in pools["inappropriate"]] + [ex["post_content"] for ex in pools["good"]]
+        labels = [1] * len(pools["inappropriate"]) + [0] * len(pools["good"])
+        return texts, labels
+
+    def _evaluate(self, texts, labels, threshold):
+        """5개 중 1개를 떼어 검증 → (정밀도, 재현율) (학습 로그용)"""
+        train = [i for i in range(len(texts)) if i % 5]
+        held = [i for i in range(len(texts)) if not i % 5]
+        model = self.fit([texts[i] for i in train], [labels[i] for i in train])
+        predicted = [self.score(model, texts[i]) >= threshold for i in held]
+        true_pass = sum(1 for p, i in zip(predicted, held) if p and labels[i])
+        precision = true_pass / max(sum(predicted), 1)
+        recall = true_pass / max(sum(labels[i] for i in held), 1)
+        return precision, recall
+
+    def model(self, threshold=0.9):
+        """현재 풀로 학습된 모델 (라벨이 부족하거나 numpy가 없으면 None)"""
+        if np is None:
+            return None
+        pools = self.pool.pools()
+        with self._lock:
+            stale = pools is not self._trained_pools
+            if stale and (self._model is None or time.time() - self._trained_at >= self.retrain_seconds):
+                self._trained_pools = pools
+                self._trained_at = time.time()
+                texts, labels = self._training_data(pools)
+                positives = sum(labels)
+                if positives < self.min_examples or len(labels) - positives < self.min_examples:
+                    print(f"  -> [PASS 분류기] 라벨 부족 (부적절 {positives}개 / 정상 {len(labels) - positives}개) - 사용 안 함")
+                    self._model = None
+                else:
+                    precision, recall = self._evaluate(texts, labels, threshold)
+                    self._model = self.fit(texts, labels)
+                    print(f"  -> [PASS 분류기] 학습 {len(labels)}개 (부적절 {positives} / 정상 {len(labels) - positives}), "
+                          f"검증 정밀도 {precision:.0%} 재현율 {recall:.0%} (임계값 {threshold})")
+            return self._model
+
+    def predict(self, title, content, threshold=0.9):
+        """PASS 확률 (모델이 없으면 None)"""
+        model = self.model(threshold)
+        if model is None:
+            return None
+        return self.score(model, f"{title or ''}\n\n{(content or '')[:500]}")
+
+    def record_shadow(self, probability, threshold, function_calls):
+        """그림자 모드: 분류기 판단과 Query Agent 결과 비교 기록 + 일치율 로그"""
+        if probability is None or function_calls is None:
+            return
+        predicted_pass = probability >= threshold
+        with self._lock:
+            self.shadow[(predicted_pass, not function_calls)] += 1
+            total = sum(self.shadow.values())
+            agree = self.shadow[(True, True)] + self.shadow[(False, False)]
+            flagged = self.shadow[(True, True)] + self.shadow[(True, False)]
+            saved = self.shadow[(True, True)]
+        print(f"  -> [PASS 분류기] 그림자: 확률 {probability:.2f}, LLM {'PASS' if not function_calls else '분석'} "
+              f"- 일치율 {agree / total:.0%} ({total}건), 분류기 PASS {flagged}건 중 LLM도 PASS {saved}건")
+
+
+PASS_CLASSIFIER = PassClassifier(TRAINING_POOL)
+pass_classifier_warned = False
+
+
+@CONFIG_SERVICE.on_change
+def check_pass_classifier_support(path=BOT_CONFIG_FILE, old=None, new=None):
+    """numpy가 없는데 pass_classifier가 shadow/on이면 한 번만 알림 (분류기가 조용히 아무것도 안 하는 것 방지)"""
+    global pass_classifier_warned
+    if path != BOT_CONFIG_FILE or np is not None or pass_classifier_warned:
+        return
+    mode = load_bot_config().get("pass_classifier", "shadow")
+    if mode != "off":
+        print(f"[PASS 분류기] numpy가 설치되지 않아 비활성화됨 (pass_classifier: {mode}) - pip install numpy")
+        pass_classifier_warned = True
+
+
+check_pass_classifier_support()
+
+
 def generate_function_calls(title, content, existing_comments=""):
+    """Query Agent 호출 (같은 글의 이전 결과 재사용 → 로컬 PASS 분류기 → LLM)
+    
+    Returns:
+        list: function_calls 배열 (PASS인 경우 빈 배열)
+        None: 에러 발생 시
+    """
+    bot_config = load_bot_config()
+    lowered_comments = (existing_comments or "").lower()
+    key = None
+    if bot_config.get("query_cache", True) and not any(marker in lowered_comments for marker in BOT_COMMENT_MARKERS):
+        QUERY_CACHE.ttl_hours = bot_config.get("query_cache_ttl_hours", 72)
+        QUERY_CACHE.max_entries = bot_config.get("query_cache_max_entries", 5000)
+        try:
+            key = QUERY_CACHE.make_key(title, content, f"{load_query_prompt()}\n{load_model_config()}")
+            cached = QUERY_CACHE.get(key)
+        except Exception as e:
+            print(f"  -> [Query 캐시] 조회 실패 (캐시 없이 진행): {e}")
+            key, cached = None, None
+        if cached is not None:
+            stats = QUERY_CACHE.stats()
+            print(f"  -> [Query 캐시] 적중 ({'PASS' if not cached else f'{len(cached)}개 함수 호출'}) "
+                  f"- 적중률 {stats['process']['hit_rate']:.0%} (누적 {stats['total']['hit_rate']:.0%}, {stats['entries']}개)")
+            return cached
+    
+    # 로컬 PASS 분류기 (bot_config "pass_classifier": off / shadow / on)
+    classifier_mode = bot_config.get("pass_classifier", "shadow")
+    threshold = bot_config.get("pass_classifier_threshold", 0.9)
+    probability = None
+    if classifier_mode in ("shadow", "on"):
+        try:
+            probability = PASS_CLASSIFIER.predict(title, content, threshold)
+        except Exception as e:
+            print(f"  -> [PASS 분류기] 예측 실패: {e}")
+        if classifier_mode == "on" and probability is not None and probability >= threshold:
+            print(f"  -> [PASS 분류기] PASS (확률 {probability:.2f} ≥ {threshold}) - Query Agent 생략")
+            return []  # LLM 결과가 아니므로 Query 캐시에는 넣지 않음
+    
+    function_calls = _generate_function_calls(title, content, existing_comments)
+    if classifier_mode == "shadow":
+        PASS_CLASSIFIER.record_shadow(probability, threshold, function_calls)
+    if key is not None and function_calls is not None:
+        try:
+            QUERY_CACHE.put(key, function_calls)
+        except Exception as e:
+            print(f"  -> [Query 캐시] 저장 실패: {e}")
+    return function_calls
+
+
+def _generate_function_calls(title, content, existing_comments=""):
     """
     Query Agent로 게시글 분석 및 함수 호출 생성
     
@@ -892,8 +2643,10 @@ def generate_function_calls(title, content, existing_comments=""):
     try:
         query_instruction = load_query_prompt()
         
-        # 부적절한 글 예시 로드 (취소됨 중 '부적절한 글' 사유)
-        inappropriate_posts = get_query_agent_examples(max_examples=20)
+        # 부적절한 글 예시 로드 (취소됨 중 '부적절한 글' 사유, 이 글과 비슷한 것 위주)
+        bot_config = load_bot_config()
+        post_text, counts = few_shot_selection(bot_config, title, content)
+        inappropriate_posts = get_query_agent_examples(max_examples=counts["inappropriate"], post_text=post_text)
         inappropriate_section = format_query_agent_examples(inappropriate_posts)
         
         # 기존 댓글 섹션 (중복 방지 체크)
@@ -942,6 +2695,8 @@ def generate_function_calls(title, content, existing_comments=""):
         
         return function_calls
         
+    except AIUnavailableError:
+        raise  # 제공자 장애: 글을 나중에 다시 분석하도록 호출한 쪽에 알림
     except json.JSONDecodeError as e:
         print(f"  -> [Query Agent] JSON 파싱 실패: {e}")
         print(f"     원본: {result_text[:200] if result_text else 'None'}")
@@ -969,12 +2724,13 @@ def get_rag_context_from_functions(function_calls):
         return None
         
     try:
-        # Backend API 호출
-        response = requests.post(
-            f"{BACKEND_URL}/api/functions/execute",
-            json={"function_calls": function_calls},
-            timeout=30
-        )
+        # Backend API 호출 (카페별 스레드와 공유하는 동시 호출 한도 적용)
+        with RAG_CALL_LIMIT:
+            response = requests.post(
+                f"{BACKEND_URL}/api/functions/execute",
+                json={"function_calls": function_calls},
+                timeout=30
+            )
         
         if response.status_code == 200:
             result = response.json()
@@ -1042,64 +2798,61 @@ def format_rag_context(rag_results):
 # ==========================================
 # [핵심] 게시글 분석 및 답변 생성
 # ==========================================
-def analyze_and_generate_reply(title, content, use_rag=True, existing_comments=""):
-    """게시글 분석 및 답변 생성
+def run_query_agent(title, content, existing_comments=""):
+    """Query Agent 단계: function_calls 생성 (PASS/에러면 None)"""
+    print("  -> [Query Agent] 게시글 분석 중...")
+    function_calls = generate_function_calls(title, content, existing_comments=existing_comments)
     
-    Args:
-        title: 게시글 제목
-        content: 게시글 본문
-        use_rag: RAG 사용 여부
-        existing_comments: 기존 댓글 목록 (AI 더블체크용)
-    """
-    try:
-        # Query Agent로 게시글 분석 및 function_calls 생성
-        print("  -> [Query Agent] 게시글 분석 중...")
-        function_calls = generate_function_calls(title, content, existing_comments=existing_comments)
-        
-        if function_calls is None:
-            # 에러 발생
-            print("  -> [Query Agent] 에러 - 기본 PASS 처리")
-            return None
-        
-        if not function_calls:
-            # PASS (도움 불필요한 게시글)
-            return None
-        
-        # RAG 컨텍스트 가져오기
-        rag_context = ""
-        if use_rag:
-            print("  -> [RAG] Backend API 호출 중...")
-            rag_results = get_rag_context_from_functions(function_calls)
-            if rag_results:
-                rag_context = format_rag_context(rag_results)
-                print(f"  -> [RAG] 컨텍스트 {len(rag_context)}자 로드 완료")
-            else:
-                print("  -> [RAG] 컨텍스트 없음 (기본 모드로 진행)")
-        
-        # RAG 컨텍스트 포함 프롬프트 구성
-        rag_section = ""
-        if rag_context:
-            rag_section = f"""[📚 관련 입시 정보 (RAG)]
+    if function_calls is None:
+        # 에러 발생
+        print("  -> [Query Agent] 에러 - 기본 PASS 처리")
+        return None
+    
+    if not function_calls:
+        # PASS (도움 불필요한 게시글)
+        return None
+    return function_calls
+
+
+def fetch_rag_context(function_calls):
+    """RAG 단계: function_calls로 Backend API 검색 → 프롬프트용 컨텍스트 문자열 (없으면 "")"""
+    print("  -> [RAG] Backend API 호출 중...")
+    rag_results = get_rag_context_from_functions(function_calls)
+    if rag_results:
+        rag_context = format_rag_context(rag_results)
+        print(f"  -> [RAG] 컨텍스트 {len(rag_context)}자 로드 완료")
+        return rag_context
+    print("  -> [RAG] 컨텍스트 없음 (기본 모드로 진행)")
+    return ""
+
+
+def run_answer_agent(title, content, function_calls, rag_context="", existing_comments=""):
+    """Answer Agent 단계: 학습 예시 + 게시글 + RAG로 최종 댓글 생성 → (댓글, 저장용 extra) 또는 None"""
+    # RAG 컨텍스트 포함 프롬프트 구성
+    rag_section = ""
+    if rag_context:
+        rag_section = f"""[📚 관련 입시 정보 (RAG)]
 아래는 게시글과 관련된 공식 입시 정보입니다. 답변 시 참고하세요.
 {rag_context}
 """
-        
-        instruction = load_answer_prompt()
-        
-        # ==========================================
-        # 학습 데이터 로드 (comment_history.json에서 실시간)
-        # - 좋은 예시: 게시완료/승인됨 중 10개
-        # - 나쁜 예시: 취소됨 중 10개
-        # ==========================================
-        good_examples, bad_examples = get_answer_agent_examples(max_good=10, max_bad=10)
-        examples_section = format_answer_agent_examples(good_examples, bad_examples)
-        
-        instruction = load_answer_prompt()
-        
-        # 기존 댓글 섹션 (AI 더블체크용)
-        existing_comments_section = ""
-        if existing_comments:
-            existing_comments_section = f"""
+    
+    # ==========================================
+    # 학습 데이터 로드 (TRAINING_POOL, 이 글과 원글이 비슷한 예시 위주)
+    # - 좋은 예시: 게시완료/승인됨 중 few_shot_good개 (랜덤이면 10개)
+    # - 나쁜 예시: 취소됨(최종답변부실) 중 few_shot_bad개 (랜덤이면 10개)
+    # ==========================================
+    bot_config = load_bot_config()
+    post_text, counts = few_shot_selection(bot_config, title, content)
+    good_examples, bad_examples = get_answer_agent_examples(
+        max_good=counts["good"], max_bad=counts["bad"], post_text=post_text)
+    examples_section = format_answer_agent_examples(good_examples, bad_examples)
+    
+    instruction = load_answer_prompt()
+    
+    # 기존 댓글 섹션 (AI 더블체크용)
+    existing_comments_section = ""
+    if existing_comments:
+        existing_comments_section = f"""
 [⚠️ 기존 댓글 목록 - 중복 방지 체크]
 아래는 이 게시글에 이미 달린 댓글들입니다.
 만약 아래 댓글 중 "uni2road", "입시 ai", "수험생 ai" 등 우리 봇이 단 것으로 보이는 댓글이 있거나,
@@ -1108,9 +2861,9 @@ def analyze_and_generate_reply(title, content, use_rag=True, existing_comments="
 
 {existing_comments[:500]}
 """
-        
-        # 프롬프트 순서: 1.사용자정의 → 2.학습예시 → 3.게시글 → 4.RAG
-        prompt = f"""[✍️ 작성 지침 및 역할]
+    
+    # 프롬프트 순서: 1.사용자정의 → 2.학습예시 → 3.게시글 → 4.RAG
+    prompt = f"""[✍️ 작성 지침 및 역할]
 {instruction}
 
 {examples_section}
@@ -1123,54 +2876,72 @@ def analyze_and_generate_reply(title, content, use_rag=True, existing_comments="
 
 ⚠️ 중요: 기존 댓글에 이미 우리 봇(uni2road, 입시 ai, 하늘담아, 도군)의 댓글이 있다면 빈 문자열만 반환하세요.
 """
-        print(f"  -> [Answer Agent] 학습 데이터 로드 (좋은 예시 {len(good_examples)}개, 나쁜 예시 {len(bad_examples)}개)")
-        
-        # 새로운 통합 AI 호출 함수 사용
-        result = call_ai_model(prompt, is_json_response=False, temperature=1.0, max_tokens=2048)
-        
-        if not result:
-            print(f"  -> [Answer Agent] AI 응답 없음 - PASS")
-            return None
-        
-        result = result.replace('"', '').replace("'", "")  # 따옴표 제거
-        result = result.strip()
-        
-        # 할 말 없거나 20자 이하면 댓글 안 달고 넘어감 (빈 배열/짧은 무의미 응답 차단)
-        if not result or len(result) <= 20:
-            print(f"  -> [Answer Agent] 할 말 없음/짧음 ({len(result)}자) - PASS (댓글 생략)")
-            return None
-        
-        # 랜덤 오프닝/클로징 선택 (비어있으면 사용 안함)
-        opening = random.choice(OPENINGS) if OPENINGS else ""
-        closing = random.choice(CLOSINGS) if CLOSINGS else ""
-        
-        # 고정 형식으로 포맷팅
-        if opening and closing:
-            formatted_reply = f"""{opening}
+    print(f"  -> [Answer Agent] 학습 데이터 로드 (좋은 예시 {len(good_examples)}개, 나쁜 예시 {len(bad_examples)}개)")
+    
+    # 새로운 통합 AI 호출 함수 사용
+    result = call_ai_model(prompt, is_json_response=False, temperature=1.0, max_tokens=2048)
+    
+    if not result:
+        print(f"  -> [Answer Agent] AI 응답 없음 - PASS")
+        return None
+    
+    result = result.replace('"', '').replace("'", "")  # 따옴표 제거
+    result = result.strip()
+    
+    # 할 말 없거나 20자 이하면 댓글 안 달고 넘어감 (빈 배열/짧은 무의미 응답 차단)
+    if not result or len(result) <= 20:
+        print(f"  -> [Answer Agent] 할 말 없음/짧음 ({len(result)}자) - PASS (댓글 생략)")
+        return None
+    
+    # 랜덤 오프닝/클로징 선택 (비어있으면 사용 안함)
+    opening = random.choice(OPENINGS) if OPENINGS else ""
+    closing = random.choice(CLOSINGS) if CLOSINGS else ""
+    
+    # 고정 형식으로 포맷팅
+    if opening and closing:
+        formatted_reply = f"""{opening}
 
 {result}
 
 {closing}"""
-        elif opening:
-            formatted_reply = f"""{opening}
+    elif opening:
+        formatted_reply = f"""{opening}
 
 {result}"""
-        elif closing:
-            formatted_reply = f"""{result}
+    elif closing:
+        formatted_reply = f"""{result}
 
 {closing}"""
-        else:
-            formatted_reply = result 
-        
-        # 관리 페이지 5열(원글/쿼리/함수결과/최종답변/링크) 저장용
-        # 함수결과 = RAG 컨텍스트만 (함수 출력값)
-        extra = {
-            "post_content": (title or "") + "\n\n" + (content or "")[:2000],
-            "query": json.dumps(function_calls, ensure_ascii=False),
-            "function_result": rag_context or ""
-        }
-        return (formatted_reply, extra)
-            
+    else:
+        formatted_reply = result 
+    
+    # 관리 페이지 5열(원글/쿼리/함수결과/최종답변/링크) 저장용
+    # 함수결과 = RAG 컨텍스트만 (함수 출력값)
+    extra = {
+        "post_content": (title or "") + "\n\n" + (content or "")[:2000],
+        "query": json.dumps(function_calls, ensure_ascii=False),
+        "function_result": rag_context or ""
+    }
+    return (formatted_reply, extra)
+
+
+def analyze_and_generate_reply(title, content, use_rag=True, existing_comments=""):
+    """게시글 분석 및 답변 생성 (Query Agent → RAG → Answer Agent를 차례로, 파이프라인은 단계별로 나눠 호출)
+    
+    Args:
+        title: 게시글 제목
+        content: 게시글 본문
+        use_rag: RAG 사용 여부
+        existing_comments: 기존 댓글 목록 (AI 더블체크용)
+    """
+    try:
+        function_calls = run_query_agent(title, content, existing_comments=existing_comments)
+        if function_calls is None:
+            return None
+        rag_context = fetch_rag_context(function_calls) if use_rag else ""
+        return run_answer_agent(title, content, function_calls, rag_context, existing_comments=existing_comments)
+    except AIUnavailableError:
+        raise  # 제공자 장애: 글을 나중에 다시 분석하도록 호출한 쪽에 알림
     except Exception as e:
         print(f"  -> [AI 에러] {e}")
         return None
@@ -1179,64 +2950,23 @@ def analyze_and_generate_reply(title, content, use_rag=True, existing_comments="
 # [기본 함수]
 # ==========================================
 def load_history():
-    if not os.path.exists(HISTORY_FILE): return set()
+    """방문 기록 링크 집합 (봉인된 세그먼트 + visited_history.txt)"""
     try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return set(line.strip() for line in f.readlines())
+        return VISITED_LOG.load()
     except: return set()
 
 def append_history(link):
     """방문 기록 추가 (중복 방지) - 가실행 모드는 기록 안 함
     
     ⚠️ 중요: 이 함수는 글 분석 전에 호출되어야 Race Condition을 방지할 수 있음
+    (다른 크롤러 프로세스는 ARTICLE_ID_INDEX를 통해 이 기록을 봄)
     """
     # 가실행 모드는 visited_history에 기록하지 않음
     if DRY_RUN:
         return
     
     try:
-        import fcntl  # 파일 락용
-        
-        # article ID 추출하여 정규화된 형태로 저장
-        article_id = extract_article_id(link)
-        
-        # 파일 락을 사용하여 동시 쓰기 방지
-        with open(HISTORY_FILE, "a+", encoding="utf-8") as f:
-            try:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # 배타적 락 획득
-                
-                # 파일 처음으로 이동하여 기존 내용 확인
-                f.seek(0)
-                existing_ids = set()
-                for line in f:
-                    stored_url = line.strip()
-                    if stored_url:
-                        stored_id = extract_article_id(stored_url) or stored_url
-                        existing_ids.add(stored_id)
-                
-                # 중복 체크 (article ID 기준)
-                check_id = article_id if article_id else link
-                if check_id in existing_ids:
-                    return  # 이미 있으면 추가하지 않음
-                
-                # 파일 끝으로 이동하여 추가
-                f.seek(0, 2)  # SEEK_END
-                f.write(link + "\n")
-                f.flush()
-                
-            finally:
-                fcntl.flock(f.fileno(), fcntl.LOCK_UN)  # 락 해제
-                
-    except ImportError:
-        # fcntl이 없는 환경 (Windows 등)에서는 기존 방식 사용
-        try:
-            existing = load_history()
-            if link in existing:
-                return
-            with open(HISTORY_FILE, "a", encoding="utf-8") as f:
-                f.write(link + "\n")
-        except:
-            pass
+        VISITED_LOG.append(link)
     except Exception as e:
         print(f"  -> [경고] 히스토리 기록 실패: {e}")
         # 실패해도 계속 진행 (중복 댓글보다는 나음)
@@ -1265,92 +2995,195 @@ def extract_article_id(url):
     return None
 
 
-def check_post_date(driver, min_year=2026, min_month=2):
-    """게시글 작성 날짜가 최소 날짜 이후인지 확인
+def is_recent_post_date(date_text, min_year=2026, min_month=2):
+    """날짜 문자열이 최소 날짜 이후인지 확인 (브라우저/HTTP 공용)
     
     Args:
-        driver: Selenium WebDriver
+        date_text: 게시글 날짜 문자열 (예: "2026.02.08. 14:03", "02.08")
         min_year: 최소 연도 (기본값: 2026)
         min_month: 최소 월 (기본값: 2)
         
     Returns:
-        bool: 최소 날짜 이후면 True, 이전이면 False
+        bool: 최소 날짜 이후면 True, 이전이면 False (날짜를 모르면 True)
     """
-    try:
-        # 네이버 카페 게시글 날짜 셀렉터들
-        date_selectors = [
-            "span.date",  # 일반적인 날짜 표시
-            "span.article_info span",  # 게시글 정보 내 날짜
-            "div.article_info span.date",
-            "span.WriterInfo__date--mYIJg",  # 새 UI
-            "div.ArticleWriterInfo span.date",
-            "span.se_publishDate",
-        ]
-        
-        date_text = None
-        for selector in date_selectors:
-            try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in elements:
-                    text = elem.text.strip()
-                    # 날짜 형식 확인 (YYYY.MM.DD 또는 YY.MM.DD 또는 MM.DD 등)
-                    if text and ('.' in text or '-' in text or '/' in text):
-                        date_text = text
-                        break
-                if date_text:
-                    break
-            except:
-                continue
+    if not date_text:
+        # 날짜를 찾지 못하면 일단 처리 (안전하게)
+        print("  -> [날짜] 날짜 정보를 찾을 수 없음 (처리 진행)")
+        return True
+    
+    # 날짜 파싱
+    import re
+    
+    # "2026.02.08" 또는 "26.02.08" 또는 "2026-02-08" 형식
+    match = re.search(r'(\d{2,4})[.\-/](\d{1,2})[.\-/](\d{1,2})', date_text)
+    if match:
+        year = int(match.group(1))
+        month = int(match.group(2))
         
-        if not date_text:
-            # 날짜를 찾지 못하면 일단 처리 (안전하게)
-            print("  -> [날짜] 날짜 정보를 찾을 수 없음 (처리 진행)")
-            return True
+        # 2자리 연도 처리
+        if year < 100:
+            year += 2000
         
-        # 날짜 파싱
-        import re
+        # 최소 날짜 이후인지 확인
+        if year > min_year:
+            return True
+        elif year == min_year and month >= min_month:
+            return True
+        else:
+            print(f"  -> [PASS] 오래된 글입니다. ({year}.{month:02d})")
+            return False
+    
+    # "2월 8일" 또는 "02.08" 형식 (올해로 가정)
+    match = re.search(r'(\d{1,2})[월.\-/]\s*(\d{1,2})', date_text)
+    if match:
+        month = int(match.group(1))
+        # 현재 연도로 가정
+        current_year = datetime.now().year
+        if current_year >= min_year and month >= min_month:
+            return True
+        elif current_year > min_year:
+            return True
+        else:
+            print(f"  -> [PASS] 오래된 글입니다. ({current_year}.{month:02d})")
+            return False
+    
+    # 파싱 실패시 일단 처리
+    print(f"  -> [날짜] 날짜 파싱 실패: {date_text} (처리 진행)")
+    return True
+
+
+# 네이버 카페 게시글 날짜 셀렉터들 (앞에서부터 우선)
+ARTICLE_DATE_SELECTORS = [
+    "span.date",  # 일반적인 날짜 표시
+    "span.article_info span",  # 게시글 정보 내 날짜
+    "div.article_info span.date",
+    "span.WriterInfo__date--mYIJg",  # 새 UI
+    "div.ArticleWriterInfo span.date",
+    "span.se_publishDate",
+]
+
+# cafe_main iframe 안에서 한 번의 execute_script로 게시글 정보를 모두 읽는 스크립트
+# (find_elements + .text/.get_attribute를 요소마다 호출하면 글 하나에 WebDriver 왕복이 수십 번 발생)
+ARTICLE_EXTRACT_SCRIPT = """
+const dateSelectors = %s;
+const text = (el) => el ? (el.innerText || el.textContent || '').trim() : '';
+const all = (sel) => Array.from(document.querySelectorAll(sel));
+
+const contentEl = document.querySelector('div.se-main-container') || document.querySelector('div.ContentRenderer');
+
+let date = null;
+for (const sel of dateSelectors) {
+    for (const el of all(sel)) {
+        const t = text(el);
+        // 날짜 형식 확인 (YYYY.MM.DD 또는 YY.MM.DD 또는 MM.DD 등)
+        if (t && /[.\\-\\/]/.test(t)) { date = t; break; }
+    }
+    if (date) break;
+}
+
+const memberIds = [];
+for (const a of all("a[href*='memberid=']")) {
+    const m = (a.href || '').match(/memberid=([^&]+)/);
+    if (m) memberIds.push(m[1]);
+}
+
+return {
+    title: text(document.querySelector('h3.title_text')),
+    content: text(contentEl),
+    date: date,
+    comment_authors: all('span.comment_nickname, a.comment_nickname, span.nick, a.nick').map(text),
+    comment_member_ids: memberIds,
+    comments: all('span.text_comment, div.comment_text').slice(0, 10).map(text)
+};
+""" % json.dumps(ARTICLE_DATE_SELECTORS)
+
+
+def extract_article_from_driver(driver):
+    """cafe_main iframe 안의 게시글 정보를 CafeHttpClient.fetch_article과 같은 dict로 추출
+    
+    제목/본문/날짜/댓글 작성자/회원 ID/댓글 내용을 ARTICLE_EXTRACT_SCRIPT 한 번으로 가져옵니다.
+    """
+    article = {
+        "title": "",
+        "content": "",
+        "date": None,
+        "comment_authors": [],
+        "comment_member_ids": [],
+        "comments": [],
+    }
+    try:
+        result = driver.execute_script(ARTICLE_EXTRACT_SCRIPT)
+        if result:
+            article.update({k: v for k, v in result.items() if v is not None})
+    except Exception as e:
+        print(f"  -> [경고] 게시글 정보 추출 중 오류: {e}")
+    return article
+
+
+def check_post_date(driver, min_year=2026, min_month=2):
+    """게시글 작성 날짜가 최소 날짜 이후인지 확인
+    
+    Args:
+        driver: Selenium WebDriver
+        min_year: 최소 연도 (기본값: 2026)
+        min_month: 최소 월 (기본값: 2)
         
-        # "2026.02.08" 또는 "26.02.08" 또는 "2026-02-08" 형식
-        match = re.search(r'(\d{2,4})[.\-/](\d{1,2})[.\-/](\d{1,2})', date_text)
-        if match:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            
-            # 2자리 연도 처리
-            if year < 100:
-                year += 2000
-            
-            # 최소 날짜 이후인지 확인
-            if year > min_year:
-                return True
-            elif year == min_year and month >= min_month:
-                return True
-            else:
-                print(f"  -> [PASS] 오래된 글입니다. ({year}.{month:02d})")
-                return False
+    Returns:
+        bool: 최소 날짜 이후면 True, 이전이면 False
+    """
+    article = extract_article_from_driver(driver)
+    return is_recent_post_date(article["date"], min_year=min_year, min_month=min_month)
+
+
+def get_my_nicknames():
+    """config에서 내 닉네임 목록 가져오기 (MY_NICKNAMES 우선, 없으면 MY_NICKNAME, 그것도 없으면 NAVER_ID)"""
+    my_nicknames = getattr(config, 'MY_NICKNAMES', None)
+    if not my_nicknames:
+        single_nickname = getattr(config, 'MY_NICKNAME', None)
+        if single_nickname:
+            my_nicknames = [single_nickname]
+        else:
+            # 닉네임이 설정되지 않은 경우 NAVER_ID 사용
+            my_nicknames = [getattr(config, 'NAVER_ID', '')]
+    
+    # 문자열이면 리스트로 변환
+    if isinstance(my_nicknames, str):
+        my_nicknames = [my_nicknames]
+    return my_nicknames
+
+
+def has_my_comment(comment_authors, member_ids=(), my_nicknames=None):
+    """댓글 작성자 닉네임/회원 ID 목록에 내 계정이 있는지 확인 (브라우저/HTTP 공용)
+    
+    Args:
+        comment_authors: 댓글 작성자 닉네임 목록
+        member_ids: 댓글 작성자 회원 ID 목록
+        my_nicknames: 내 닉네임 목록 (없으면 config에서 가져옴)
         
-        # "2월 8일" 또는 "02.08" 형식 (올해로 가정)
-        match = re.search(r'(\d{1,2})[월.\-/]\s*(\d{1,2})', date_text)
-        if match:
-            month = int(match.group(1))
-            # 현재 연도로 가정
-            current_year = datetime.now().year
-            if current_year >= min_year and month >= min_month:
-                return True
-            elif current_year > min_year:
+    Returns:
+        bool: 내 댓글이 있으면 True
+    """
+    if my_nicknames is None:
+        my_nicknames = get_my_nicknames()
+    elif isinstance(my_nicknames, str):
+        my_nicknames = [my_nicknames]
+    
+    if not my_nicknames or not any(my_nicknames):
+        return False
+    
+    for author_text in comment_authors:
+        author_text = (author_text or "").strip()
+        for nickname in my_nicknames:
+            if nickname and (nickname in author_text or author_text in nickname):
+                print(f"  -> [Skip] 이미 내 댓글이 있음 (닉네임: {author_text})")
                 return True
-            else:
-                print(f"  -> [PASS] 오래된 글입니다. ({current_year}.{month:02d})")
-                return False
-        
-        # 파싱 실패시 일단 처리
-        print(f"  -> [날짜] 날짜 파싱 실패: {date_text} (처리 진행)")
-        return True
-        
-    except Exception as e:
-        # 에러 발생시 일단 처리
-        print(f"  -> [날짜] 날짜 확인 오류: {e} (처리 진행)")
+    
+    my_id = getattr(config, 'NAVER_ID', '')
+    if my_id and my_id in member_ids:
+        print(f"  -> [Skip] 이미 내 댓글이 있음 (ID: {my_id})")
         return True
+    
+    return False
 
 
 def check_my_comment_exists(driver, my_nicknames=None):
@@ -1363,372 +3196,2323 @@ def check_my_comment_exists(driver, my_nicknames=None):
     Returns:
         bool: 내 댓글이 있으면 True
     """
-    # 닉네임 목록 가져오기
-    if my_nicknames is None:
-        # config에서 닉네임 목록 가져오기 (MY_NICKNAMES 우선, 없으면 MY_NICKNAME)
-        my_nicknames = getattr(config, 'MY_NICKNAMES', None)
-        if not my_nicknames:
-            single_nickname = getattr(config, 'MY_NICKNAME', None)
-            if single_nickname:
-                my_nicknames = [single_nickname]
+    article = extract_article_from_driver(driver)
+    return has_my_comment(article["comment_authors"], article["comment_member_ids"], my_nicknames=my_nicknames)
+
+
+# ==========================================
+# [처리 기록 인덱스] 처리한 article ID를 메모리 매핑 해시 파일로 공유
+# ==========================================
+# visited_history.txt / comment_history.json을 후보마다 다시 읽고 파싱하는 대신,
+# 처리한 article ID를 uint64 오픈 어드레싱 해시 테이블 파일(article_id_index.bin)에 모아 mmap으로 조회합니다.
+# - 같은 CAFE_DIR의 크롤러 프로세스/스레드가 파일 하나를 공유 (쓰기/동기화는 .lock 파일 flock으로 직렬화)
+# - visited_history.txt(활성 세그먼트)는 마지막으로 읽은 바이트 위치 이후에 추가된 줄만 반영
+#   (회전은 seal_visited로 위치를 0으로 돌리고, 그 밖에 파일이 줄어들면 전체 재구성)
+# - 봉인된 세그먼트(visited_segments/)는 인덱스를 새로 만들 때 한 번만 읽음
+# - comment_file을 주면 mtime/크기가 바뀌었을 때만 다시 읽음 (기본 인스턴스는 댓글 기록을 STATE_STORE에서 조회)
+# - 조회는 파일 stat 2번 + 해시 탐색 (파싱 없음)
+ARTICLE_ID_INDEX_FILE = os.path.join(CAFE_DIR, "article_id_index.bin")
+
+
+class ArticleIdIndex:
+    """처리한 article ID 집합 (mmap 해시 파일, 여러 프로세스 공유)
+    
+    헤더(64바이트): magic, capacity, count, visited_offset, comment_mtime_ns, comment_size, segments_done
+    본문: capacity개의 uint64 슬롯 (0 = 빈 슬롯), 선형 탐색, 사용률 50% 넘으면 2배로 재구성
+    """
+    MAGIC = b"AIDX0002"
+    HEADER = struct.Struct("<8sQQQQQQ")
+    HEADER_FIELDS = ("magic", "capacity", "count", "visited_offset", "comment_mtime_ns", "comment_size", "segments_done")
+    HEADER_SIZE = 64
+    SLOT = struct.Struct("<Q")
+    MASK64 = (1 << 64) - 1
+
+    def __init__(self, path, visited_file, comment_file, segment_dir=None, initial_capacity=1 << 16):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.visited_file = visited_file
+        self.comment_file = comment_file
+        self.segment_dir = segment_dir
+        self.initial_capacity = initial_capacity
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._mm = None
+        self._inode = None
+        self._capacity = 0
+        self._shift = 0
+
+    @staticmethod
+    def article_key(article_id):
+        """article ID → 0이 아닌 uint64 키 (숫자가 아닌 ID는 해시 + 최상위 비트)"""
+        article_id = str(article_id)
+        if article_id.isdigit() and 0 < int(article_id) < (1 << 63):
+            return int(article_id)
+        digest = hashlib.blake2b(article_id.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") | (1 << 63)
+
+    # ---- 잠금/매핑 ----
+    def _locked(self, exclusive):
+        index = self
+
+        class _Lock:
+            def __enter__(self):
+                index._thread_lock.acquire()
+                self.lock_file = None
+                try:
+                    import fcntl
+                    self.lock_file = open(index.lock_path, "a+")
+                    fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                except ImportError:
+                    pass  # fcntl이 없는 환경 (Windows 등)에서는 프로세스 내 잠금만
+                except:
+                    index._thread_lock.release()
+                    raise
+                return self
+
+            def __exit__(self, *exc):
+                try:
+                    if self.lock_file is not None:
+                        self.lock_file.close()  # 닫으면 flock도 해제
+                finally:
+                    index._thread_lock.release()
+        return _Lock()
+
+    def _close_map(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+        self._mm = self._file = self._inode = None
+
+    def _ensure_mapped(self):
+        """파일이 없으면 만들고, 다른 프로세스가 재구성(교체)했으면 다시 매핑 (잠금 안에서 호출)"""
+        if not os.path.exists(self.path):
+            self._write_table(self.initial_capacity, [])
+        inode = os.stat(self.path).st_ino
+        if self._mm is not None and inode == self._inode:
+            return
+        self._close_map()
+        self._file = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, capacity = self.HEADER.unpack_from(self._mm, 0)[:2]
+        if magic != self.MAGIC or len(self._mm) != self.HEADER_SIZE + capacity * 8:
+            # 깨진 파일: 비우고 원본 파일에서 다시 채움
+            self._close_map()
+            self._write_table(self.initial_capacity, [])
+            return self._ensure_mapped()
+        self._inode = inode
+        self._capacity = capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+
+    def _write_table(self, capacity, keys, visited_offset=0, comment_mtime_ns=0, comment_size=0, segments_done=0):
+        """새 테이블 파일을 임시 파일로 만든 뒤 교체 (다른 프로세스는 inode 변경을 보고 다시 매핑)"""
+        shift = 64 - (capacity.bit_length() - 1)
+        slots = [0] * capacity
+        for key in keys:
+            slot = ((key * 0x9E3779B97F4A7C15) & self.MASK64) >> shift
+            while slots[slot]:
+                slot = (slot + 1) & (capacity - 1)
+            slots[slot] = key
+        tmp_path = self.path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            header = self.HEADER.pack(self.MAGIC, capacity, len(keys), visited_offset, comment_mtime_ns, comment_size,
+                                      segments_done)
+            f.write(header.ljust(self.HEADER_SIZE, b"\0"))
+            f.write(struct.pack(f"<{capacity}Q", *slots))
+        os.replace(tmp_path, self.path)
+
+    def _header(self):
+        return dict(zip(self.HEADER_FIELDS, self.HEADER.unpack_from(self._mm, 0)))
+
+    def _set_header(self, **fields):
+        values = self._header()
+        values.update(fields)
+        self.HEADER.pack_into(self._mm, 0, *(values[name] for name in self.HEADER_FIELDS))
+
+    # ---- 해시 테이블 ----
+    def _find(self, key):
+        """key가 있는 슬롯 또는 들어갈 빈 슬롯 번호 (잠금 안에서 호출)"""
+        mask = self._capacity - 1
+        slot = ((key * 0x9E3779B97F4A7C15) & self.MASK64) >> self._shift
+        while True:
+            stored = self.SLOT.unpack_from(self._mm, self.HEADER_SIZE + slot * 8)[0]
+            if stored == 0 or stored == key:
+                return slot, stored == key
+            slot = (slot + 1) & mask
+
+    def _insert(self, key):
+        slot, found = self._find(key)
+        if found:
+            return
+        count = self._header()["count"]
+        if (count + 1) * 2 > self._capacity:
+            self._grow()
+            slot, found = self._find(key)
+        self.SLOT.pack_into(self._mm, self.HEADER_SIZE + slot * 8, key)
+        self._set_header(count=count + 1)
+
+    def _keys(self):
+        return [key for key in struct.unpack_from(f"<{self._capacity}Q", self._mm, self.HEADER_SIZE) if key]
+
+    def _grow(self):
+        header = self._header()
+        keys = self._keys()
+        self._close_map()
+        self._write_table(header["capacity"] * 2, keys, header["visited_offset"], header["comment_mtime_ns"],
+                          header["comment_size"], header["segments_done"])
+        self._ensure_mapped()
+
+    def _reset(self):
+        self._close_map()
+        self._write_table(self.initial_capacity, [])
+        self._ensure_mapped()
+
+    # ---- 원본 파일 동기화 ----
+    def _source_state(self):
+        visited_size = os.path.getsize(self.visited_file) if os.path.exists(self.visited_file) else 0
+        if self.comment_file and os.path.exists(self.comment_file):
+            st = os.stat(self.comment_file)
+            return visited_size, st.st_mtime_ns, st.st_size
+        return visited_size, 0, 0
+
+    def _is_stale(self, state):
+        visited_size, comment_mtime_ns, comment_size = state
+        header = self._header()
+        return (not header["segments_done"] or visited_size != header["visited_offset"]
+                or (comment_mtime_ns, comment_size) != (header["comment_mtime_ns"], header["comment_size"]))
+
+    def _ingest_lines(self, data):
+        for line in data.decode("utf-8", errors="ignore").splitlines():
+            line = line.strip()
+            if line:
+                self._insert(self.article_key(extract_article_id(line) or line))
+
+    def _ingest(self, state):
+        visited_size, comment_mtime_ns, comment_size = state
+        header = self._header()
+        
+        if visited_size < header["visited_offset"]:
+            # visited_history.txt가 회전 외의 이유로 줄었으면(정리/교체) 처음부터 다시 구성
+            self._reset()
+            header = self._header()
+        
+        if not header["segments_done"]:
+            for path in list_visited_segments(self.segment_dir):
+                try:
+                    with open(path, "rb") as f:
+                        self._ingest_lines(f.read())
+                except FileNotFoundError:
+                    pass  # 압축 중 교체된 세그먼트 (압축본에 같은 ID가 있음)
+            self._set_header(segments_done=1)
+        
+        visited_offset = header["visited_offset"]
+        if visited_size > visited_offset:
+            with open(self.visited_file, "rb") as f:
+                f.seek(visited_offset)
+                tail = f.read(visited_size - visited_offset)
+            complete = tail.rfind(b"\n") + 1  # 쓰는 중인 마지막 줄은 다음 동기화로
+            self._ingest_lines(tail[:complete])
+            self._set_header(visited_offset=visited_offset + complete)
+        
+        indexed_mtime_ns, indexed_size = header["comment_mtime_ns"], header["comment_size"]
+        if (comment_mtime_ns, comment_size) != (indexed_mtime_ns, indexed_size):
+            try:
+                with open(self.comment_file, "r", encoding="utf-8") as f:
+                    history = json.load(f)
+            except:
+                history = []  # 쓰는 중이면 다음 동기화에서 다시 읽음 (mtime은 갱신하지 않음)
+                comment_mtime_ns, comment_size = indexed_mtime_ns, indexed_size
+            for item in history:
+                stored_url = item.get("post_url", "")
+                if stored_url:
+                    self._insert(self.article_key(extract_article_id(stored_url) or stored_url))
+            self._set_header(comment_mtime_ns=comment_mtime_ns, comment_size=comment_size)
+
+    def sync(self):
+        """원본 파일에 새로 추가된 기록 반영 (바뀐 게 없으면 stat만 하고 끝)"""
+        state = self._source_state()
+        with self._locked(exclusive=False):
+            self._ensure_mapped()
+            if not self._is_stale(state):
+                return
+        with self._locked(exclusive=True):
+            self._ensure_mapped()
+            if self._is_stale(state):
+                self._ingest(state)
+
+    def seal_visited(self, rename):
+        """활성 세그먼트 회전: 남은 줄을 반영한 뒤 rename()으로 파일을 옮기고 읽은 위치를 0으로
+        
+        인덱스 잠금을 쥔 채로 옮기므로 다른 프로세스가 '파일이 줄었다'고 보고 재구성하지 않습니다.
+        """
+        with self._locked(exclusive=True):
+            self._ensure_mapped()
+            state = self._source_state()
+            if self._is_stale(state):
+                self._ingest(state)
+            rename()
+            if self._header()["visited_offset"] == state[0]:
+                self._set_header(visited_offset=0)
             else:
-                # 닉네임이 설정되지 않은 경우 NAVER_ID 사용
-                my_nicknames = [getattr(config, 'NAVER_ID', '')]
+                self._reset()  # 마지막 줄이 덜 쓰인 상태였으면 안전하게 재구성
+
+    def contains(self, article_id):
+        self.sync()
+        key = self.article_key(article_id)
+        with self._locked(exclusive=False):
+            self._ensure_mapped()
+            return self._find(key)[1]
+
+    def add(self, article_id):
+        with self._locked(exclusive=True):
+            self._ensure_mapped()
+            self._insert(self.article_key(article_id))
+
+    def __len__(self):
+        with self._locked(exclusive=False):
+            self._ensure_mapped()
+            return self._header()["count"]
+
+
+# ==========================================
+# [방문 기록] 세그먼트 append-only 로그
+# ==========================================
+# visited_history.txt는 활성 세그먼트로 계속 사용하고, 커지면 visited_segments/visited-NNNNNN.txt로 봉인합니다.
+# - 추가: 프로세스 내 ID 집합으로 중복 확인 후 한 줄 append (flock 보유 시간 O(1), 파일을 다시 읽지 않음)
+# - 다른 프로세스가 같은 글을 이미 기록했는지는 ARTICLE_ID_INDEX가 판단 (로그의 중복 줄은 무해)
+# - 봉인된 세그먼트가 VISITED_COMPACT_SEGMENTS개를 넘으면 중복 ID를 제거하며 하나로 압축
+VISITED_SEGMENT_DIR = os.path.join(CAFE_DIR, "visited_segments")
+VISITED_SEGMENT_BYTES = 1024 * 1024  # 약 1.5만 줄
+VISITED_COMPACT_SEGMENTS = 8
+
+
+def list_visited_segments(segment_dir):
+    """봉인된 세그먼트 파일 목록 (오래된 순)"""
+    if not segment_dir or not os.path.isdir(segment_dir):
+        return []
+    names = sorted(name for name in os.listdir(segment_dir) if name.startswith("visited-") and name.endswith(".txt"))
+    return [os.path.join(segment_dir, name) for name in names]
+
+
+class VisitedLog:
+    """방문 기록 로그 (활성 세그먼트 + 봉인된 세그먼트) 와 프로세스 내 article ID 집합"""
+
+    def __init__(self, active_file, segment_dir, index=None,
+                 segment_bytes=VISITED_SEGMENT_BYTES, compact_after=VISITED_COMPACT_SEGMENTS):
+        self.active_file = active_file
+        self.segment_dir = segment_dir
+        self.index = index
+        self.segment_bytes = segment_bytes
+        self.compact_after = compact_after
+        self.ids = set()
+        self._lock = threading.Lock()
+
+    def files(self):
+        return list_visited_segments(self.segment_dir) + [self.active_file]
+
+    def load(self):
+        """모든 세그먼트의 링크 집합 반환 (기존 load_history와 같은 비용) + ID 집합 채우기"""
+        links = set()
+        for path in self.files():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    links.update(line.strip() for line in f)
+            except FileNotFoundError:
+                continue
+        links.discard("")
+        with self._lock:
+            self.ids.update(extract_article_id(link) or link for link in links)
+        return links
+
+    def append(self, link):
+        """한 줄 추가 (이 프로세스가 이미 기록한 ID면 False)"""
+        check_id = extract_article_id(link) or link
+        with self._lock:
+            if check_id in self.ids:
+                return False
+            self._append_line(link)
+            self.ids.add(check_id)
+        return True
+
+    def _append_line(self, link):
+        try:
+            import fcntl  # 파일 락용
+        except ImportError:
+            fcntl = None  # fcntl이 없는 환경 (Windows 등)
+        
+        while True:
+            f = open(self.active_file, "a", encoding="utf-8")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # 배타적 락 획득
+            try:
+                # 락을 기다리는 사이 다른 프로세스가 회전했으면 새 활성 파일로 다시 열기
+                if os.fstat(f.fileno()).st_ino == os.stat(self.active_file).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        
+        try:
+            f.write(link + "\n")
+            f.flush()
+            if f.tell() >= self.segment_bytes:
+                self._rotate()
+        finally:
+            f.close()  # 닫으면 락도 해제
+        
+        if len(list_visited_segments(self.segment_dir)) > self.compact_after:
+            self.compact()
+
+    def _rotate(self):
+        """활성 세그먼트 봉인 (활성 파일 락을 쥔 상태에서 호출)"""
+        os.makedirs(self.segment_dir, exist_ok=True)
+        segments = list_visited_segments(self.segment_dir)
+        last_seq = int(os.path.basename(segments[-1])[8:-4]) if segments else 0
+        target = os.path.join(self.segment_dir, f"visited-{last_seq + 1:06d}.txt")
+        rename = lambda: os.replace(self.active_file, target)
+        if self.index is not None:
+            self.index.seal_visited(rename)
+        else:
+            rename()
+        print(f"[방문기록] 세그먼트 봉인: {os.path.basename(target)}")
+
+    def compact(self):
+        """봉인된 세그먼트들을 중복 ID 없이 하나로 합침 (다른 프로세스가 압축 중이면 건너뜀)"""
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        lock_file = open(os.path.join(self.segment_dir, ".compact.lock"), "a")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return
+            segments = list_visited_segments(self.segment_dir)
+            if len(segments) <= self.compact_after:
+                return
+            
+            seen = set()
+            kept = []
+            for path in segments:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        link = line.strip()
+                        article_id = extract_article_id(link) or link
+                        if link and article_id not in seen:
+                            seen.add(article_id)
+                            kept.append(link)
+            
+            # 가장 최근 세그먼트 번호를 이어받아 순서 유지 (다음 회전은 그 다음 번호)
+            target = segments[-1]
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(link + "\n" for link in kept))
+            os.replace(tmp_path, target)
+            for path in segments[:-1]:
+                os.remove(path)
+            print(f"[방문기록] 세그먼트 {len(segments)}개 압축 → {len(kept)}줄")
+        except Exception as e:
+            print(f"[방문기록] 압축 실패: {e}")
+        finally:
+            lock_file.close()
+
+
+# 댓글 기록은 STATE_STORE(article_id 인덱스)에서 조회하므로 인덱스는 방문 기록만 담당
+ARTICLE_ID_INDEX = ArticleIdIndex(ARTICLE_ID_INDEX_FILE, HISTORY_FILE, None, VISITED_SEGMENT_DIR)
+VISITED_LOG = VisitedLog(HISTORY_FILE, VISITED_SEGMENT_DIR, index=ARTICLE_ID_INDEX)
+
+def is_already_commented(link):
+    """visited_history.txt, comment_history.json, skip_links.json에서 이미 처리한 글인지 확인"""
+    # 가실행 모드에서는 중복 체크 안 함
+    if DRY_RUN:
+        return False
+    
+    # 입력 링크에서 article ID 추출
+    input_article_id = extract_article_id(link)
+    if not input_article_id:
+        # ID 추출 실패 시 원본 비교
+        input_article_id = link
+    
+    # 0. visited_history.txt → 처리 기록 인덱스로 조회 (파일 파싱 없음)
+    # 1. 댓글 기록 → 저장소 article_id 인덱스로 조회 (status와 관계없이 처리된 적 있으면 스킵)
+    try:
+        if ARTICLE_ID_INDEX.contains(input_article_id):
+            print(f"  -> [Skip] visited_history.txt에 이미 있음")
+            return True
+        if STATE_STORE.has_article(input_article_id):
+            print(f"  -> [Skip] 댓글 기록에 이미 있음")
+            return True
+    except Exception as e:
+        print(f"  -> [경고] 처리 기록 조회 실패, 파일 직접 확인: {e}")
+        if scan_history_files(input_article_id):
+            return True
+    
+    # 2. skip_links.json 체크 (수동 스킵 링크, 파일이 바뀌었을 때만 저장소로 다시 읽음)
+    try:
+        if STATE_STORE.is_skipped(input_article_id):
+            print(f"  -> [Skip] 수동 스킵 링크입니다.")
+            return True
+    except Exception as e:
+        print(f"  -> [경고] 스킵 링크 조회 실패: {e}")
+    
+    return False
+
+
+def scan_history_files(input_article_id):
+    """visited_history.txt, comment_history.json을 직접 읽어 확인 (인덱스를 쓸 수 없을 때만 사용)"""
+    # 0. visited_history.txt(+봉인된 세그먼트) 체크 (가장 먼저! - 이 파일이 가장 빠르게 기록됨)
+    for history_file in VISITED_LOG.files():
+        try:
+            with open(history_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    stored_url = line.strip()
+                    if not stored_url:
+                        continue
+                    stored_article_id = extract_article_id(stored_url) or stored_url
+                    if stored_article_id == input_article_id:
+                        print(f"  -> [Skip] visited_history.txt에 이미 있음")
+                        return True
+        except:
+            pass
+    
+    # 1. comment_history.json 체크
+    if os.path.exists(COMMENT_HISTORY_FILE):
+        try:
+            with open(COMMENT_HISTORY_FILE, "r", encoding="utf-8") as f:
+                history = json.load(f)
+                for item in history:
+                    stored_url = item.get("post_url", "")
+                    stored_article_id = extract_article_id(stored_url) or stored_url
+                    
+                    # article ID로 비교 (status와 관계없이 처리된 적 있으면 스킵)
+                    # pending, approved, posted, cancelled 모두 중복으로 처리
+                    if stored_article_id == input_article_id:
+                        status = item.get("status", "unknown")
+                        print(f"  -> [Skip] comment_history.json에 이미 있음 (status: {status})")
+                        return True
+        except:
+            pass
+    
+    return False
+
+# ==========================================
+# [HTTP 탐색] 브라우저 없이 카페 검색/목록/본문 JSON 조회
+# ==========================================
+# bot_config.json의 "discovery_mode"로 선택: "browser"(기본, 기존 방식) 또는 "http"
+# http 모드에서는 크롤러가 Chrome을 띄우지 않고 naver_cookies.pkl 쿠키를 재사용한
+# requests.Session으로 카페 API를 직접 호출합니다. (Selenium은 게시 워커에서만 사용)
+CAFE_SEARCH_API_URL = "https://apis.naver.com/cafe-web/cafe-mobile/CafeMobileWebArticleSearchListV4"
+CAFE_ARTICLE_LIST_API_URL = "https://apis.naver.com/cafe-web/cafe2/ArticleListV2dot1.json"
+CAFE_ARTICLE_API_URL = "https://apis.naver.com/cafe-web/cafe-articleapi/v2.1/cafes/{club_id}/articles/{article_id}"
+CAFE_HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# 녹화된 응답으로 오프라인 실행 (테스트용): DISCOVERY_FIXTURE_FILE=fixtures/cafe_api_sample.json
+DISCOVERY_FIXTURE_FILE = os.environ.get("DISCOVERY_FIXTURE_FILE", "")
+# 실제 응답을 fixture 형식으로 녹화: DISCOVERY_RECORD_FILE=fixtures/recorded.json
+DISCOVERY_RECORD_FILE = os.environ.get("DISCOVERY_RECORD_FILE", "")
+
+KST = timezone(timedelta(hours=9))
+
+# 탐색 결과 한 건: (article_id, title, date, menu_id)
+DiscoveredArticle = collections.namedtuple(
+    "DiscoveredArticle", ["article_id", "title", "date", "menu_id", "writer", "comment_count"], defaults=(None, None)
+)
+# 검색/목록 페이지 한 줄: 본문을 열기 전에 알 수 있는 정보 (writer/comment_count는 못 읽으면 None)
+ListedArticle = collections.namedtuple(
+    "ListedArticle", ["link", "title", "date", "writer", "comment_count"], defaults=(None, None)
+)
+
+
+def build_article_url(club_id, article_id):
+    """club_id/article_id로 크롤러가 쓰는 게시글 URL 생성"""
+    return f"https://cafe.naver.com/f-e/cafes/{club_id}/articles/{article_id}"
+
+
+def format_cafe_timestamp(value):
+    """카페 API 날짜(ms 타임스탬프 또는 문자열)를 "YYYY.MM.DD HH:MM" 형식으로 변환"""
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        ts = int(value)
+        if ts > 10 ** 11:  # 밀리초
+            ts = ts / 1000
+        return datetime.fromtimestamp(ts, KST).strftime("%Y.%m.%d %H:%M")
+    return str(value).strip()
+
+
+def html_to_text(html_text):
+    """본문 HTML에서 태그를 제거하고 텍스트만 반환"""
+    import html
+    if not html_text:
+        return ""
+    text = re.sub(r'<(script|style)[^>]*>.*?</\1>', ' ', html_text, flags=re.S | re.I)
+    text = re.sub(r'<br\s*/?>|</p>|</div>', '\n', text, flags=re.I)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = html.unescape(text)
+    lines = [re.sub(r'[ \t ]+', ' ', line).strip() for line in text.split('\n')]
+    return "\n".join(line for line in lines if line)
+
+
+class CafeHttpClient:
+    """카페 검색/게시판 목록/게시글 API를 requests.Session으로 호출하는 탐색 백엔드
+    
+    - 쿠키는 naver_cookies.pkl(get_cookies.py로 생성)을 그대로 재사용
+    - 커넥션 풀을 재사용하므로 키워드/게시판을 여러 번 조회해도 TCP/TLS 핸드셰이크가 반복되지 않음
+    """
+
+    def __init__(self, cookie_file=None, timeout=10, pool_size=8, record_file=None):
+        self.timeout = timeout
+        self.record_file = record_file
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": CAFE_HTTP_USER_AGENT,
+            "Referer": "https://cafe.naver.com/",
+            "Accept": "application/json, text/plain, */*",
+        })
+        if cookie_file:
+            self.load_cookies(cookie_file)
+
+    def load_cookies(self, cookie_file):
+        """Selenium 형식(pickle된 dict 목록) 쿠키를 Session에 적재"""
+        if not os.path.exists(cookie_file):
+            print(f"[HTTP 탐색] 쿠키 파일 없음: {cookie_file}")
+            return False
+        try:
+            with open(cookie_file, "rb") as f:
+                cookies = pickle.load(f)
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain", ".naver.com"),
+                    path=cookie.get("path", "/")
+                )
+            return True
+        except Exception as e:
+            print(f"[HTTP 탐색] 쿠키 로드 실패: {e}")
+            return False
+
+    def _get_json(self, kind, key, url, params=None):
+        """GET 요청 후 JSON 반환 (kind/key는 fixture 녹화/재생용 식별자)"""
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if self.record_file:
+            self._record(kind, key, data)
+        return data
+
+    def _record(self, kind, key, data):
+        """응답을 fixture 파일에 누적 저장"""
+        fixtures = {}
+        if os.path.exists(self.record_file):
+            try:
+                with open(self.record_file, "r", encoding="utf-8") as f:
+                    fixtures = json.load(f)
+            except Exception:
+                fixtures = {}
+        fixtures.setdefault(kind, {})[key] = data
+        with open(self.record_file, "w", encoding="utf-8") as f:
+            json.dump(fixtures, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _article_list(data):
+        """검색/목록 응답에서 글 목록 배열 추출 (응답 버전별 구조 차이 흡수)"""
+        result = (data.get("message") or {}).get("result") or data.get("result") or {}
+        return result.get("articleList") or []
+
+    @staticmethod
+    def _to_discovered(item, default_menu_id=0):
+        """API 글 항목 하나를 DiscoveredArticle로 변환"""
+        item = item.get("item", item)  # 검색 API는 {"type": ..., "item": {...}} 형태
+        article_id = item.get("articleId") or item.get("articleid")
+        if not article_id:
+            return None
+        title = html_to_text(item.get("subject") or "")
+        date = format_cafe_timestamp(
+            item.get("writeDateTimestamp") or item.get("addDate") or item.get("writeDate") or ""
+        )
+        menu_id = item.get("menuId") or item.get("menuid") or default_menu_id
+        writer = item.get("nickName") or item.get("writerNickname") or (item.get("writer") or {}).get("nick")
+        comment_count = item.get("commentCount")
+        if comment_count is None:
+            comment_count = item.get("commentcount")
+        return DiscoveredArticle(str(article_id), title, date, int(menu_id), writer,
+                                 int(comment_count) if comment_count is not None else None)
+
+    def search(self, club_id, keyword, menu_id=0, page=1, per_page=50):
+        """키워드 검색 (브라우저의 /menus/0?q= 검색과 동일, 최신순)
+        
+        Returns:
+            list[DiscoveredArticle]
+        """
+        params = {
+            "cafeId": club_id,
+            "query": keyword,
+            "searchBy": 1,  # 제목+본문
+            "sortBy": "date",
+            "page": page,
+            "perPage": per_page,
+            "adUnit": "MW_CAFE_BOARD",
+        }
+        if menu_id:
+            params["menuId"] = menu_id
+        key = f"{club_id}|{menu_id}|{keyword}|{page}"
+        data = self._get_json("search", key, CAFE_SEARCH_API_URL, params)
+        articles = [self._to_discovered(item, menu_id) for item in self._article_list(data)]
+        return [a for a in articles if a]
+
+    def list_articles(self, club_id, menu_id=0, page=1, per_page=50):
+        """게시판 최신글 목록 (menu_id=0이면 전체글보기)
+        
+        Returns:
+            list[DiscoveredArticle]
+        """
+        params = {
+            "search.clubid": club_id,
+            "search.menuid": menu_id,
+            "search.queryType": "lastArticle",
+            "search.page": page,
+            "search.perPage": per_page,
+        }
+        key = f"{club_id}|{menu_id}|{page}"
+        data = self._get_json("list", key, CAFE_ARTICLE_LIST_API_URL, params)
+        articles = [self._to_discovered(item, menu_id) for item in self._article_list(data)]
+        return [a for a in articles if a]
+
+    def fetch_article(self, club_id, article_id):
+        """게시글 본문/댓글 조회 (브라우저에서 cafe_main iframe을 읽는 것과 같은 정보)
+        
+        Returns:
+            dict: title, content, date, menu_id, comment_authors, comment_member_ids, comments
+            None: 삭제/권한 없음 등으로 조회 실패 시
+        """
+        url = CAFE_ARTICLE_API_URL.format(club_id=club_id, article_id=article_id)
+        key = f"{club_id}|{article_id}"
+        try:
+            data = self._get_json("article", key, url, {"useCafeId": "true", "requestFrom": "A"})
+        except Exception as e:
+            print(f"  -> [HTTP 탐색] 게시글 조회 실패 ({article_id}): {e}")
+            return None
+        result = data.get("result") or {}
+        article = result.get("article") or {}
+        if not article:
+            return None
+        comment_items = (result.get("comments") or {}).get("items") or []
+        return {
+            "title": html_to_text(article.get("subject") or ""),
+            "content": html_to_text(article.get("contentHtml") or ""),
+            "date": format_cafe_timestamp(article.get("writeDate")),
+            "menu_id": int((article.get("menu") or {}).get("id") or 0),
+            "comment_authors": [(c.get("writer") or {}).get("nick", "") for c in comment_items],
+            "comment_member_ids": [(c.get("writer") or {}).get("id", "") for c in comment_items],
+            "comments": [html_to_text(c.get("content") or "") for c in comment_items],
+        }
+
+
+class FixtureCafeHttpClient(CafeHttpClient):
+    """녹화된 fixture(JSON)로 응답하는 CafeHttpClient 대체품 (네트워크 없이 테스트용)
+    
+    fixture 형식: {"search": {key: 응답}, "list": {key: 응답}, "article": {key: 응답}}
+    (DISCOVERY_RECORD_FILE로 녹화한 파일을 그대로 사용)
+    """
+
+    def __init__(self, fixture_file):
+        super().__init__(cookie_file=None)
+        with open(fixture_file, "r", encoding="utf-8") as f:
+            self.fixtures = json.load(f)
+        self.requests_made = []
+
+    def _get_json(self, kind, key, url, params=None):
+        self.requests_made.append((kind, key))
+        data = self.fixtures.get(kind, {}).get(key)
+        if data is None:
+            # 녹화되지 않은 요청은 빈 결과로 처리
+            return {}
+        return data
+
+
+def create_cafe_http_client():
+    """환경변수에 따라 실제/녹화 재생 HTTP 클라이언트 생성"""
+    if DISCOVERY_FIXTURE_FILE:
+        print(f"[HTTP 탐색] fixture 재생 모드: {DISCOVERY_FIXTURE_FILE}")
+        return FixtureCafeHttpClient(DISCOVERY_FIXTURE_FILE)
+    return CafeHttpClient(cookie_file=COOKIE_FILE, record_file=DISCOVERY_RECORD_FILE or None)
+
+
+# ==========================================
+# [경량 로딩] 크롤러 전용 리소스 차단 (bot_config "lean_fetch", Headless 모드에서만)
+# ==========================================
+# 크롤러는 div.se-main-container 본문과 댓글 텍스트만 읽으므로 이미지/폰트/미디어/광고/통계 요청은 불필요.
+# CSS/JS는 본문 렌더링(.text 계산)에 필요하므로 차단하지 않음. 게시 워커는 항상 전체 로딩 유지.
+# 차단 대상 리소스 종류 (CDP resourceType 기준, bench_lean_fetch.py가 차단 못 한 요청을 찾을 때도 사용)
+LEAN_FETCH_RESOURCE_TYPES = ("Image", "Font", "Media")
+LEAN_FETCH_BLOCKED_EXTENSIONS = [
+    "png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "m3u8", "mp3",
+]
+LEAN_FETCH_BLOCKED_URLS = [
+    # 이미지/폰트/미디어: 네이버 CDN은 "...png?type=w800" 처럼 쿼리를 붙이므로 쿼리 있는 형태도 함께
+    # ("*.png*"로 쓰면 "a.png.js" 같은 스크립트까지 걸릴 수 있어 확장자 뒤는 끝 또는 ?만 허용)
+    *[pattern for ext in LEAN_FETCH_BLOCKED_EXTENSIONS for pattern in (f"*.{ext}", f"*.{ext}?*")],
+    # 광고/통계 호스트
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adcr.naver.com*", "*veta.naver.com*", "*nlog.naver.com*", "*lcs.naver.com*",
+    "*tivan.naver.com*", "*ntm.pstatic.net*", "*ssl.pstatic.net/tveta*", "*cafe.naver.com/ca-fe/web/ad*",
+]
+
+
+def is_lean_fetch_enabled(bot_config):
+    """경량 로딩 사용 여부 (opt-in, Headless 모드 전용)"""
+    return HEADLESS_MODE and bool(bot_config.get("lean_fetch", False))
+
+
+def apply_lean_fetch(driver):
+    """CDP Network.setBlockedURLs로 불필요한 리소스 요청 차단
+    
+    resourceType 기준 차단(Fetch.enable + patterns)은 멈춘 요청마다 Fetch.requestPaused 이벤트를 받아
+    failRequest/continueRequest로 풀어줘야 하는데, 동기 execute_cdp_cmd로는 이벤트를 받을 수 없어 요청이 멈춘 채 남습니다.
+    그래서 URL 패턴 차단을 쓰고, 패턴이 놓치는 Image/Font/Media 요청은 bench_lean_fetch.py로 확인합니다.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_FETCH_BLOCKED_URLS})
+        return True
+    except Exception as e:
+        print(f"[경량 로딩] CDP 차단 설정 실패 (일반 로딩으로 진행): {e}")
+        return False
+
+
+# ==========================================
+# [크롤러 봇] - 반자동 시스템: 댓글 생성만 하고 pending 상태로 저장
+# ==========================================
+def create_crawler_driver(chrome_options, lean=False):
+    """크롤러용 Chrome 생성 (lean이면 리소스 차단 적용)"""
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    if lean:
+        apply_lean_fetch(driver)
+    return driver
+
+
+def build_crawler_chrome_options(profile_name=None, lean=False):
+    """크롤러용 Chrome 옵션 생성
+    
+    Args:
+        profile_name: Headless 모드에서 사용할 user-data-dir 이름 (SCRIPT_DIR 기준, None이면 창 모드 옵션)
+        lean: 경량 로딩 (page load strategy eager + 이미지 비활성화)
+    """
+    chrome_options = Options()
+    if lean:
+        # DOMContentLoaded 시점에 driver.get 반환 (이미지/광고 로딩 완료를 기다리지 않음)
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    
+    if HEADLESS_MODE and profile_name:
+        print("[봇] Headless 모드로 실행")
+        
+        user_data_dir = os.path.join(SCRIPT_DIR, profile_name)
+        os.makedirs(user_data_dir, exist_ok=True)
+        print(f"[봇] Chrome user-data-dir: {user_data_dir}")
+        
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-software-rasterizer")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-setuid-sandbox")
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    else:
+        chrome_options.add_argument("--start-maximized")
+    return chrome_options
+
+
+def remove_chrome_profile(profile_name):
+    """Headless 모드에서 만든 user-data-dir 정리"""
+    user_data_dir = os.path.join(SCRIPT_DIR, profile_name)
+    if os.path.exists(user_data_dir):
+        try:
+            import shutil
+            shutil.rmtree(user_data_dir)
+            print(f"[크롤러] Chrome user-data-dir 정리 완료: {user_data_dir}")
+        except Exception as e:
+            print(f"[크롤러] Chrome user-data-dir 정리 실패: {e}")
+
+
+def open_article_in_driver(driver, link, delay_range=None):
+    """게시글을 열고 cafe_main iframe에서 정보를 추출한 뒤 기본 프레임으로 복귀
+    
+    Args:
+        delay_range: 글 사이 지연 (초) 범위, None이면 jitter 정책 "crawl_page" 사용
+    """
+    driver.get(link)
+    
+    switch_to_cafe_frame(driver)
+    wait_for_article_content(driver)
+    
+    if delay_range is None:
+        human_pause("crawl_page")
+    elif delay_range[1] > 0:
+        time.sleep(random.uniform(*delay_range))
+    
+    try:
+        return extract_article_from_driver(driver)
+    finally:
+        driver.switch_to.default_content()
+
+
+# ==========================================
+# [브라우저 워커 풀] 게시글 본문 병렬 조회
+# ==========================================
+class BrowserWorkerPool:
+    """headless Chrome 워커 N개로 게시글 본문을 병렬 조회하는 풀
+    
+    - 워커마다 chrome_data_{pid}_{n} 프로필(profile_prefix_{n})과 load_cookies 로그인을 따로 가짐
+    - 공유 작업 큐에서 후보를 꺼내 extract_article_from_driver 결과를 돌려줌
+    - 워커마다 글 사이에 delay_range 초(None이면 jitter 정책 "crawl_page") 쉬어 카페 요청 간격을 유지
+    """
+
+    def __init__(self, size, delay_range=None, lean=False, profile_prefix=None):
+        self.size = size
+        self.profile_prefix = profile_prefix or f"chrome_data_{os.getpid()}"
+        self.delay_range = delay_range
+        self.lean = lean
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.threads = []
+        self.batch_id = 0
+
+    def start(self):
+        for n in range(self.size):
+            thread = threading.Thread(target=self._worker, args=(n,), name=f"browser-worker-{n}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"[워커풀] 브라우저 워커 {self.size}개 시작")
+
+    def alive(self):
+        return any(t.is_alive() for t in self.threads)
+
+    def _worker(self, n):
+        profile_name = f"{self.profile_prefix}_{n}"
+        chrome_options = build_crawler_chrome_options(profile_name, lean=self.lean)
+        driver = None
+        job = None  # 꺼냈지만 아직 결과를 돌려주지 않은 작업
+        try:
+            driver = create_crawler_driver(chrome_options, lean=self.lean)
+            if not load_cookies(driver):
+                print(f"[워커풀] 워커 {n} 로그인 실패 - 종료")
+                return
+            
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                batch_id, candidate = job
+                article = None
+                try:
+                    print(f"[워커 {n}] 조회: {candidate['title'][:15]}...")
+                    article = open_article_in_driver(driver, candidate["link"], self.delay_range)
+                except Exception as e:
+                    err_msg = str(e)
+                    print(f"[워커 {n}] 에러: {err_msg[:100]}")
+                    if is_chrome_crash(err_msg):
+                        driver = restart_crawler_driver(driver, chrome_options, lean=self.lean)
+                        if driver is None:
+                            return
+                self.results.put((batch_id, candidate, article))
+                job = None
+        except Exception as e:
+            print(f"[워커풀] 워커 {n} 비정상 종료: {e}")
+        finally:
+            if job is not None:
+                # 재시작 실패 등으로 워커가 끝나도 fetch_articles가 이 글을 기다리며 멈추지 않게 실패로 돌려줌
+                batch_id, candidate = job
+                self.results.put((batch_id, candidate, None))
+            if driver is not None:
+                try:
+                    driver.quit()
+                except:
+                    pass
+            if HEADLESS_MODE:
+                remove_chrome_profile(profile_name)
+
+    def fetch_articles(self, candidates, admit=None, abandon=None, stop=None):
+        """후보들을 워커에 나눠 본문 조회, 끝나는 순서대로 (candidate, article) yield
+        
+        Args:
+            candidates: collect_cycle_candidates 후보 목록
+            admit: 제출 직전 호출되는 함수, False면 해당 후보 건너뜀 (중복 체크/방문 기록용)
+            abandon: 중간에 멈춰서 admit은 했지만 결과를 돌려주지 못한 후보마다 호출 (지연 재시도 대기열용)
+            stop: 결과를 기다리는 동안 확인하는 종료 조건 함수, True면 조회 중단 (stop_requested 등)
+        
+        한 번에 워커 수 x 2개까지만 큐에 올리므로, 중간에 멈췄을 때 abandon으로 넘어가는 글은 최대 워커 수 x 2개입니다.
+        조회에 실패한 글은 article=None으로 돌려줍니다.
+        """
+        self.batch_id += 1
+        batch_id = self.batch_id
+        pending = iter(candidates)
+        outstanding = {}  # admit 후 아직 돌려주지 않은 후보 (link → candidate)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(outstanding) < self.size * 2:
+                    candidate = next(pending, None)
+                    if candidate is None:
+                        exhausted = True
+                        break
+                    if admit is not None and not admit(candidate):
+                        continue
+                    outstanding[candidate["link"]] = candidate
+                    self.jobs.put((batch_id, candidate))
+                
+                if not outstanding:
+                    return
+                
+                try:
+                    result_batch, candidate, article = self.results.get(timeout=5)
+                except queue.Empty:
+                    if not self.alive():
+                        print("[워커풀] 살아있는 워커 없음 - 조회 중단")
+                        return
+                    if stop is not None and stop():
+                        return
+                    continue
+                if result_batch != batch_id:
+                    continue  # 이전 사이클에서 중단된 작업의 결과 (그때 abandon으로 넘김)
+                outstanding.pop(candidate["link"], None)
+                yield candidate, article
+        finally:
+            # 중간에 멈춘 경우 아직 시작 안 한 작업은 큐에서 빼고, 조회 중이던 것까지 abandon으로 넘김
+            try:
+                while True:
+                    self.jobs.get_nowait()
+            except queue.Empty:
+                pass
+            if outstanding:
+                print(f"[워커풀] 중단으로 조회하지 못한 글 {len(outstanding)}개")
+                for candidate in outstanding.values():
+                    if abandon is not None:
+                        abandon(candidate)
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout=30)
+        print("[워커풀] 브라우저 워커 종료")
+
+
+def is_chrome_crash(err_msg):
+    """예외 메시지로 Chrome 크래시(세션 끊김) 여부 판단"""
+    return "Connection refused" in err_msg or "invalid session" in err_msg.lower()
+
+
+def restart_crawler_driver(driver, chrome_options, lean=False):
+    """크래시난 크롤러 브라우저를 재시작하고 쿠키로 재로그인 (실패 시 None)"""
+    print("[경고] Chrome 크래시 감지! 브라우저 재시작...")
+    try:
+        driver.quit()
+    except:
+        pass
+    # 새 브라우저 시작
+    driver = create_crawler_driver(chrome_options, lean=lean)
+    if not load_cookies(driver):
+        print("[에러] 재로그인 실패. 종료합니다.")
+        driver.quit()
+        return None
+    print("[복구] 브라우저 재시작 완료!")
+    return driver
+
+
+# 검색 결과 목록(viewType=L)에서 글 링크와 같은 줄의 날짜/작성자/댓글 수를 한 번에 읽는 스크립트
+# (목록 UI 버전마다 클래스가 달라 셀렉터를 여러 개 시도, 못 찾으면 null)
+SEARCH_LIST_EXTRACT_SCRIPT = """
+function pick(row, selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        var el = row.querySelector(selectors[i]);
+        if (el && el.innerText.trim()) return el.innerText.trim();
+    }
+    return null;
+}
+var links = document.querySelectorAll("a[href*='/articles/']:not([class*='comment'])");
+var rows = [];
+for (var i = 0; i < links.length && i < 50; i++) {
+    var a = links[i];
+    var row = a.closest("tr, li, [class*='ArticleItem'], [class*='article-board']") || a.parentElement;
+    var count = pick(row, [".cmt", ".comment_count", ".num_comment", "[class*='comment'] em", "[class*='Comment'] em"]);
+    var digits = count ? count.replace(/[^0-9]/g, "") : "";
+    rows.push({
+        href: a.href,
+        title: (a.innerText || "").trim(),
+        date: pick(row, [".td_date", ".date", "[class*='date']"]),
+        writer: pick(row, [".td_name .nickname", ".nickname", ".nick", "[class*='nick']"]),
+        comment_count: digits ? parseInt(digits, 10) : null
+    });
+}
+return rows;
+"""
+
+
+def search_keyword_links(club_id, keyword, driver=None, http_client=None, page=1):
+    """키워드 검색 결과 한 페이지에서 ListedArticle(link, title, date, writer, comment_count) 목록 반환 (최대 50개)
+    
+    목록에서 읽지 못한 값은 None입니다 (브라우저 목록 UI에 따라 date/writer/comment_count가 비어 있을 수 있음).
+    """
+    target_links = []
+    if http_client is not None:
+        for found in http_client.search(club_id, keyword, page=page)[:50]:  # 50개 글 탐색
+            if len(found.title) > 1:
+                target_links.append(ListedArticle(build_article_url(club_id, found.article_id), found.title, found.date,
+                                                  found.writer, found.comment_count))
+        return target_links
+    
+    encoded = urllib.parse.quote(keyword)
+    search_url = f"https://cafe.naver.com/f-e/cafes/{club_id}/menus/0?viewType=L&ta=ARTICLE_COMMENT&page={page}&q={encoded}"
+    driver.get(search_url)
+    wait_for_search_results(driver)
+    human_pause("crawl_page")
+    
+    try:
+        rows = driver.execute_script(SEARCH_LIST_EXTRACT_SCRIPT) or []
+    except Exception as e:
+        if is_chrome_crash(str(e)):
+            raise
+        print(f"  -> [검색] 목록 읽기 실패: {str(e)[:100]}")
+        rows = []
+    for row in rows:  # 50개 글 탐색
+        try:
+            raw_link = row.get("href") or ""
+            clean_link = raw_link.split('?')[0] if '?' in raw_link else raw_link
+            title = (row.get("title") or "").strip()
+            if clean_link and len(title) > 1:
+                target_links.append(ListedArticle(clean_link, title, row.get("date"), row.get("writer"), row.get("comment_count")))
+        except: continue
+    return target_links
+
+
+# ==========================================
+# [증분 크롤링] 카페/키워드별 최고 article ID 워터마크
+# ==========================================
+def load_crawl_watermarks():
+    """crawl_watermarks.json 로드: {"club_id|keyword": {"max_article_id", "newest_date", "updated_at", ("gap")}}"""
+    if os.path.exists(CRAWL_WATERMARK_FILE):
+        try:
+            with open(CRAWL_WATERMARK_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[워터마크] 로드 실패 (전체 탐색으로 진행): {e}")
+    return {}
+
+
+WATERMARK_LOCK = threading.Lock()
+
+
+def save_crawl_watermarks(watermarks):
+    """워터마크 저장 (임시 파일에 쓴 뒤 교체하여 중간에 끊겨도 파일이 깨지지 않게 함)
+    
+    카페별 스레드가 동시에 저장할 수 있으므로 파일의 최신 값과 합치고, 키마다 더 큰 article ID만 반영합니다.
+    """
+    with WATERMARK_LOCK:
+        merged = load_crawl_watermarks()
+        for key, mark in watermarks.items():
+            current = merged.get(key)
+            # 같은 article ID면 이어보기 지점(gap)이 바뀐 이번 값을 반영
+            if not current or article_id_number(mark.get("max_article_id")) >= article_id_number(current.get("max_article_id")):
+                merged[key] = mark
+        tmp_file = CRAWL_WATERMARK_FILE + f".{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(merged, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, CRAWL_WATERMARK_FILE)
+        except Exception as e:
+            print(f"[워터마크] 저장 실패: {e}")
+
+
+def watermark_key(club_id, scope):
+    """워터마크 키 (scope: 검색 키워드 또는 "menu:{menu_id}")"""
+    return f"{club_id}|{scope}"
+
+
+def article_id_number(article_id):
+    """article ID를 비교용 정수로 변환 (숫자가 아니면 0)"""
+    try:
+        return int(article_id)
+    except (TypeError, ValueError):
+        return 0
+
+
+def collect_new_links(fetch_page, key, label, watermarks=None, max_pages=1):
+    """워터마크 이후의 새 글만 수집 (최신순 목록 기준, 검색/게시판 피드 공용)
+    
+    - 워터마크가 없으면(첫 실행/새 키워드) 1페이지만 보고 기준점을 잡음
+    - 한 페이지가 전부 새 글이면 놓친 글이 있을 수 있으므로 다음 페이지로 진행 (max_pages까지)
+    - 이미 본 글이 나오면 거기서 멈춤
+    - max_pages까지 전부 새 글이면 (이전 워터마크, 가장 오래된 수집 글) 사이를 "gap" 이어보기 지점으로 남기고,
+      다음 사이클에 새 글을 본 뒤 그 페이지부터 max_pages만큼 이어서 수집 (몰린 키워드에서도 글을 잃지 않음)
+    - watermarks dict는 제자리에서 갱신됨 (저장은 호출자가 사이클 완료 후 수행)
+    
+    Args:
+        fetch_page: page 번호를 받아 ListedArticle 목록을 돌려주는 함수
+        key: watermark_key()로 만든 워터마크 키
+        label: 로그용 이름 (키워드 또는 게시판)
+    
+    Returns:
+        list: ListedArticle 목록
+    """
+    mark = (watermarks or {}).get(key)
+    seen_max = article_id_number(mark.get("max_article_id")) if mark else 0
+    gap = (mark or {}).get("gap")
+    
+    def number(item):
+        return article_id_number(extract_article_id(item.link))
+    
+    new_links = []
+    page = 1
+    truncated = False
+    while True:
+        page_links = fetch_page(page)
+        fresh = [item for item in page_links if number(item) > seen_max or not extract_article_id(item.link)]
+        new_links.extend(fresh)
+        
+        if not mark or not page_links or len(fresh) < len(page_links):
+            break
+        if page >= max_pages:
+            print(f"  -> [워터마크] '{label}' {max_pages}페이지까지 전부 새 글 (이후 글은 다음 사이클에 이어서)")
+            truncated = True
+            break
+        page += 1
+    
+    if truncated:
+        # 이번에도 끊겼으면 남은 구간을 이전 gap과 합쳐 하나의 이어보기 지점으로 (겹치는 글은 중복 체크에서 걸러짐)
+        oldest = min((number(item) for item in new_links if number(item)), default=seen_max)
+        gap = {"floor": gap["floor"] if gap else seen_max, "below": oldest, "page": max_pages + 1}
+    elif gap:
+        # 지난 사이클에 끊긴 구간 이어서 수집 (그 사이 새 글이 올라와 페이지가 밀려도 겹칠 뿐 건너뛰지 않음)
+        gap_page = gap["page"]
+        for gap_page in range(gap["page"], gap["page"] + max_pages):
+            page_links = fetch_page(gap_page)
+            in_gap = [item for item in page_links if gap["floor"] < number(item) < gap["below"]]
+            new_links.extend(in_gap)
+            if not page_links or any(number(item) and number(item) <= gap["floor"] for item in page_links):
+                print(f"  -> [워터마크] '{label}' 지난 사이클에 남은 구간 수집 완료 ({gap_page}페이지까지)")
+                gap = None
+                break
+        else:
+            below = min((number(item) for item in new_links if gap["floor"] < number(item) < gap["below"]), default=gap["below"])
+            gap = {"floor": gap["floor"], "below": below, "page": gap_page + 1}
+    
+    if watermarks is not None:
+        newest_id = max([number(item) for item in new_links] + [seen_max])
+        dates = [item.date for item in new_links if item.date and number(item) > seen_max]
+        newest_date = max(dates) if dates else (mark or {}).get("newest_date")
+        if newest_id > seen_max or gap != (mark or {}).get("gap"):
+            updated = {
+                "max_article_id": newest_id,
+                "newest_date": newest_date,
+                "updated_at": datetime.now().isoformat(),
+            }
+            if gap:
+                updated["gap"] = gap
+            watermarks[key] = updated
+    
+    if mark and page > 1:
+        print(f"  -> [워터마크] '{label}' {page}페이지까지 탐색")
+    return new_links
+
+
+def search_new_links(club_id, keyword, watermarks=None, max_pages=1, driver=None, http_client=None):
+    """키워드 검색에서 워터마크 이후의 새 글만 가져오기 (collect_new_links 참고)"""
+    return collect_new_links(
+        lambda page: search_keyword_links(club_id, keyword, driver=driver, http_client=http_client, page=page),
+        watermark_key(club_id, keyword), keyword, watermarks=watermarks, max_pages=max_pages
+    )
+
+
+# ==========================================
+# [게시판 피드] CAFE_MENU_IDS 게시판 최신글을 동시에 감시하고 키워드는 로컬에서 매칭
+# ==========================================
+def get_cafe_menu_ids(cafe_info):
+    """카페별 감시 게시판 ID 목록 (MULTI_CAFES 항목의 "menu_ids" → 현재 카페면 CAFE_MENU_IDS → 전체글보기 0)"""
+    menu_ids = cafe_info.get("menu_ids")
+    if not menu_ids and str(cafe_info.get("club_id")) == str(config.CLUB_ID):
+        menu_ids = getattr(config, "CAFE_MENU_IDS", None)
+    return list(menu_ids) if menu_ids else [0]
+
+
+def match_keywords(text, keywords):
+    """text에 포함된 키워드 목록 반환 (대소문자 무시, KeywordMatcher로 한 번에 매칭)"""
+    if not keywords:
+        return []
+    return get_keyword_matcher(keywords).find(text)
+
+
+def feed_new_links(club_id, menu_id, http_client, watermarks=None, max_pages=1):
+    """게시판 최신글 피드에서 워터마크 이후의 새 글만 가져오기"""
+    def fetch_page(page):
+        return [ListedArticle(build_article_url(club_id, a.article_id), a.title, a.date, a.writer, a.comment_count)
+                for a in http_client.list_articles(club_id, menu_id, page=page)]
+    return collect_new_links(fetch_page, watermark_key(club_id, f"menu:{menu_id}"), f"게시판 {menu_id}",
+                             watermarks=watermarks, max_pages=max_pages)
+
+
+def collect_feed_candidates(multi_cafes, keywords, http_client, watermarks=None, max_pages=1, match_body=False):
+    """게시판 피드 탐색: 카페별 CAFE_MENU_IDS 게시판을 동시에 조회하고 제목에서 키워드 매칭
+    
+    키워드마다 서버 검색을 하는 대신 게시판당 목록 1회(새 글이 많을 때만 추가 페이지)로 끝납니다.
+    
+    Args:
+        match_body: True면 제목에 키워드가 없는 새 글도 후보로 넣고, 본문 조회 후 다시 매칭
+        
+    Returns:
+        dict: collect_cycle_candidates와 같은 형식 (+ "menu_id", "match_body")
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    feeds = []
+    for cafe_info in multi_cafes:
+        for menu_id in get_cafe_menu_ids(cafe_info):
+            feeds.append((cafe_info, menu_id))
+    
+    def poll(feed):
+        cafe_info, menu_id = feed
+        try:
+            return feed_new_links(cafe_info["club_id"], menu_id, http_client, watermarks=watermarks, max_pages=max_pages)
+        except Exception as e:
+            print(f"  -> [피드 에러] {cafe_info.get('name')} 게시판 {menu_id}: {str(e)[:100]}")
+            return []
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(feeds))) as executor:
+        results = list(executor.map(poll, feeds))
+    
+    candidates = {}
+    total_new = 0
+    for (cafe_info, menu_id), links in zip(feeds, results):
+        cafe_display_name = cafe_info.get("name", cafe_info["cafe_name"])
+        matched_count = 0
+        for listed in links:
+            link, title = listed.link, listed.title
+            hits = match_keywords(title, keywords)
+            if not hits and not match_body:
+                continue
+            article_id = extract_article_id(link) or link
+            key = (str(cafe_info["club_id"]), article_id)
+            if key in candidates:
+                continue
+            candidates[key] = {
+                "club_id": cafe_info["club_id"],
+                "cafe_name": cafe_display_name,
+                "article_id": article_id,
+                "menu_id": menu_id,
+                "link": link,
+                "title": title,
+                "date": listed.date,
+                "writer": listed.writer,
+                "comment_count": listed.comment_count,
+                "keywords": hits,
+                "match_body": not hits,
+            }
+            matched_count += 1
+        total_new += len(links)
+        print(f">>> [{cafe_display_name}] 게시판 {menu_id}: 새 글 {len(links)}개, 후보 {matched_count}개")
+    
+    print(f"\n[피드] 게시판 {len(feeds)}개 새 글 {total_new}건 → 후보 {len(candidates)}개")
+    return candidates
+
+
+def collect_cycle_candidates(multi_cafes, keywords, driver=None, http_client=None, watermarks=None, max_pages=1, scheduler=None):
+    """사이클 탐색 단계: 모든 카페/키워드 검색을 먼저 돌리고 결과를 글 단위로 합침
+    
+    같은 글이 여러 키워드에 걸려도 후보는 하나만 만들고, 걸린 키워드는 "keywords"에 누적합니다.
+    분석 단계는 이 후보 집합을 한 번만 순회하므로 중복 조회/중복 체크 파일 I/O가 사라집니다.
+    watermarks를 주면 키워드별로 지난 사이클 이후의 새 글만 후보로 만듭니다 (search_new_links 참고).
+    scheduler(KeywordScheduler)를 주면 카페마다 검색할 키워드를 고르고 키워드별 신규 후보 수를 기록합니다.
+    
+    Returns:
+        dict: {(club_id, article_id): {"club_id", "cafe_name", "article_id", "link", "title", "date",
+                                        "writer", "comment_count", "keywords"}}
+              (처음 발견된 순서 유지)
+    """
+    candidates = {}
+    total_hits = 0
+    
+    for cafe_info in multi_cafes:
+        if stop_requested():
+            break
+        
+        current_club_id = cafe_info["club_id"]
+        current_cafe_name = cafe_info["cafe_name"]
+        cafe_display_name = cafe_info.get("name", current_cafe_name)
+        
+        print(f"\n{'='*50}")
+        print(f"[카페] {cafe_display_name} (club_id: {current_club_id})")
+        print(f"{'='*50}")
+        
+        cafe_keywords = scheduler.plan(current_club_id, keywords) if scheduler is not None else keywords
+        
+        # 전체글보기에서만 검색 (menu_id=0)
+        for keyword in cafe_keywords:
+            if stop_requested():
+                break
+            
+            try:
+                if watermarks is not None:
+                    target_links = search_new_links(current_club_id, keyword, watermarks=watermarks, max_pages=max_pages,
+                                                    driver=driver, http_client=http_client)
+                else:
+                    target_links = search_keyword_links(current_club_id, keyword, driver=driver, http_client=http_client)
+            except Exception as e:
+                err_msg = str(e)
+                print(f"  -> [키워드 에러] {err_msg[:100]}")
+                if driver is not None and is_chrome_crash(err_msg):
+                    raise
+                continue
+            
+            new_count = 0
+            for listed in target_links:
+                link = listed.link
+                article_id = extract_article_id(link) or link
+                key = (str(current_club_id), article_id)
+                candidate = candidates.get(key)
+                if candidate is None:
+                    candidates[key] = {
+                        "club_id": current_club_id,
+                        "cafe_name": cafe_display_name,
+                        "article_id": article_id,
+                        "link": link,
+                        "title": listed.title,
+                        "date": listed.date,
+                        "writer": listed.writer,
+                        "comment_count": listed.comment_count,
+                        "keywords": [keyword],
+                    }
+                    new_count += 1
+                elif keyword not in candidate["keywords"]:
+                    candidate["keywords"].append(keyword)
+            total_hits += len(target_links)
+            if scheduler is not None:
+                scheduler.record_search(current_club_id, keyword, new_count)
+            print(f">>> [{cafe_display_name}] 키워드: '{keyword}' -> {len(target_links)}개 (신규 {new_count}개)")
+    
+    print(f"\n[탐색] 검색 결과 {total_hits}건 → 고유 후보 {len(candidates)}개")
+    return candidates
+
+
+# ==========================================
+# [목록 프리필터] 검색/목록 페이지 정보만으로 본문 조회 전에 걸러내기
+# ==========================================
+# 규칙별로 건너뛴 글 수 = 아낀 페이지 이동(HTTP 모드는 본문 API 호출) 수
+PREFILTER_RULE_NAMES = {
+    "history": "이미 처리한 글",
+    "date": "오래된 글",
+    "banned_title": "제목 금지 키워드",
+    "own_post": "내가 쓴 글",
+    "comment_count": "댓글 많은 글",
+}
+
+
+def prefilter_candidate(candidate, banned_keywords, my_nicknames=None, max_comments=0):
+    """목록에서 읽은 제목/날짜/작성자/댓글 수로 본문을 열 필요가 없는 후보인지 판단
+    
+    목록에서 읽지 못한 값(None)에 대한 규칙은 건너뛰고, 본문 조회 후 process_article에서 다시 확인합니다.
+    
+    Args:
+        candidate: collect_cycle_candidates / collect_feed_candidates 후보
+        max_comments: 댓글이 이 수 이상인 글은 제외 (0이면 사용 안 함)
+        
+    Returns:
+        str: 걸린 규칙 이름 (PREFILTER_RULE_NAMES 키), 통과하면 None
+    """
+    date = candidate.get("date")
+    # 시각만 있는 오늘 글("14:03")은 날짜 비교 대상이 아님
+    if date and re.search(r"\d[.\-/]\s*\d", date) and not is_recent_post_date(date, min_year=2026, min_month=2):
+        return "date"
+    
+    if contains_banned_keyword(candidate.get("title", ""), "", banned_keywords):
+        return "banned_title"
+    
+    writer = (candidate.get("writer") or "").strip()
+    if writer:
+        if my_nicknames is None:
+            my_nicknames = get_my_nicknames()
+        if any(nickname and nickname.strip() == writer for nickname in my_nicknames):
+            return "own_post"
+    
+    comment_count = candidate.get("comment_count")
+    if max_comments and comment_count is not None and comment_count >= max_comments:
+        return "comment_count"
+    return None
+
+
+def log_prefilter_savings(skipped, totals=None):
+    """사이클 동안 규칙별로 아낀 페이지 이동 수 출력 (totals가 있으면 누적도 함께)"""
+    if totals is not None:
+        totals.update(skipped)
+    if not skipped and not totals:
+        return
+    summary = ", ".join(f"{PREFILTER_RULE_NAMES.get(rule, rule)} {count}" for rule, count in skipped.most_common())
+    print(f"[프리필터] 본문 조회 생략 {sum(skipped.values())}회" + (f" ({summary})" if summary else ""))
+    if totals:
+        total_summary = ", ".join(f"{PREFILTER_RULE_NAMES.get(rule, rule)} {count}" for rule, count in totals.most_common())
+        print(f"[프리필터] 누적 생략 {sum(totals.values())}회 ({total_summary})")
+
+
+# ==========================================
+# [키워드 스케줄링] 키워드별 수확률 추적 + 밴딧 방식 방문 배분
+# ==========================================
+# keyword_stats.json: {"club_id|keyword": {"searches", "new_articles", "analyzed", "generated", "updated_at"}}
+# - searches: 검색한 사이클 수, new_articles: 새 후보 수, analyzed: 본문까지 본 글, generated: 댓글 생성(non-PASS)
+# - 승인/게시율은 comment_history.json 기록의 "keywords"로 계산
+# - 카운터는 사이클마다 decay를 곱해 최근 수확률을 더 크게 반영
+KEYWORD_STATS_LOCK = threading.Lock()
+
+
+KEYWORD_DECIDED_STATUSES = ("approved", "posted", "cancelled")
+_archive_acceptance_cache = {}  # 보관 파티션 경로 → ((mtime_ns, 크기), {키워드: (승인/게시 수, 판정 수)})
+_archive_acceptance_lock = threading.Lock()
+
+
+def count_keyword_acceptance(records, acceptance=None):
+    """기록들을 키워드별 (승인/게시 수, 판정 수)에 더하기 (pending 등 판정 전 기록은 제외)"""
+    acceptance = {} if acceptance is None else acceptance
+    for item in records:
+        status = item.get("status", "")
+        if status not in KEYWORD_DECIDED_STATUSES:
+            continue
+        for keyword in item.get("keywords") or []:
+            accepted, decided = acceptance.get(keyword, (0, 0))
+            acceptance[keyword] = (accepted + (status != "cancelled"), decided + 1)
+    return acceptance
+
+
+def load_keyword_acceptance():
+    """댓글 기록에서 키워드별 (승인/게시 수, 판정 수) 집계 (pending은 제외)
+    
+    보관 파티션은 파일(mtime, 크기)이 바뀐 것만 다시 읽고(보관은 최대 1시간에 한 번, 보통 이번 달 파티션만 바뀜),
+    활성 기록은 status 인덱스로 판정된 것만 조회합니다.
+    """
+    acceptance = {}
+    try:
+        with _archive_acceptance_lock:
+            paths = list_archive_partitions(STATE_STORE.archive_dir)
+            for path in set(_archive_acceptance_cache) - set(paths):
+                del _archive_acceptance_cache[path]
+            for path in paths:
+                st = os.stat(path)
+                state = (st.st_mtime_ns, st.st_size)
+                cached = _archive_acceptance_cache.get(path)
+                if cached is None or cached[0] != state:
+                    cached = _archive_acceptance_cache[path] = (
+                        state, count_keyword_acceptance(iter_archived_comments(None, paths=[path])))
+                for keyword, (accepted, decided) in cached[1].items():
+                    total_accepted, total_decided = acceptance.get(keyword, (0, 0))
+                    acceptance[keyword] = (total_accepted + accepted, total_decided + decided)
+        count_keyword_acceptance(STATE_STORE.comments(statuses=KEYWORD_DECIDED_STATUSES), acceptance)
+    except Exception as e:
+        print(f"[키워드] 승인율 로드 실패: {e}")
+    return acceptance
+
+
+class KeywordScheduler:
+    """사이클마다 검색할 키워드와 순서를 정함
+    
+    - fixed: 기존처럼 모든 키워드를 설정 순서대로 검색
+    - bandit: UCB1 점수(평균 수확 + 탐색 보너스) 상위 keywords_per_cycle개를 점수 순으로 검색
+              한 번도 검색하지 않은 키워드는 항상 먼저 방문
+    
+    건너뛴 키워드는 워터마크가 그대로라 다음 방문 때 max_pages_per_keyword까지 밀린 글을 따라잡습니다.
+    크롤러 세션마다 하나를 만들어 사이클 사이에 유지하고(configure로 설정만 다시 반영),
+    승인/게시율(acceptance)은 bandit 모드에서만 configure 후 첫 plan 때 load_keyword_acceptance로 갱신합니다.
+    """
+
+    def __init__(self, mode="fixed", keywords_per_cycle=0, exploration=1.0, decay=0.97, stats_file=None, acceptance=None):
+        self.mode = mode
+        self.keywords_per_cycle = keywords_per_cycle
+        self.exploration = exploration
+        self.decay = decay
+        self.stats_file = stats_file or KEYWORD_STATS_FILE
+        self.stats = self.load()
+        self.acceptance = acceptance or {}
+        self._fixed_acceptance = acceptance is not None  # 테스트 등에서 직접 준 값은 갱신하지 않음
+        self._acceptance_fresh = False
+        self.touched = set()
+
+    @classmethod
+    def from_config(cls, bot_config):
+        return cls().configure(bot_config)
+
+    def configure(self, bot_config):
+        """bot_config 스케줄 설정 반영 (통계/승인율은 유지)"""
+        self.mode = bot_config.get("keyword_schedule", "fixed")
+        self.keywords_per_cycle = int(bot_config.get("keywords_per_cycle", 0) or 0)
+        self.exploration = bot_config.get("keyword_exploration", 1.0)
+        self.decay = bot_config.get("keyword_stats_decay", 0.97)
+        self._acceptance_fresh = False  # 사이클 시작마다 호출 → 승인율은 이번 사이클 첫 plan에서 한 번만 갱신
+        return self
+
+    def load(self):
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"[키워드] 통계 로드 실패 (새로 시작): {e}")
+        return {}
+
+    def _stat(self, club_id, keyword):
+        key = watermark_key(club_id, keyword)
+        self.touched.add(key)
+        return self.stats.setdefault(key, {"searches": 0, "new_articles": 0, "analyzed": 0, "generated": 0})
+
+    def score(self, club_id, keyword, total_searches):
+        """UCB1 점수: 검색 1회당 기대 수확 + 탐색 보너스 (검색 기록이 없으면 무한대)"""
+        stat = self.stats.get(watermark_key(club_id, keyword))
+        if not stat or stat.get("searches", 0) < 1e-9:
+            return float("inf")
+        searches = stat["searches"]
+        accepted, decided = self.acceptance.get(keyword, (0, 0))
+        accept_rate = (accepted + 1) / (decided + 2)  # 판정 기록이 없으면 0.5
+        # 댓글 생성이 주 보상, 승인/게시율로 가중 / 새 글 발견은 작은 보상
+        reward = (0.1 * stat.get("new_articles", 0) + 2 * accept_rate * stat.get("generated", 0)) / searches
+        bonus = self.exploration * math.sqrt(math.log(max(total_searches, 1) + 1) / searches)
+        return reward + bonus
+
+    def plan(self, club_id, keywords):
+        """이번 사이클에 검색할 키워드 목록 (순서대로 검색)"""
+        if self.mode != "bandit" or not keywords:
+            return list(keywords)
+        
+        if not self._fixed_acceptance and not self._acceptance_fresh:
+            self.acceptance = load_keyword_acceptance()
+            self._acceptance_fresh = True
+        limit = self.keywords_per_cycle or max(1, math.ceil(len(keywords) / 2))
+        total_searches = sum(self.stats.get(watermark_key(club_id, k), {}).get("searches", 0) for k in keywords)
+        ranked = sorted(keywords, key=lambda k: self.score(club_id, k, total_searches), reverse=True)
+        selected = ranked[:limit]
+        print(f"[키워드] 밴딧 스케줄: {len(keywords)}개 중 {len(selected)}개 검색 → {selected[:5]}{'...' if len(selected) > 5 else ''}")
+        return selected
+
+    def record_search(self, club_id, keyword, new_articles):
+        stat = self._stat(club_id, keyword)
+        stat["searches"] += 1
+        stat["new_articles"] += new_articles
+
+    def record_result(self, club_id, keywords, generated):
+        """본문까지 본 후보의 결과 기록 (generated: 댓글이 생성되었는지)"""
+        for keyword in keywords:
+            stat = self._stat(club_id, keyword)
+            stat["analyzed"] += 1
+            if generated:
+                stat["generated"] += 1
+
+    def end_cycle(self):
+        """이번 사이클에 갱신한 키워드에 decay 적용 후 저장 (다른 카페 스레드의 키는 파일 값 유지)"""
+        now = datetime.now().isoformat()
+        for key in self.touched:
+            stat = self.stats[key]
+            for field in ("searches", "new_articles", "analyzed", "generated"):
+                stat[field] = round(stat[field] * self.decay, 4)
+            stat["updated_at"] = now
+        
+        with KEYWORD_STATS_LOCK:
+            merged = self.load()
+            for key in self.touched:
+                merged[key] = self.stats[key]
+            tmp_file = self.stats_file + f".{os.getpid()}.tmp"
+            try:
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.stats_file)
+            except Exception as e:
+                print(f"[키워드] 통계 저장 실패: {e}")
+        self.touched = set()
+
+
+def process_article(link, title, article, banned_keywords, required_keywords=None, keywords=None):
+    """추출된 게시글 정보(dict)로 필터링 → AI 분석 → pending 저장 (브라우저/HTTP 공용)
+    
+    Args:
+        link: 게시글 URL
+        title: 목록/검색 결과에서 읽은 제목
+        article: extract_article_from_driver / CafeHttpClient.fetch_article 결과
+        banned_keywords: 금지 키워드 목록
+        required_keywords: 주어지면 제목+본문에 이 중 하나라도 있어야 분석 (게시판 피드 본문 매칭용)
+        keywords: 이 글을 찾은 검색 키워드 (히스토리에 남겨 키워드별 승인/게시율 집계에 사용)
+        
+    Returns:
+        bool: 댓글을 생성하여 대기열에 저장했으면 True
+    """
+    checked = check_article(title, article, banned_keywords, required_keywords)
+    if checked is None:
+        return False
+    content, existing_comments = checked
+    
+    result = analyze_and_generate_reply(title, content, existing_comments=existing_comments)
+    return save_generated_reply(link, title, result, keywords=keywords)
+
+
+def check_article(title, article, banned_keywords, required_keywords=None):
+    """AI 분석 전 필터 (내 댓글/날짜/검색 키워드/금지 키워드) → 통과하면 (본문, 기존 댓글 요약), 아니면 None"""
+    # ⚠️ 중요: 내 댓글이 이미 있는지 확인 (크롤링 단계 체크)
+    if has_my_comment(article.get("comment_authors", []), article.get("comment_member_ids", [])):
+        print("  -> [PASS] 이미 내 댓글이 있는 글입니다.")
+        return None
     
-    # 문자열이면 리스트로 변환
-    if isinstance(my_nicknames, str):
-        my_nicknames = [my_nicknames]
+    # ⚠️ 날짜 체크: 2026년 2월 이후 글만 처리
+    if not is_recent_post_date(article.get("date"), min_year=2026, min_month=2):
+        return None
     
-    if not my_nicknames or not any(my_nicknames):
+    content = article.get("content", "")
+    
+    # 게시판 피드: 제목에 키워드가 없던 글은 본문까지 보고 매칭
+    if required_keywords is not None and not match_keywords(title + " " + content, required_keywords):
+        print("  -> [PASS] 검색 키워드 없음")
+        return None
+    
+    # 금지 키워드 체크
+    if contains_banned_keyword(title, content, banned_keywords):
+        print(f"  -> [PASS] 금지 키워드 포함 글입니다.")
+        return None
+    
+    # 댓글 목록도 함께 전달하여 AI가 더블체크할 수 있도록 함
+    existing_comments = "\n".join([c.strip()[:100] for c in article.get("comments", [])[:10]])
+    return content, existing_comments
+
+
+def save_generated_reply(link, title, result, keywords=None):
+    """analyze_and_generate_reply 결과를 pending으로 저장 (PASS면 False)"""
+    if result is None:
+        print("  -> [PASS] (합격자/광고/무관함/이미 댓글 있음)")
+        # 이미 위에서 기록했으므로 여기서는 기록하지 않음
         return False
     
+    ai_reply, extra = result
+    print(f"  -> [작성] {ai_reply[:50]}...")
+
     try:
-        # 댓글 영역에서 닉네임 찾기
-        comment_authors = driver.find_elements(By.CSS_SELECTOR, "span.comment_nickname, a.comment_nickname, span.nick, a.nick")
-        
-        for author in comment_authors:
-            author_text = author.text.strip()
-            for nickname in my_nicknames:
-                if nickname and (nickname in author_text or author_text in nickname):
-                    print(f"  -> [Skip] 이미 내 댓글이 있음 (닉네임: {author_text})")
-                    return True
-        
-        # 추가: 댓글 작성자 링크에서 ID 확인
-        comment_author_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='memberid=']")
-        for link in comment_author_links:
-            href = link.get_attribute('href') or ''
-            if f"memberid={config.NAVER_ID}" in href:
-                print(f"  -> [Skip] 이미 내 댓글이 있음 (ID: {config.NAVER_ID})")
-                return True
-                
+        # 반자동 모드: 댓글을 실제로 달지 않고 pending 상태로 저장
+        print("  -> [대기열 추가] 댓글 생성 완료 (승인 대기)")
+        print(f"     생성된 댓글: {ai_reply[:100]}...")
+        # 히스토리에 pending 상태로 저장 (visited_history는 이미 위에서 기록됨)
+        save_comment_history(link, title, ai_reply, success=True, status="pending", keywords=keywords, **extra)
     except Exception as e:
-        print(f"  -> [경고] 댓글 확인 중 오류: {e}")
+        print(f"  -> [실패] {e}")
+        save_comment_history(link, title, ai_reply, success=False, status="pending", keywords=keywords, **extra)
+    return True
+
+
+# ==========================================
+# [파이프라인] 본문 조회와 AI/RAG 호출을 겹쳐서 처리
+# ==========================================
+# 브라우저(또는 워커 풀)가 본문을 조회하는 동안 앞서 조회한 글들은 뒤 단계에서 동시에 분석:
+#   조회(크롤러 스레드) → 필터 → Query Agent → RAG → Answer Agent → 저장
+# 단계 사이 큐는 크기가 제한되어 AI 쪽이 밀리면 조회가 기다림 (처리량 = 가장 느린 단계)
+# AI/RAG 동시 호출 수는 단계 스레드 수와 별개로 AI_CALL_LIMIT / RAG_CALL_LIMIT가 프로세스 전체에서 제한
+_PIPELINE_STOP = object()
+
+
+class StagePipeline:
+    """단계별 스레드 + 크기 제한 큐로 이어진 생산자/소비자 파이프라인
     
-    return False
+    stages: [(이름, 함수, 스레드 수)] - 함수는 앞 단계 결과 하나를 받아 다음 단계로 넘길 값을 반환 (None이면 거기서 끝)
+    단계 함수의 예외는 로그만 남기고 해당 항목을 버립니다.
+    on_discard: close(discard=True)로 처리하지 않고 버리는 항목마다 호출 (지연 재시도 대기열용)
+    """
 
+    def __init__(self, stages, queue_size=4, name="pipeline", on_discard=None):
+        self.stages = stages
+        self.name = name
+        self.on_discard = on_discard
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.threads = [[] for _ in stages]
+        self.discarding = False
+        self.started_at = None
+        self.stats = {stage_name: {"count": 0, "seconds": 0.0} for stage_name, _, _ in stages}
+        self._stats_lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.time()
+        for index, (stage_name, _, workers) in enumerate(self.stages):
+            for n in range(max(1, int(workers))):
+                thread = threading.Thread(target=self._worker, args=(index,), name=f"{self.name}-{stage_name}-{n}", daemon=True)
+                thread.start()
+                self.threads[index].append(thread)
+
+    def _worker(self, index):
+        stage_name, func, _ = self.stages[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            item = self.queues[index].get()
+            if item is _PIPELINE_STOP:
+                return
+            if self.discarding and not is_last:
+                # 종료 요청: 아직 시작 안 한 분석은 넘기고(on_discard), 이미 만든 댓글은 저장
+                if self.on_discard is not None:
+                    try:
+                        self.on_discard(item)
+                    except Exception as e:
+                        print(f"  -> [파이프라인] 중단 항목 처리 에러: {str(e)[:100]}")
+                continue
+            started = time.time()
+            try:
+                result = func(item)
+            except Exception as e:
+                print(f"  -> [파이프라인] {stage_name} 단계 에러: {str(e)[:100]}")
+                result = None
+            with self._stats_lock:
+                self.stats[stage_name]["count"] += 1
+                self.stats[stage_name]["seconds"] += time.time() - started
+            if result is not None and not is_last:
+                self.queues[index + 1].put(result)
+
+    def submit(self, item):
+        """첫 단계에 넣기 (큐가 차 있으면 자리가 날 때까지 기다림)"""
+        self.queues[0].put(item)
+
+    def close(self, discard=False):
+        """앞 단계부터 차례로 남은 항목을 처리하고 스레드 종료 (discard면 시작 안 한 분석은 버림)"""
+        self.discarding = discard
+        for index, threads in enumerate(self.threads):
+            for _ in threads:
+                self.queues[index].put(_PIPELINE_STOP)
+            for thread in threads:
+                thread.join()
+        self.log_stats()
+
+    def log_stats(self):
+        if not self.started_at or not any(stat["count"] for stat in self.stats.values()):
+            return
+        parts = [f"{stage_name} {stat['count']}건/평균 {stat['seconds'] / stat['count']:.1f}초"
+                 for stage_name, stat in self.stats.items() if stat["count"]]
+        print(f"[파이프라인] {time.time() - self.started_at:.0f}초 동안 " + ", ".join(parts))
 
-def is_already_commented(link):
-    """visited_history.txt, comment_history.json, skip_links.json에서 이미 처리한 글인지 확인"""
-    # 가실행 모드에서는 중복 체크 안 함
-    if DRY_RUN:
-        return False
+
+def build_article_pipeline(bot_config, banned_keywords, keywords, scheduler):
+    """크롤링 사이클 하나의 분석 파이프라인 (항목: {"candidate", "article"} dict)"""
+    ai_workers = bot_config.get("pipeline_ai_workers", 2)
+    rag_workers = bot_config.get("pipeline_rag_workers", 2)
+    record_lock = threading.Lock()  # 키워드 통계는 여러 단계 스레드에서 기록
     
-    # 입력 링크에서 article ID 추출
-    input_article_id = extract_article_id(link)
-    if not input_article_id:
-        # ID 추출 실패 시 원본 비교
-        input_article_id = link
+    def record_result(job, generated):
+        candidate = job["candidate"]
+        with record_lock:
+            scheduler.record_result(candidate["club_id"], candidate["keywords"], generated)
     
-    # 0. visited_history.txt 체크 (가장 먼저! - 이 파일이 가장 빠르게 기록됨)
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                for line in f:
-                    stored_url = line.strip()
-                    if not stored_url:
-                        continue
-                    stored_article_id = extract_article_id(stored_url) or stored_url
-                    if stored_article_id == input_article_id:
-                        print(f"  -> [Skip] visited_history.txt에 이미 있음")
-                        return True
-        except:
-            pass
+    def check(job):
+        candidate = job["candidate"]
+        print(f"\n[분석] [{candidate['cafe_name']}] {candidate['title'][:15]}... (키워드: {', '.join(candidate['keywords'][:5])})")
+        checked = check_article(candidate["title"], job["article"], banned_keywords,
+                                keywords if candidate.get("match_body") else None)
+        if checked is None:
+            record_result(job, False)
+            return None
+        job["content"], job["existing_comments"] = checked
+        return job
     
-    # 1. comment_history.json 체크
-    if os.path.exists(COMMENT_HISTORY_FILE):
+    def query(job):
         try:
-            with open(COMMENT_HISTORY_FILE, "r", encoding="utf-8") as f:
-                history = json.load(f)
-                for item in history:
-                    stored_url = item.get("post_url", "")
-                    stored_article_id = extract_article_id(stored_url) or stored_url
-                    
-                    # article ID로 비교 (status와 관계없이 처리된 적 있으면 스킵)
-                    # pending, approved, posted, cancelled 모두 중복으로 처리
-                    if stored_article_id == input_article_id:
-                        status = item.get("status", "unknown")
-                        print(f"  -> [Skip] comment_history.json에 이미 있음 (status: {status})")
-                        return True
-        except:
-            pass
+            job["function_calls"] = run_query_agent(job["candidate"]["title"], job["content"], job["existing_comments"])
+        except AIUnavailableError as e:
+            defer_candidate(job["candidate"], e, bot_config)
+            return None
+        if job["function_calls"] is None:
+            print(f"  -> [PASS] (합격자/광고/무관함/이미 댓글 있음) ({job['candidate']['title'][:10]}...)")
+            record_result(job, False)
+            return None
+        return job
     
-    # 2. skip_links.json 체크 (수동 스킵 링크)
-    if os.path.exists(SKIP_LINKS_FILE):
+    def rag(job):
+        job["rag_context"] = fetch_rag_context(job["function_calls"])
+        return job
+    
+    def answer(job):
         try:
-            with open(SKIP_LINKS_FILE, "r", encoding="utf-8") as f:
-                skip_links = json.load(f)
-                for item in skip_links:
-                    if item.get("article_id") == input_article_id:
-                        print(f"  -> [Skip] 수동 스킵 링크입니다.")
-                        return True
-        except:
-            pass
+            job["result"] = run_answer_agent(job["candidate"]["title"], job["content"], job["function_calls"],
+                                             job["rag_context"], existing_comments=job["existing_comments"])
+        except AIUnavailableError as e:
+            defer_candidate(job["candidate"], e, bot_config)
+            return None
+        return job
     
-    return False
+    def persist(job):
+        candidate = job["candidate"]
+        generated = save_generated_reply(candidate["link"], candidate["title"], job["result"], keywords=candidate["keywords"])
+        record_result(job, generated)
+        return None
+    
+    return StagePipeline([
+        ("필터", check, 1),
+        ("Query Agent", query, ai_workers),
+        ("RAG", rag, rag_workers),
+        ("Answer Agent", answer, ai_workers),
+        ("저장", persist, 1),
+    ], queue_size=bot_config.get("pipeline_queue_size", 4), name="analyze",
+        on_discard=lambda job: requeue_candidate(job["candidate"]))
+
 
 # ==========================================
-# [크롤러 봇] - 반자동 시스템: 댓글 생성만 하고 pending 상태로 저장
+# [지연 재시도] AI 제공자 장애로 분석하지 못한 글을 나중 사이클에서 다시 분석
 # ==========================================
-def run_search_bot():
-    """크롤러 봇: 게시글을 빠르게 탐색하고 댓글을 생성하여 pending 상태로 저장"""
+# 방문 기록은 분석 전에 남기므로(append_history) 그대로 두면 장애 중 본 글은 다시 보지 않음 →
+# AIUnavailableError가 난 후보를 deferred_articles.json에 넣어 두고, 재시도 시각이 지난 뒤 사이클에서 다시 조회/분석
+# - 재시도 간격: "deferred_retry_minutes" x 2^(시도-1), "deferred_max_attempts"번 넘게 실패하면 버림
+# - 종료 요청으로 조회/분석하지 못한 후보(워커 풀 대기 작업, 파이프라인 대기 항목)도 같은 대기열로 (바로 재시도, 횟수 제한 없음)
+DEFERRED_ARTICLES_FILE = os.path.join(CAFE_DIR, "deferred_articles.json")
+
+
+class DeferredRetryQueue:
+    """인프라 에러로 분석하지 못한 후보 대기열 (JSON 파일, 카페 스레드끼리 공유)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"[지연 재시도] 로드 실패: {e}")
+        return {}
+
+    def _save(self, items):
+        tmp_file = self.path + f".{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_file, self.path)
+
+    def push(self, candidate, reason, retry_minutes=10, max_attempts=5):
+        """후보를 대기열에 넣기 (시도 횟수 초과면 False, max_attempts=None이면 제한 없음)"""
+        attempts = candidate.get("deferred_attempts", 0) + 1
+        if max_attempts is not None and attempts > max_attempts:
+            print(f"  -> [지연 재시도] {attempts - 1}번 실패, 포기: {candidate['title'][:15]}...")
+            return False
+        item = dict(candidate)
+        item["deferred_attempts"] = attempts
+        item["deferred_reason"] = str(reason)[:200]
+        item["retry_at"] = time.time() + retry_minutes * 60 * (2 ** (attempts - 1))
+        with self._lock:
+            items = self._load()
+            items[candidate["link"]] = item
+            try:
+                self._save(items)
+            except Exception as e:
+                print(f"[지연 재시도] 저장 실패: {e}")
+                return False
+        print(f"  -> [지연 재시도] {attempts}번째 대기 ({retry_minutes * (2 ** (attempts - 1))}분 후): {candidate['title'][:15]}...")
+        return True
+
+    def pop_due(self, club_ids, now=None):
+        """재시도 시각이 지난 이 카페들의 후보를 꺼냄 (파일에서 제거)"""
+        now = now or time.time()
+        club_ids = {str(club_id) for club_id in club_ids}
+        with self._lock:
+            items = self._load()
+            due = [item for item in items.values()
+                   if str(item.get("club_id")) in club_ids and item.get("retry_at", 0) <= now]
+            if due:
+                for item in due:
+                    items.pop(item["link"], None)
+                try:
+                    self._save(items)
+                except Exception as e:
+                    print(f"[지연 재시도] 저장 실패: {e}")
+                    return []
+        return due
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+
+DEFERRED_QUEUE = DeferredRetryQueue(DEFERRED_ARTICLES_FILE)
+
+
+def defer_candidate(candidate, error, bot_config):
+    """AI 제공자 장애로 실패한 후보를 지연 재시도 대기열로"""
+    return DEFERRED_QUEUE.push(candidate, error, retry_minutes=bot_config.get("deferred_retry_minutes", 10),
+                               max_attempts=bot_config.get("deferred_max_attempts", 5))
+
+
+def requeue_candidate(candidate):
+    """종료 요청으로 조회/분석을 끝내지 못한 후보를 다음 사이클에 바로 다시 (방문 기록은 admit 때 이미 남음)"""
+    return DEFERRED_QUEUE.push(candidate, "종료 요청으로 중단", retry_minutes=0, max_attempts=None)
+
+
+def stop_requested():
+    """종료 신호/정지 플래그 확인 (플래그 파일을 본 스레드가 전체 크롤러에 종료를 전파)"""
     global should_stop
+    if should_stop:
+        return True
+    if check_stop_flag():
+        print("[봇] 정지 플래그 감지, 종료합니다.")
+        should_stop = True
+    return should_stop
+
+
+class CrawlerSession:
+    """크롤러 한 벌: 탐색/본문 조회 방식에 맞는 브라우저, HTTP 클라이언트, 워커 풀
     
-    # 설정 로드
+    탐색/본문 조회 방식은 생성 시 한 번만 결정 (브라우저 생성 여부가 달라지므로 변경 시 재시작 필요)
+    """
+
+    def __init__(self, bot_config, profile_name):
+        self.discovery_mode = bot_config.get("discovery_mode", "browser")
+        self.article_fetch_mode = bot_config.get("article_fetch_mode") or ("http" if self.discovery_mode == "http" else "browser")
+        self.use_browser = self.discovery_mode == "browser" or self.article_fetch_mode == "browser"
+        self.browser_workers = int(bot_config.get("browser_workers", 1) or 1)
+        self.profile_name = profile_name
+        # 경량 로딩 (opt-in): 크롤러 브라우저만 리소스 차단 + eager 로딩
+        self.lean = is_lean_fetch_enabled(bot_config)
+        self.chrome_options = None
+        self.driver = None
+        self.http_client = None
+        self.worker_pool = None
+        # 프리필터 규칙별 누적 생략 수 (세션 수명 동안)
+        self.prefilter_totals = collections.Counter()
+        # 키워드 스케줄러 (사이클 사이에 유지, run_crawl_cycle에서 생성)
+        self.keyword_scheduler = None
+
+    @property
+    def search_client(self):
+        """키워드 검색에 쓸 HTTP 클라이언트 (None이면 브라우저 검색)"""
+        return self.http_client if self.discovery_mode == "http" else None
+
+    @property
+    def article_client(self):
+        """본문 조회에 쓸 HTTP 클라이언트 (None이면 브라우저 조회)"""
+        return self.http_client if self.article_fetch_mode == "http" else None
+
+    def open(self):
+        """브라우저/HTTP 클라이언트 준비 및 쿠키 로그인 (실패 시 False)"""
+        print(f"[크롤러] 탐색 방식: {self.discovery_mode}, 본문 조회: {self.article_fetch_mode}")
+        if self.lean and self.use_browser:
+            print("[크롤러] 경량 로딩 사용 (이미지/폰트/광고 차단, eager 로딩)")
+        
+        if self.discovery_mode != "browser" or self.article_fetch_mode == "http":
+            self.http_client = create_cafe_http_client()
+        
+        if self.use_browser:
+            # 서버용 Headless 옵션 (PID 기반 고유 user-data-dir로 Chrome crash 방지)
+            self.chrome_options = build_crawler_chrome_options(
+                self.profile_name if HEADLESS_MODE else None, lean=self.lean
+            )
+            self.driver = create_crawler_driver(self.chrome_options, lean=self.lean)
+            # 쿠키 기반 로그인 (http 모드는 CafeHttpClient가 쿠키 파일을 직접 사용)
+            if not load_cookies(self.driver):
+                print("[봇] 로그인 실패. 종료합니다.")
+                return False
+            # 본문 조회용 브라우저 워커 풀 (bot_config "browser_workers", 1이면 기존처럼 단일 브라우저)
+            if self.browser_workers > 1 and self.article_fetch_mode == "browser":
+                self.worker_pool = BrowserWorkerPool(self.browser_workers, lean=self.lean, profile_prefix=self.profile_name)
+                self.worker_pool.start()
+        return True
+
+    def restart_driver(self):
+        """크래시난 브라우저 재시작 (재로그인 실패 시 False)"""
+        self.driver = restart_crawler_driver(self.driver, self.chrome_options, lean=self.lean)
+        return self.driver is not None
+
+    def fetch_article(self, candidate):
+        """후보 하나의 본문 조회 (HTTP 또는 메인 브라우저)"""
+        if self.article_client is not None:
+            return self.article_client.fetch_article(candidate["club_id"], candidate["article_id"])
+        return open_article_in_driver(self.driver, candidate["link"])
+
+    def close(self):
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        if self.driver is not None:
+            print("[크롤러] 브라우저 종료 중...")
+            try:
+                self.driver.quit()
+            except:
+                pass
+        
+        # Headless 모드에서 user-data-dir 정리
+        if HEADLESS_MODE and self.use_browser:
+            remove_chrome_profile(self.profile_name)
+
+
+def analyze_candidates(session, candidates, admit_candidate, analyze):
+    """후보마다 중복 체크(admit_candidate) → 본문 조회 → analyze (크롤러 스레드에서 실행)
+    
+    Returns:
+        str: "done", "stopped", "fatal"(브라우저 재시작 실패)
+    """
+    if session.worker_pool is not None:
+        # 워커 풀: 본문 조회는 워커들이 병렬로, 분석은 조회가 끝나는 순서대로
+        for candidate, article in session.worker_pool.fetch_articles(candidates.values(), admit=admit_candidate,
+                                                                     abandon=requeue_candidate, stop=stop_requested):
+            if stop_requested():
+                if article is not None:
+                    requeue_candidate(candidate)  # 조회는 끝났지만 분석 전
+                return "stopped"
+            if article is None:
+                continue
+            try:
+                analyze(candidate, article)
+            except Exception as e:
+                print(f"  -> [에러] {str(e)[:100]}")
+    else:
+        for candidate in candidates.values():
+            if stop_requested():
+                return "stopped"
+            
+            if not admit_candidate(candidate):
+                continue
+            
+            try:
+                article = session.fetch_article(candidate)
+                if article is None:
+                    continue
+                analyze(candidate, article)
+            except Exception as e:
+                err_msg = str(e)
+                print(f"  -> [에러] {err_msg[:100]}")
+                # Chrome 크래시 감지 시 재시작
+                if session.driver is not None and is_chrome_crash(err_msg):
+                    if not session.restart_driver():
+                        return "fatal"
+                    continue
+                human_pause("error")
+    return "done"
+
+
+def run_crawl_cycle(session, multi_cafes, visited_links):
+    """크롤링 한 사이클: 탐색 → 중복 체크 → 본문 조회 → 분석/저장
+    
+    Returns:
+        str: "done"(완료), "stopped"(종료 요청), "error"(브라우저 재시작 후 다음 사이클로), "fatal"(재로그인 실패)
+    """
+    # 설정 리로드 (런타임 변경 반영)
     bot_config = load_bot_config()
-    rest_minutes = bot_config.get("rest_minutes", 3)
-    print(f"[크롤러] 반자동 모드 - 댓글 생성만 하고 실제 게시하지 않음")
     
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option("useAutomationExtension", False)
+    # 키워드 로드 (매 사이클마다 새로 로드하여 실시간 반영)
+    keywords = load_keywords()
+    banned_keywords = load_banned_keywords()
+    print(f"[INFO] 검색 키워드 {len(keywords)}개, 금지 키워드 {len(banned_keywords)}개 로드됨")
+    print(f"[INFO] 크롤링 대상 카페: {[c['name'] for c in multi_cafes]}")
     
-    # 서버용 Headless 옵션
-    if HEADLESS_MODE:
-        print("[봇] Headless 모드로 실행")
+    # 증분 크롤링: 지난 사이클 이후의 새 글만 탐색 (bot_config "incremental_crawl")
+    watermarks = load_crawl_watermarks() if bot_config.get("incremental_crawl", True) else None
+    max_pages = bot_config.get("max_pages_per_keyword", 5)
+    # 키워드 스케줄 (bot_config "keyword_schedule": fixed=전체 순서대로, bandit=수확률 기반 배분)
+    # 세션 동안 하나를 유지하고 설정만 다시 반영 (승인율은 bandit 모드에서만 읽음)
+    if session.keyword_scheduler is None:
+        session.keyword_scheduler = KeywordScheduler()
+    scheduler = session.keyword_scheduler.configure(bot_config)
+    
+    # 1단계: 탐색 - 모든 카페/키워드 검색 결과를 글 단위 후보 집합으로 합침
+    try:
+        if session.discovery_mode == "feed":
+            # 게시판 피드: CAFE_MENU_IDS 게시판 최신글을 동시에 조회, 키워드는 로컬 매칭
+            candidates = collect_feed_candidates(multi_cafes, keywords, session.http_client, watermarks=watermarks,
+                                                 max_pages=max_pages, match_body=bot_config.get("feed_match_body", False))
+        else:
+            candidates = collect_cycle_candidates(multi_cafes, keywords, driver=session.driver, http_client=session.search_client,
+                                                  watermarks=watermarks, max_pages=max_pages, scheduler=scheduler)
+    except Exception:
+        if session.driver is None:
+            raise
+        return "error" if session.restart_driver() else "fatal"
+    
+    # AI 제공자 장애로 미뤄둔 글 중 재시도 시각이 된 것을 먼저 처리
+    deferred = DEFERRED_QUEUE.pop_due([cafe["club_id"] for cafe in multi_cafes])
+    if deferred:
+        print(f"[지연 재시도] 재분석 대상 {len(deferred)}개")
+        merged = {(str(item["club_id"]), item["article_id"]): item for item in deferred}
+        for key, candidate in candidates.items():
+            merged.setdefault(key, candidate)
+        candidates = merged
+    
+    # 2단계: 분석 - 고유 후보마다 한 번씩만 중복 체크/본문 조회/AI 분석
+    # 목록 프리필터 (bot_config "prefilter"): 목록 정보만으로 걸러지는 글은 본문을 열지 않음
+    use_prefilter = bot_config.get("prefilter", True)
+    max_comments = bot_config.get("prefilter_max_comments", 0)
+    my_nicknames = get_my_nicknames()
+    skipped = collections.Counter()
+    
+    def admit_candidate(candidate):
+        """본문 조회 전 중복 체크 + 목록 프리필터 + 방문 기록 (False면 건너뜀)"""
+        link = candidate["link"]
+        title = candidate["title"]
         
-        # PID 기반 고유 user-data-dir 생성 (Chrome crash 방지)
-        user_data_dir = os.path.join(SCRIPT_DIR, f"chrome_data_{os.getpid()}")
-        os.makedirs(user_data_dir, exist_ok=True)
-        print(f"[봇] Chrome user-data-dir: {user_data_dir}")
+        if candidate.get("deferred_attempts"):
+            # 지연 재시도: 방문 기록은 이미 있으므로 댓글 기록만 확인 (그사이 다른 프로세스가 처리했을 수 있음)
+            if STATE_STORE.has_article(candidate["article_id"]):
+                print(f" -> [Skip] 이미 처리한 글입니다. ({title[:10]}...)")
+                return False
+            print(f" -> [지연 재시도] {candidate['deferred_attempts']}번째 재분석 ({title[:10]}...)")
+            return True
         
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-setuid-sandbox")
-        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-        chrome_options.add_argument("--disable-background-networking")
-        chrome_options.add_argument("--disable-default-apps")
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    else:
-        chrome_options.add_argument("--start-maximized")
+        if link in visited_links:
+            print(f" -> [Skip] 방금 처리한 글입니다. ({title[:10]}...)")
+            skipped["history"] += 1
+            return False
+        
+        # 추가 중복 체크: visited_history.txt, comment_history.json, skip_links.json 모두 확인
+        if is_already_commented(link):
+            print(f" -> [Skip] 이미 처리한 글입니다. ({title[:10]}...)")
+            visited_links.add(link)
+            skipped["history"] += 1
+            return False
+        
+        if use_prefilter:
+            rule = prefilter_candidate(candidate, banned_keywords, my_nicknames, max_comments=max_comments)
+            if rule:
+                print(f" -> [Skip] {PREFILTER_RULE_NAMES[rule]} ({title[:10]}...)")
+                # 목록 정보는 바뀌지 않으므로 이번 실행 동안 다시 보지 않음 (파일 기록은 하지 않음)
+                visited_links.add(link)
+                skipped[rule] += 1
+                return False
+        
+        # ⚠️ 중요: 분석 전에 먼저 기록하여 Race Condition 방지
+        # 다른 크롤러 프로세스에서 같은 글이 동시에 처리되는 것을 방지
+        append_history(link)
+        visited_links.add(link)
+        return True
     
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    wait = WebDriverWait(driver, 10) 
+    # 분석 파이프라인 (bot_config "pipeline"): 조회는 이 스레드에서 계속, 분석/저장은 단계별 스레드에서 겹쳐서
+    pipeline = None
+    if bot_config.get("pipeline", True):
+        pipeline = build_article_pipeline(bot_config, banned_keywords, keywords, scheduler)
+        pipeline.start()
+    
+    def analyze(candidate, article):
+        if pipeline is not None:
+            pipeline.submit({"candidate": candidate, "article": article})
+            return
+        print(f"\n[분석] [{candidate['cafe_name']}] {candidate['title'][:15]}... (키워드: {', '.join(candidate['keywords'][:5])})")
+        try:
+            generated = process_article(candidate["link"], candidate["title"], article, banned_keywords,
+                                        required_keywords=keywords if candidate.get("match_body") else None,
+                                        keywords=candidate["keywords"])
+        except AIUnavailableError as e:
+            defer_candidate(candidate, e, bot_config)
+            return
+        scheduler.record_result(candidate["club_id"], candidate["keywords"], generated)
+    
+    try:
+        status = analyze_candidates(session, candidates, admit_candidate, analyze)
+    finally:
+        if pipeline is not None:
+            # 남은 분석을 마저 끝내고 종료 (종료 요청이면 시작 안 한 분석은 지연 재시도 대기열로)
+            pipeline.close(discard=stop_requested())
+    if status != "done":
+        return status
+    
+    scheduler.end_cycle()
+    log_prefilter_savings(skipped, session.prefilter_totals)
+    if stop_requested():
+        return "stopped"
+    
+    # 후보를 모두 처리한 사이클만 워터마크 전진 (중간 종료 시 남은 글을 잃지 않도록)
+    if watermarks is not None:
+        save_crawl_watermarks(watermarks)
+    return "done"
+
 
+def get_crawl_cafes():
+    """멀티 카페 설정 로드 (없으면 현재 카페만)"""
+    multi_cafes = getattr(config, "MULTI_CAFES", None)
+    if not multi_cafes:
+        multi_cafes = [{"club_id": config.CLUB_ID, "cafe_name": config.CAFE_NAME, "name": "현재카페"}]
+    return multi_cafes
+
+
+def get_cafe_rest_seconds(cafe_info, bot_config, consecutive_errors=0):
+    """카페별 휴식 간격 (cafe_info "rest_minutes" 우선) + 연속 에러 시 지수 백오프 (최대 "max_backoff_minutes")"""
+    rest_minutes = cafe_info.get("rest_minutes", bot_config.get("rest_minutes", 3)) if cafe_info else bot_config.get("rest_minutes", 3)
+    if consecutive_errors:
+        max_backoff = bot_config.get("max_backoff_minutes", 30)
+        rest_minutes = min(max(rest_minutes, 1) * (2 ** consecutive_errors), max_backoff)
+    return rest_minutes * 60
+
+
+def run_cafe_task(cafes, profile_name, visited_links, label="크롤러"):
+    """카페 묶음 하나를 자기 주기/휴식/백오프로 반복 크롤링 (단독 실행 또는 카페별 스레드)"""
+    session = CrawlerSession(load_bot_config(), profile_name)
+    consecutive_errors = 0
     try:
-        print("========== [자동 댓글 봇 (서버용)] ==========")
-        visited_links = load_history()
-        
-        # 쿠키 기반 로그인
-        if not load_cookies(driver):
-            print("[봇] 로그인 실패. 종료합니다.")
+        if not session.open():
             return
         
-        print("[크롤러] 봇 시작! (종료: Ctrl+C 또는 .stop_bot 파일 생성)")
-        print("=" * 60)
-        print("[반자동 모드] 댓글을 생성하여 대기열에 저장합니다")
-        print("=" * 60)
-
-        while not should_stop:
-            # 종료 플래그 확인
-            if check_stop_flag():
-                print("[봇] 정지 플래그 감지, 종료합니다.")
-                break
-            
-            # 설정 리로드 (런타임 변경 반영)
-            bot_config = load_bot_config()
-            rest_minutes = bot_config.get("rest_minutes", 3)
-            
-            # 검색할 게시판(메뉴) ID: 없으면 전체(0)
-            menu_ids = getattr(config, "CAFE_MENU_IDS", None) or [0]
-            if not menu_ids:
-                menu_ids = [0]
-            
-            # 키워드 로드 (매 사이클마다 새로 로드하여 실시간 반영)
-            keywords = load_keywords()
-            banned_keywords = load_banned_keywords()
-            print(f"[INFO] 검색 키워드 {len(keywords)}개, 금지 키워드 {len(banned_keywords)}개 로드됨")
-            
-            # 멀티 카페 설정 로드 (없으면 현재 카페만)
-            multi_cafes = getattr(config, "MULTI_CAFES", None)
-            if not multi_cafes:
-                multi_cafes = [{"club_id": config.CLUB_ID, "cafe_name": config.CAFE_NAME, "name": "현재카페"}]
-            
-            print(f"[INFO] 크롤링 대상 카페: {[c['name'] for c in multi_cafes]}")
-            
-            # 각 카페별로 키워드 검색
-            for cafe_info in multi_cafes:
-                if should_stop or check_stop_flag():
-                    break
-                
-                current_club_id = cafe_info["club_id"]
-                current_cafe_name = cafe_info["cafe_name"]
-                cafe_display_name = cafe_info.get("name", current_cafe_name)
-                
-                print(f"\n{'='*50}")
-                print(f"[카페] {cafe_display_name} (club_id: {current_club_id})")
-                print(f"{'='*50}")
-                
-                # 전체글보기에서만 검색 (menu_id=0)
-                for keyword in keywords:
-                    if should_stop or check_stop_flag():
-                        break
-                        
-                    try:
-                        encoded = urllib.parse.quote(keyword)
-                        search_url = f"https://cafe.naver.com/f-e/cafes/{current_club_id}/menus/0?viewType=L&ta=ARTICLE_COMMENT&page=1&q={encoded}"
-                        
-                        print(f"\n>>> [{cafe_display_name}] 키워드: '{keyword}'")
-                        driver.get(search_url)
-                        time.sleep(random.uniform(1, 2))  # 빠른 크롤링
-                        
-                        all_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/articles/') and not(contains(@class, 'comment'))]")
-                        
-                        if not all_links: continue
-
-                        target_links = []
-                        for a_tag in all_links[:50]:  # 50개 글 탐색
-                            try:
-                                raw_link = a_tag.get_attribute('href')
-                                clean_link = raw_link.split('?')[0] if '?' in raw_link else raw_link
-                                title = a_tag.text.strip()
-                                if len(title) > 1: 
-                                    target_links.append((clean_link, title))
-                            except: continue
-                        
-                        print(f" -> 대상(중복포함): {len(target_links)}개")
-
-                        for link, title in target_links:
-                            if should_stop or check_stop_flag():
-                                break
-                                
-                            if link in visited_links:
-                                print(f" -> [Skip] 방금 처리한 글입니다. ({title[:10]}...)")
-                                continue
-                            
-                            # 추가 중복 체크: visited_history.txt, comment_history.json, skip_links.json 모두 확인
-                            if is_already_commented(link):
-                                print(f" -> [Skip] 이미 처리한 글입니다. ({title[:10]}...)")
-                                visited_links.add(link)
-                                continue
-                            
-                            # ⚠️ 중요: 분석 전에 먼저 기록하여 Race Condition 방지
-                            # 다른 키워드 검색에서 같은 글이 동시에 처리되는 것을 방지
-                            append_history(link)
-                            visited_links.add(link)
-                            
-                            try:
-                                print(f"\n[분석] {title[:15]}...")
-                                driver.get(link)
-                                time.sleep(random.uniform(1, 2))  # 빠른 크롤링
-                                
-                                try: driver.switch_to.frame("cafe_main")
-                                except: pass
-
-                                # ⚠️ 중요: 내 댓글이 이미 있는지 확인 (크롤링 단계 체크)
-                                if check_my_comment_exists(driver):
-                                    print("  -> [PASS] 이미 내 댓글이 있는 글입니다.")
-                                    driver.switch_to.default_content()
-                                    continue
-                                
-                                # ⚠️ 날짜 체크: 2026년 2월 이후 글만 처리
-                                if not check_post_date(driver, min_year=2026, min_month=2):
-                                    driver.switch_to.default_content()
-                                    continue
-
-                                content = ""
-                                try: content = driver.find_element(By.CSS_SELECTOR, "div.se-main-container").text
-                                except:
-                                    try: content = driver.find_element(By.CSS_SELECTOR, "div.ContentRenderer").text
-                                    except: content = ""
-                                
-                                # 금지 키워드 체크
-                                if contains_banned_keyword(title, content, banned_keywords):
-                                    print(f"  -> [PASS] 금지 키워드 포함 글입니다.")
-                                    driver.switch_to.default_content()
-                                    continue
-                                
-                                # 댓글 목록도 함께 전달하여 AI가 더블체크할 수 있도록 함
-                                existing_comments = ""
-                                try:
-                                    comment_elements = driver.find_elements(By.CSS_SELECTOR, "span.text_comment, div.comment_text")
-                                    if comment_elements:
-                                        existing_comments = "\n".join([c.text.strip()[:100] for c in comment_elements[:10]])
-                                except:
-                                    pass
-                                
-                                result = analyze_and_generate_reply(title, content, existing_comments=existing_comments)
-                                
-                                if result is None:
-                                    print("  -> [PASS] (합격자/광고/무관함/이미 댓글 있음)")
-                                    # 이미 위에서 기록했으므로 여기서는 기록하지 않음
-                                    driver.switch_to.default_content()
-                                    continue
-                                
-                                ai_reply, extra = result
-                                print(f"  -> [작성] {ai_reply[:50]}...")
-
-                                try:
-                                    # 반자동 모드: 댓글을 실제로 달지 않고 pending 상태로 저장
-                                    print("  -> [대기열 추가] 댓글 생성 완료 (승인 대기)")
-                                    print(f"     생성된 댓글: {ai_reply[:100]}...")
-                                    # 히스토리에 pending 상태로 저장 (visited_history는 이미 위에서 기록됨)
-                                    save_comment_history(link, title, ai_reply, success=True, status="pending", **extra)
-
-                                except Exception as e:
-                                    print(f"  -> [실패] {e}")
-                                    save_comment_history(link, title, ai_reply, success=False, status="pending", **extra)
-
-                                driver.switch_to.default_content()
-
-                            except Exception as e:
-                                print(f"  -> [에러] {e}")
-                                driver.switch_to.default_content()
-                                time.sleep(2)
-
-                    except Exception as e:
-                        err_msg = str(e)
-                        print(f"  -> [키워드 에러] {err_msg[:100]}")
-                        # Chrome 크래시 감지 시 재시작
-                        if "Connection refused" in err_msg or "invalid session" in err_msg.lower():
-                            print("[경고] Chrome 크래시 감지! 브라우저 재시작...")
-                            try:
-                                driver.quit()
-                            except:
-                                pass
-                            # 새 브라우저 시작
-                            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-                            wait = WebDriverWait(driver, 10)
-                            if not load_cookies(driver):
-                                print("[에러] 재로그인 실패. 종료합니다.")
-                                return
-                            print("[복구] 브라우저 재시작 완료!")
+        while not stop_requested():
+            try:
+                status = run_crawl_cycle(session, cafes, visited_links)
+            except Exception as e:
+                print(f"\n[{label}] 사이클 예외: {e}")
+                status = "error"
             
-            if should_stop:
+            if status in ("stopped", "fatal"):
                 break
+            consecutive_errors = consecutive_errors + 1 if status == "error" else 0
             
-            # 크롤러 모드: 짧은 휴식 후 다음 사이클
-            print(f">>> 휴식 {rest_minutes}분...")
-            for _ in range(rest_minutes * 6):  # 10초 단위로 체크
-                if should_stop or check_stop_flag():
+            # 크롤러 모드: 짧은 휴식 후 다음 사이클 (에러가 이어지면 점점 길게)
+            rest_seconds = get_cafe_rest_seconds(cafes[0] if len(cafes) == 1 else None, load_bot_config(), consecutive_errors)
+            print(f">>> [{label}] 휴식 {rest_seconds / 60:.0f}분..." + (f" (연속 에러 {consecutive_errors}회)" if consecutive_errors else ""))
+            for _ in range(int(rest_seconds // 10)):  # 10초 단위로 체크
+                if stop_requested():
                     break
                 time.sleep(10)
+    finally:
+        session.close()
+
+
+def run_search_bot():
+    """크롤러 봇: 게시글을 빠르게 탐색하고 댓글을 생성하여 pending 상태로 저장
+    
+    MULTI_CAFES에 카페가 여럿이고 bot_config "parallel_cafes"가 켜져 있으면(기본값) 카페마다
+    독립된 스레드/브라우저/주기로 돌리고, AI·RAG 호출 동시성은 전역 세마포어로 공유합니다.
+    """
+    global should_stop
+    bot_config = load_bot_config()
+    print(f"[크롤러] 반자동 모드 - 댓글 생성만 하고 실제 게시하지 않음")
+    
+    try:
+        print("========== [자동 댓글 봇 (서버용)] ==========")
+        visited_links = load_history()
+        
+        print("[크롤러] 봇 시작! (종료: Ctrl+C 또는 .stop_bot 파일 생성)")
+        print("=" * 60)
+        print("[반자동 모드] 댓글을 생성하여 대기열에 저장합니다")
+        print("=" * 60)
+        
+        multi_cafes = get_crawl_cafes()
+        if len(multi_cafes) > 1 and bot_config.get("parallel_cafes", True):
+            print(f"[크롤러] 카페 {len(multi_cafes)}개 동시 크롤링")
+            threads = []
+            for i, cafe_info in enumerate(multi_cafes):
+                thread = threading.Thread(
+                    target=run_cafe_task,
+                    args=([cafe_info], f"chrome_data_{os.getpid()}_cafe{i}", visited_links, cafe_info.get("name", cafe_info["cafe_name"])),
+                    name=f"cafe-{cafe_info['club_id']}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+            while any(t.is_alive() for t in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        else:
+            run_cafe_task(multi_cafes, f"chrome_data_{os.getpid()}", visited_links)
 
     except KeyboardInterrupt:
         print("\n[크롤러] 사용자 중단")
+        should_stop = True
     except Exception as e:
         print(f"\n[크롤러] 예외 발생: {e}")
     finally:
-        print("[크롤러] 브라우저 종료 중...")
-        driver.quit()
-        
-        # Headless 모드에서 user-data-dir 정리
-        if HEADLESS_MODE:
-            user_data_dir = os.path.join(SCRIPT_DIR, f"chrome_data_{os.getpid()}")
-            if os.path.exists(user_data_dir):
-                try:
-                    import shutil
-                    shutil.rmtree(user_data_dir)
-                    print(f"[크롤러] Chrome user-data-dir 정리 완료: {user_data_dir}")
-                except Exception as e:
-                    print(f"[크롤러] Chrome user-data-dir 정리 실패: {e}")
-        
         print("[크롤러] 종료 완료")
 
 
@@ -1746,42 +5530,37 @@ def check_poster_stop_flag():
     return False
 
 def load_approved_comments():
-    """승인된 댓글 목록 로드"""
-    if not os.path.exists(COMMENT_HISTORY_FILE):
-        return []
+    """승인된 댓글 목록 로드 (status 인덱스 조회, 관리 페이지의 승인은 comment_history.json에서 반영)"""
     try:
-        with open(COMMENT_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-            return [c for c in history if c.get("status") == "approved"]
-    except:
+        return STATE_STORE.comments(statuses=("approved",))
+    except Exception as e:
+        print(f"[게시워커] 승인 목록 로드 실패: {e}")
         return []
 
 def update_comment_status(comment_id, new_status, posted_at=None, is_duplicate=False):
-    """댓글 상태 업데이트"""
-    if not os.path.exists(COMMENT_HISTORY_FILE):
-        return False
+    """댓글 상태 업데이트 (한 건만 트랜잭션으로 변경, 학습 예시 풀에도 바로 반영)"""
+    updated = []
+    
+    def apply(comment):
+        comment["status"] = new_status
+        if posted_at:
+            comment["posted_at"] = posted_at
+        if is_duplicate:
+            comment["is_duplicate"] = True
+        # action_history에 추가
+        if "action_history" not in comment:
+            comment["action_history"] = []
+        comment["action_history"].append({
+            "action": new_status,
+            "timestamp": datetime.now().isoformat()
+        })
+        updated.append(comment)
+    
     try:
-        with open(COMMENT_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-        
-        for comment in history:
-            if comment.get("id") == comment_id:
-                comment["status"] = new_status
-                if posted_at:
-                    comment["posted_at"] = posted_at
-                if is_duplicate:
-                    comment["is_duplicate"] = True
-                # action_history에 추가
-                if "action_history" not in comment:
-                    comment["action_history"] = []
-                comment["action_history"].append({
-                    "action": new_status,
-                    "timestamp": datetime.now().isoformat()
-                })
-                break
-        
-        with open(COMMENT_HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        checkpoint = TRAINING_POOL.write_checkpoint()
+        if not STATE_STORE.update_comment(comment_id, apply):
+            return False
+        TRAINING_POOL.record_labels(updated, checkpoint)
         return True
     except Exception as e:
         print(f"[게시워커] 상태 업데이트 실패: {e}")
@@ -1898,13 +5677,10 @@ def run_poster_bot_once():
                         print(f"  -> URL 변환: {converted_url}")
                     
                     driver.get(converted_url)
-                    time.sleep(3)
                     
-                    # iframe 전환
-                    try:
-                        driver.switch_to.frame("cafe_main")
-                    except:
-                        pass
+                    # iframe 전환 (준비되는 즉시)
+                    switch_to_cafe_frame(driver)
+                    wait_for_article_content(driver)
                     
                     # ⚠️ 최종 중복 체크: 실제 게시 직전에 내 댓글이 있는지 확인
                     if check_my_comment_exists(driver):
@@ -1917,14 +5693,14 @@ def run_poster_bot_once():
                     inbox = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "comment_inbox")))
                     driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", inbox)
                     inbox.click()
-                    time.sleep(1)
+                    human_pause("typing")
                     
                     try:
                         driver.find_element(By.CLASS_NAME, "comment_inbox_text").send_keys(ai_reply)
                     except:
                         driver.switch_to.active_element.send_keys(ai_reply)
                     
-                    time.sleep(1)
+                    human_pause("typing")
                     driver.find_element(By.XPATH, "//*[text()='등록']").click()
                     
                     # Alert 처리
@@ -1973,7 +5749,7 @@ def run_poster_bot_once():
                     traceback.print_exc()
                     update_comment_status(comment_id, "failed")
                     driver.switch_to.default_content()
-                    time.sleep(2)
+                    human_pause("error")
     
     except KeyboardInterrupt:
         print("\n[게시워커] 사용자 중단")
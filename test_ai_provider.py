@@ -0,0 +1,245 @@
+"""
+AI 제공자 계층(에러 분류, 백오프 재시도, 서킷 브레이커)과 지연 재시도 대기열을 검증하는 테스트.
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, ".")
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message="error"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TestClassifyAIError(unittest.TestCase):
+    """SDK 예외 → 에러 종류"""
+
+    def test_kinds(self):
+        from main import classify_ai_error
+        self.assertEqual(classify_ai_error("azure", StatusError(429)).kind, "rate_limit")
+        self.assertEqual(classify_ai_error("gemini", Exception("429 Resource has been exhausted (quota)")).kind, "rate_limit")
+        self.assertEqual(classify_ai_error("azure", TimeoutError()).kind, "timeout")
+        self.assertEqual(classify_ai_error("azure", StatusError(503)).kind, "server")
+        self.assertEqual(classify_ai_error("gemini", ValueError("finish_reason is SAFETY")).kind, "safety")
+        self.assertEqual(classify_ai_error("azure", StatusError(400, "content_filter triggered")).kind, "safety")
+        self.assertEqual(classify_ai_error("azure", StatusError(400, "bad request")).kind, "client")
+        self.assertTrue(classify_ai_error("azure", StatusError(502)).infrastructure)
+        self.assertFalse(classify_ai_error("azure", StatusError(400)).infrastructure)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """closed → open → half_open → closed"""
+
+    def test_open_half_open_close(self):
+        from main import CircuitBreaker
+        breaker = CircuitBreaker("azure", failure_threshold=2, cooldown_seconds=10)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        with patch("main.time.time", return_value=time.time() + 11):
+            self.assertTrue(breaker.allow())  # 시험 호출 하나만
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()  # 시험 실패 → 다시 열림
+        self.assertFalse(breaker.allow())
+        with patch("main.time.time", return_value=time.time() + 30):
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+
+class TestCallAIModel(unittest.TestCase):
+    """재시도/대체 제공자/장애 시 AIUnavailableError"""
+
+    def call(self, azure, gemini, attempts=3):
+        import main
+        invokers = {"azure": azure, "gemini": gemini}
+        breakers = {name: main.CircuitBreaker(name) for name in invokers}
+        config = {"ai_retry_attempts": attempts, "ai_backoff_base_seconds": 1, "ai_breaker_failures": 100}
+        with patch.dict(main.AI_PROVIDER_INVOKERS, invokers), patch.dict(main.AI_BREAKERS, breakers), \
+                patch("main.load_bot_config", return_value=config), \
+                patch("main.load_model_config", return_value="azure"), \
+                patch("main.time.sleep") as sleep:
+            self.sleeps = sleep
+            return main.call_ai_model("prompt")
+
+    def test_falls_back_to_other_provider(self):
+        def azure(*args):
+            raise StatusError(503)
+        self.assertEqual(self.call(azure, lambda *args: "ok"), "ok")
+        self.sleeps.assert_not_called()
+
+    def test_retries_then_succeeds(self):
+        calls = []
+
+        def flaky(*args):
+            calls.append(1)
+            if len(calls) < 3:
+                raise TimeoutError()
+            return "ok"
+
+        def gemini(*args):
+            raise StatusError(429)
+        self.assertEqual(self.call(flaky, gemini), "ok")
+        self.assertEqual(self.sleeps.call_count, 2)
+
+    def test_all_infrastructure_failures_raise(self):
+        import main
+
+        def down(*args):
+            raise StatusError(500)
+        with self.assertRaises(main.AIUnavailableError):
+            self.call(down, down, attempts=2)
+        self.assertEqual(self.sleeps.call_count, 1)
+
+    def test_content_error_not_retried(self):
+        def blocked(*args):
+            raise ValueError("finish_reason SAFETY")
+        self.assertIsNone(self.call(blocked, blocked))
+        self.sleeps.assert_not_called()
+
+
+class TestDeferredRetryQueue(unittest.TestCase):
+    """지연 재시도 대기열"""
+
+    def test_push_pop_due_and_give_up(self):
+        from main import DeferredRetryQueue
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = DeferredRetryQueue(os.path.join(tmp, "deferred_articles.json"))
+            candidate = {"link": "L1", "title": "제목", "club_id": 1, "article_id": "1", "keywords": ["정시"]}
+            self.assertTrue(queue.push(candidate, "down", retry_minutes=10, max_attempts=2))
+            self.assertEqual(queue.pop_due([1]), [])  # 아직 재시도 시각 전
+            due = queue.pop_due([1], now=time.time() + 601)
+            self.assertEqual([item["link"] for item in due], ["L1"])
+            self.assertEqual(len(queue), 0)
+            
+            self.assertTrue(queue.push(due[0], "down", retry_minutes=10, max_attempts=2))
+            self.assertEqual(queue.pop_due([2], now=time.time() + 10 ** 6), [])  # 다른 카페
+            again = queue.pop_due([1], now=time.time() + 10 ** 6)
+            self.assertEqual(again[0]["deferred_attempts"], 2)
+            self.assertFalse(queue.push(again[0], "down", retry_minutes=10, max_attempts=2))
+
+
+class TestHedging(unittest.TestCase):
+    """지연 분위수 기준 헤지 호출과 예산 제한"""
+
+    def test_latency_percentiles_and_deadline(self):
+        from main import AILatencyStats
+        stats = AILatencyStats()
+        for seconds in range(1, 101):
+            stats.record("azure", float(seconds))
+        self.assertEqual(stats.percentiles("azure"), {"p50": 50.0, "p95": 95.0, "p99": 99.0, "count": 100})
+        self.assertEqual(stats.deadline("azure", 95, 20), 95.0)
+        self.assertEqual(stats.deadline("gemini", 95, 20), 20)  # 표본 부족 → 기본값
+
+    def call(self, azure, gemini, calls=10, hedges=0):
+        import main
+        invokers = {"azure": azure, "gemini": gemini}
+        breakers = {name: main.CircuitBreaker(name) for name in invokers}
+        stats = main.AILatencyStats()
+        stats.calls, stats.hedges = calls, hedges
+        config = {"ai_hedging": True, "ai_hedge_default_seconds": 0.05, "ai_hedge_budget": 0.1}
+        with patch.dict(main.AI_PROVIDER_INVOKERS, invokers), patch.dict(main.AI_BREAKERS, breakers), \
+                patch("main.AI_LATENCY", stats), patch("main.ai_provider_ready", return_value=True), \
+                patch("main.load_bot_config", return_value=config), \
+                patch("main.load_model_config", return_value="azure"):
+            self.stats = stats
+            return main.call_ai_model("prompt")
+
+    def test_slow_primary_is_hedged(self):
+        def slow(*args):
+            time.sleep(1)
+            return "azure"
+        self.assertEqual(self.call(slow, lambda *args: "gemini"), "gemini")
+        self.assertEqual(self.stats.hedges, 1)
+
+    def test_budget_blocks_hedge(self):
+        def slow(*args):
+            time.sleep(0.2)
+            return "azure"
+        self.assertEqual(self.call(slow, lambda *args: "gemini", calls=0, hedges=1), "azure")
+        self.assertEqual(self.stats.hedges, 1)
+
+    def test_primary_error_falls_back_without_hedge_budget(self):
+        def down(*args):
+            raise StatusError(503)
+        self.assertEqual(self.call(down, lambda *args: "gemini", calls=0), "gemini")
+        self.assertEqual(self.stats.hedges, 0)
+
+    def test_hedge_uses_own_permit_when_call_limit_is_full(self):
+        import main
+        limits = {"ai_concurrency": 1, "ai_hedge_concurrency": 1}
+        call_limit = main.ConcurrencyLimit("ai_concurrency", 2)
+        hedge_limit = main.ConcurrencyLimit("ai_hedge_concurrency", 1)
+        def slow(*args):
+            time.sleep(1)
+            return "azure"
+        with patch.object(main.CONFIG_SERVICE, "get", return_value=limits), \
+                patch("main.AI_CALL_LIMIT", call_limit), patch("main.AI_HEDGE_LIMIT", hedge_limit):
+            self.assertEqual(self.call(slow, lambda *args: "gemini"), "gemini")
+        self.assertEqual(self.stats.hedges, 1)
+
+    def test_hedge_skipped_when_no_permit_is_free(self):
+        import main
+        limits = {"ai_concurrency": 1, "ai_hedge_concurrency": 1}
+        call_limit = main.ConcurrencyLimit("ai_concurrency", 2)
+        hedge_limit = main.ConcurrencyLimit("ai_hedge_concurrency", 1)
+        gemini_calls = []
+        def slow(*args):
+            time.sleep(0.2)
+            return "azure"
+        with patch.object(main.CONFIG_SERVICE, "get", return_value=limits), \
+                patch("main.AI_CALL_LIMIT", call_limit), patch("main.AI_HEDGE_LIMIT", hedge_limit):
+            self.assertTrue(hedge_limit.acquire(blocking=False))  # 다른 헤지가 자리를 쓰는 중
+            result = self.call(slow, lambda *args: gemini_calls.append(1) or "gemini")
+            hedge_limit.release()
+        self.assertEqual(result, "azure")
+        self.assertEqual(gemini_calls, [])
+        self.assertEqual(self.stats.hedges, 0)
+        self.assertEqual((call_limit.active, hedge_limit.active), (0, 0))
+
+    def test_skipped_hedge_keeps_fallback_provider(self):
+        import main
+        limits = {"ai_concurrency": 1, "ai_hedge_concurrency": 1}
+        call_limit = main.ConcurrencyLimit("ai_concurrency", 2)
+        hedge_limit = main.ConcurrencyLimit("ai_hedge_concurrency", 1)
+        gemini_calls = []
+        def slow_then_down(*args):
+            time.sleep(0.2)
+            raise StatusError(503)
+        with patch.object(main.CONFIG_SERVICE, "get", return_value=limits), \
+                patch("main.AI_CALL_LIMIT", call_limit), patch("main.AI_HEDGE_LIMIT", hedge_limit):
+            self.assertTrue(hedge_limit.acquire(blocking=False))  # 헤지 자리가 없어 헤지는 생략됨
+            result = self.call(slow_then_down, lambda *args: gemini_calls.append(1) or "gemini")
+            hedge_limit.release()
+        self.assertEqual(result, "gemini")
+        self.assertEqual(gemini_calls, [1])
+        self.assertEqual(self.stats.hedges, 0)
+
+
+class TestConcurrencyLimit(unittest.TestCase):
+    """설정 변경이 재시작 없이 동시 호출 한도에 반영되는지"""
+
+    def test_limit_follows_config(self):
+        import main
+        config = {"ai_concurrency": 1}
+        limit = main.ConcurrencyLimit("ai_concurrency", 2)
+        with patch.object(main.CONFIG_SERVICE, "get", side_effect=lambda path: config):
+            self.assertTrue(limit.acquire(blocking=False))
+            self.assertFalse(limit.acquire(blocking=False))
+            config = {"ai_concurrency": 2}
+            self.assertTrue(limit.acquire(blocking=False))
+            limit.release()
+            limit.release()
+        self.assertEqual(limit.active, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
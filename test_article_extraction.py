@@ -0,0 +1,52 @@
+"""
+게시글 정보 추출이 execute_script 한 번으로 끝나고, 날짜/내 댓글 체크가 그 결과로 동작하는지 검증하는 테스트.
+"""
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, ".")
+
+
+def make_driver(result):
+    driver = MagicMock()
+    driver.execute_script.return_value = result
+    return driver
+
+
+class TestArticleExtraction(unittest.TestCase):
+    """extract_article_from_driver 단일 왕복 테스트"""
+
+    def test_single_round_trip(self):
+        from main import extract_article_from_driver
+        driver = make_driver({
+            "title": "경희대 가능?",
+            "content": "11232입니다",
+            "date": "2026.02.12. 10:00",
+            "comment_authors": ["고3B"],
+            "comment_member_ids": ["student_b"],
+            "comments": ["저도 궁금"],
+        })
+        article = extract_article_from_driver(driver)
+        self.assertEqual(article["content"], "11232입니다")
+        self.assertEqual(driver.execute_script.call_count, 1)
+        driver.find_elements.assert_not_called()
+        driver.find_element.assert_not_called()
+
+    def test_checks_use_extracted_object(self):
+        from main import check_my_comment_exists, check_post_date
+        driver = make_driver({"date": "2025.12.30.", "comment_authors": ["하늘담아"], "comment_member_ids": []})
+        self.assertTrue(check_my_comment_exists(driver, my_nicknames=["하늘담아"]))
+        self.assertFalse(check_post_date(driver, min_year=2026, min_month=2))
+
+    def test_script_failure_returns_empty_article(self):
+        from main import extract_article_from_driver
+        driver = MagicMock()
+        driver.execute_script.side_effect = Exception("no such frame")
+        article = extract_article_from_driver(driver)
+        self.assertEqual(article["content"], "")
+        self.assertEqual(article["comment_authors"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+처리 기록 인덱스(ArticleIdIndex)와 세그먼트 방문 로그(VisitedLog)가
+visited_history/comment_history를 증분 반영하는지 검증하는 테스트.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, ".")
+
+
+class IndexFilesMixin:
+    """임시 CAFE_DIR에 visited/comment/index 파일 경로 준비"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.visited = os.path.join(self.tmp.name, "visited_history.txt")
+        self.comments = os.path.join(self.tmp.name, "comment_history.json")
+        self.index_file = os.path.join(self.tmp.name, "article_id_index.bin")
+        self.segments = os.path.join(self.tmp.name, "visited_segments")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self):
+        from main import ArticleIdIndex
+        return ArticleIdIndex(self.index_file, self.visited, self.comments, self.segments, initial_capacity=8)
+
+
+class TestArticleIdIndex(IndexFilesMixin, unittest.TestCase):
+    """mmap 해시 인덱스 조회/증분 동기화/재구성 테스트"""
+
+    def append_visited(self, *links):
+        with open(self.visited, "a", encoding="utf-8") as f:
+            for link in links:
+                f.write(link + "\n")
+
+    def test_reads_both_sources_and_new_appends(self):
+        self.append_visited("https://cafe.naver.com/f-e/cafes/1/articles/100")
+        with open(self.comments, "w", encoding="utf-8") as f:
+            json.dump([{"post_url": "https://cafe.naver.com/suhui/200", "status": "posted"}], f)
+        index = self.make()
+        self.assertTrue(index.contains("100"))
+        self.assertTrue(index.contains("200"))
+        self.assertFalse(index.contains("300"))
+
+        self.append_visited("https://cafe.naver.com/f-e/cafes/1/articles/300")
+        self.assertTrue(index.contains("300"))
+
+    def test_grows_and_is_shared_between_instances(self):
+        self.append_visited(*[f"https://cafe.naver.com/f-e/cafes/1/articles/{n}" for n in range(1, 40)])
+        writer = self.make()
+        self.assertEqual(len(writer), 0)
+        self.assertTrue(writer.contains("39"))
+        self.assertEqual(len(writer), 39)
+
+        # 다른 프로세스: 이미 만들어진 파일을 그대로 매핑
+        reader = self.make()
+        self.append_visited("https://cafe.naver.com/f-e/cafes/1/articles/500")
+        self.assertTrue(writer.contains("500"))
+        self.assertTrue(reader.contains("1"))
+        self.assertTrue(reader.contains("500"))
+
+    def test_truncated_history_rebuilds(self):
+        self.append_visited("https://cafe.naver.com/f-e/cafes/1/articles/100",
+                            "https://cafe.naver.com/f-e/cafes/1/articles/101")
+        index = self.make()
+        self.assertTrue(index.contains("101"))
+        with open(self.visited, "w", encoding="utf-8") as f:
+            f.write("https://cafe.naver.com/f-e/cafes/1/articles/7\n")
+        self.assertTrue(index.contains("7"))
+        self.assertFalse(index.contains("101"))
+
+
+class TestVisitedLog(IndexFilesMixin, unittest.TestCase):
+    """세그먼트 회전/압축 후에도 인덱스와 load_history 결과가 유지되는지 테스트"""
+
+    def make_log(self, index, segment_bytes=200, compact_after=2):
+        from main import VisitedLog
+        return VisitedLog(self.visited, self.segments, index=index, segment_bytes=segment_bytes, compact_after=compact_after)
+
+    def test_rotation_and_compaction_keep_every_id(self):
+        from main import list_visited_segments
+        index = self.make()
+        log = self.make_log(index)
+        links = [f"https://cafe.naver.com/f-e/cafes/1/articles/{n}" for n in range(1, 41)]
+        for link in links:
+            self.assertTrue(log.append(link))
+        self.assertFalse(log.append(links[0]))  # 같은 프로세스 중복은 기록하지 않음
+
+        self.assertLessEqual(len(list_visited_segments(self.segments)), 2)  # 압축됨
+        self.assertFalse(os.path.exists(self.visited) and os.path.getsize(self.visited) >= 200)  # 회전됨
+        self.assertEqual(self.make_log(None).load(), set(links))
+        for n in (1, 20, 40):
+            self.assertTrue(index.contains(str(n)))
+        self.assertEqual(len(index), 40)
+
+    def test_fresh_index_reads_sealed_segments(self):
+        log = self.make_log(None)
+        for n in range(1, 30):
+            log.append(f"https://cafe.naver.com/f-e/cafes/1/articles/{n}")
+        self.assertTrue(self.make().contains("3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+큰 필드(RAG 함수결과/원글)를 내용 주소 블롭으로 분리 저장하는 기능 테스트.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, ".")
+
+
+class TestBlobStore(unittest.TestCase):
+    """블롭 저장/중복 제거/기록 분리·복원 테스트"""
+
+    def setUp(self):
+        from main import BlobStore
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def blob_files(self):
+        return [name for _, _, names in os.walk(self.tmp.name) for name in names]
+
+    def test_identical_content_is_stored_once(self):
+        rag_context = "2025 정시 입결 표\n" * 500
+        ref = self.store.put(rag_context)
+        self.assertEqual(self.store.put(rag_context), ref)
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(self.store.get(ref), rag_context)
+        self.assertIsNone(self.store.get("sha256:" + "0" * 64))
+
+    def test_record_keeps_preview_and_ref(self):
+        from main import offload_record_blobs, resolve_record_blobs
+        rag_context = "건국대 입결 " * 300
+        record = {"id": "a", "post_content": "짧은 글", "function_result": rag_context}
+        offload_record_blobs(record, self.store)
+        self.assertEqual(record["post_content"], "짧은 글")  # 짧은 필드는 그대로
+        self.assertNotIn("post_content_ref", record)
+        self.assertTrue(record["function_result_ref"].startswith("sha256:"))
+        self.assertLess(len(record["function_result"]), 400)
+        self.assertEqual(resolve_record_blobs(record, self.store)["function_result"], rag_context)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+브라우저 워커 풀이 후보를 여러 워커에 나눠 조회하고 결과를 모두 돌려주는지 검증하는 테스트.
+(실제 Chrome 대신 mock 드라이버 사용)
+"""
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, ".")
+
+
+def make_candidates(n):
+    return [{"link": f"https://cafe.naver.com/f-e/cafes/1/articles/{i}", "title": f"글 {i}"} for i in range(n)]
+
+
+class TestBrowserWorkerPool(unittest.TestCase):
+    """BrowserWorkerPool 동작 테스트"""
+
+    def setUp(self):
+        patches = [
+            patch("main.webdriver.Chrome", side_effect=lambda **kwargs: MagicMock()),
+            patch("main.ChromeDriverManager"),
+            patch("main.load_cookies", return_value=True),
+            patch("main.HEADLESS_MODE", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_all_candidates_fetched_by_multiple_workers(self):
+        from main import BrowserWorkerPool
+        used_threads = set()
+
+        def fake_open(driver, link, delay_range=(1, 2)):
+            used_threads.add(threading.current_thread().name)
+            time.sleep(0.05)  # 페이지 로딩 시간
+            return {"title": link, "content": "본문"}
+
+        with patch("main.open_article_in_driver", side_effect=fake_open):
+            pool = BrowserWorkerPool(3, delay_range=(0, 0))
+            pool.start()
+            try:
+                results = list(pool.fetch_articles(make_candidates(12)))
+            finally:
+                pool.close()
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual({c["link"] for c, _ in results}, {c["link"] for c in make_candidates(12)})
+        self.assertTrue(all(article["content"] == "본문" for _, article in results))
+        self.assertGreater(len(used_threads), 1)
+
+    def test_admit_filters_before_submit(self):
+        from main import BrowserWorkerPool
+        with patch("main.open_article_in_driver", return_value={"content": ""}) as mock_open:
+            pool = BrowserWorkerPool(2, delay_range=(0, 0))
+            pool.start()
+            try:
+                results = list(pool.fetch_articles(make_candidates(6), admit=lambda c: c["title"] != "글 3"))
+            finally:
+                pool.close()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(mock_open.call_count, 5)
+
+    def test_stopping_early_hands_admitted_jobs_to_abandon(self):
+        from main import BrowserWorkerPool
+        admitted, abandoned = [], []
+
+        def admit(candidate):
+            admitted.append(candidate["link"])
+            return True
+
+        def fake_open(driver, link, delay_range=(1, 2)):
+            time.sleep(0.05)
+            return {"content": "본문"}
+
+        with patch("main.open_article_in_driver", side_effect=fake_open):
+            pool = BrowserWorkerPool(2, delay_range=(0, 0))
+            pool.start()
+            try:
+                fetched = []
+                for candidate, article in pool.fetch_articles(make_candidates(10), admit=admit,
+                                                              abandon=lambda c: abandoned.append(c["link"])):
+                    fetched.append(candidate["link"])
+                    break  # 종료 요청
+            finally:
+                pool.close()
+        # admit(방문 기록)한 글은 조회해서 돌려줬거나 abandon으로 넘어감
+        self.assertEqual(sorted(fetched + abandoned), sorted(admitted))
+        self.assertEqual(len(admitted), 4)  # 워커 수 x 2까지만 미리 올림
+
+    def test_failed_restart_returns_job_instead_of_hanging(self):
+        from main import BrowserWorkerPool
+        crash_link = make_candidates(6)[2]["link"]
+
+        def fake_open(driver, link, delay_range=(1, 2)):
+            time.sleep(0.05)
+            if link == crash_link:
+                raise RuntimeError("invalid session id")
+            return {"content": "본문"}
+
+        with patch("main.open_article_in_driver", side_effect=fake_open), \
+                patch("main.restart_crawler_driver", side_effect=RuntimeError("chrome 시작 실패")):
+            pool = BrowserWorkerPool(2, delay_range=(0, 0))
+            pool.start()
+            try:
+                results = {}
+                done = threading.Thread(target=lambda: results.update(
+                    (c["link"], a) for c, a in pool.fetch_articles(make_candidates(6))), daemon=True)
+                done.start()
+                done.join(timeout=10)
+                self.assertFalse(done.is_alive())
+            finally:
+                pool.close()
+        self.assertEqual(len(results), 6)
+        self.assertIsNone(results[crash_link])
+
+    def test_stop_ends_wait_for_stuck_workers(self):
+        from main import BrowserWorkerPool
+        release = threading.Event()
+        abandoned = []
+
+        def stuck_open(driver, link, delay_range=(1, 2)):
+            release.wait(30)
+            return {"content": "본문"}
+
+        with patch("main.open_article_in_driver", side_effect=stuck_open):
+            pool = BrowserWorkerPool(1, delay_range=(0, 0))
+            pool.start()
+            try:
+                results = list(pool.fetch_articles(make_candidates(3), abandon=lambda c: abandoned.append(c["link"]),
+                                                   stop=lambda: True))
+            finally:
+                release.set()
+                pool.close()
+        self.assertEqual(results, [])
+        self.assertEqual(len(abandoned), 2)  # 워커 1개 x 2까지만 올렸고 모두 재시도로 넘김
+
+
+if __name__ == "__main__":
+    unittest.main()
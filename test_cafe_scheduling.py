@@ -0,0 +1,48 @@
+"""
+카페별 동시 크롤링의 스케줄링(휴식/백오프)과 워터마크 병합 저장을 검증하는 테스트.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, ".")
+
+
+class TestCafeScheduling(unittest.TestCase):
+    """카페별 휴식 간격과 연속 에러 백오프 테스트"""
+
+    def test_cafe_rest_overrides_global(self):
+        from main import get_cafe_rest_seconds
+        bot_config = {"rest_minutes": 3, "max_backoff_minutes": 30}
+        self.assertEqual(get_cafe_rest_seconds({"rest_minutes": 1}, bot_config), 60)
+        self.assertEqual(get_cafe_rest_seconds({}, bot_config), 180)
+        self.assertEqual(get_cafe_rest_seconds(None, bot_config), 180)
+
+    def test_errors_back_off_exponentially_up_to_cap(self):
+        from main import get_cafe_rest_seconds
+        bot_config = {"rest_minutes": 3, "max_backoff_minutes": 30}
+        self.assertEqual(get_cafe_rest_seconds(None, bot_config, consecutive_errors=1), 6 * 60)
+        self.assertEqual(get_cafe_rest_seconds(None, bot_config, consecutive_errors=2), 12 * 60)
+        self.assertEqual(get_cafe_rest_seconds(None, bot_config, consecutive_errors=5), 30 * 60)
+
+
+class TestWatermarkMerge(unittest.TestCase):
+    """스레드별 워터마크 저장이 서로의 진행을 덮어쓰지 않는지 테스트"""
+
+    def test_save_keeps_newest_mark_per_key(self):
+        import main
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.object(main, "CRAWL_WATERMARK_FILE", os.path.join(tmp, "crawl_watermarks.json")):
+                # 카페 A 스레드 저장
+                main.save_crawl_watermarks({"1|정시": {"max_article_id": 100}})
+                # 카페 B 스레드는 사이클 시작 시점의 오래된 사본을 가지고 저장
+                main.save_crawl_watermarks({"1|정시": {"max_article_id": 90}, "2|정시": {"max_article_id": 50}})
+                saved = main.load_crawl_watermarks()
+        self.assertEqual(saved["1|정시"]["max_article_id"], 100)
+        self.assertEqual(saved["2|정시"]["max_article_id"], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+설정 서비스(ConfigService)가 파일이 바뀔 때만 다시 읽고 변경을 알리는지 검증하는 테스트.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, ".")
+
+
+class TestConfigService(unittest.TestCase):
+    """mtime 캐시/핫 리로드/불변 스냅샷 테스트"""
+
+    def setUp(self):
+        from main import ConfigService
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.tmp.name, "bot_config.json")
+        self.prompts_file = os.path.join(self.tmp.name, "bot_prompts.json")
+        self.write({"keywords": ["정시"], "rest_minutes": 3})
+        self.service = ConfigService(self.config_file, self.prompts_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data, mtime_offset=0):
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        st = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_offset))
+
+    def test_parses_only_when_file_changes(self):
+        with mock.patch("main.json.load", wraps=json.load) as json_load:
+            for _ in range(5):
+                self.assertEqual(self.service.get(self.config_file)["rest_minutes"], 3)
+            self.assertEqual(json_load.call_count, 1)
+
+            self.write({"keywords": ["정시", "수시"], "rest_minutes": 5}, mtime_offset=10 ** 9)
+            self.assertEqual(self.service.get(self.config_file)["keywords"], ("정시", "수시"))
+            self.assertEqual(json_load.call_count, 2)
+
+    def test_change_callback_and_broken_file_keeps_previous(self):
+        changes = []
+        self.service.on_change(lambda path, old, new: changes.append((old["rest_minutes"], new["rest_minutes"])))
+        self.service.get(self.config_file)
+        self.write({"rest_minutes": 7}, mtime_offset=10 ** 9)
+        self.service.get(self.config_file)
+        self.assertEqual(changes, [(3, 7)])
+
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write('{"rest_minutes": ')  # 관리 페이지가 쓰는 중
+        self.assertEqual(self.service.get(self.config_file)["rest_minutes"], 7)
+
+    def test_snapshot_is_read_only(self):
+        snapshot = self.service.snapshot()
+        with self.assertRaises(TypeError):
+            snapshot.bot_config["rest_minutes"] = 1
+        self.assertEqual(dict(snapshot.prompts), {})  # 파일이 없으면 빈 설정
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+HTTP 탐색 모드(CafeHttpClient)가 녹화된 fixture만으로 동작하는지 검증하는 테스트.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, ".")
+
+FIXTURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "cafe_api_sample.json")
+
+
+class TestHttpDiscovery(unittest.TestCase):
+    """fixture 재생 클라이언트로 검색/목록/본문 파싱 테스트"""
+
+    def setUp(self):
+        from main import FixtureCafeHttpClient
+        self.client = FixtureCafeHttpClient(FIXTURE_FILE)
+
+    def test_search_returns_tuples(self):
+        found = self.client.search("10197921", "정시")
+        self.assertEqual(len(found), 2)
+        article_id, title, date, menu_id, writer, comment_count = found[0]
+        self.assertEqual(article_id, "29430105")
+        self.assertEqual(title, "정시 11232로 경희대 가능할까요?")  # <b> 하이라이트 제거
+        self.assertTrue(date.startswith("2026.02.12"))
+        self.assertEqual(menu_id, 4427)
+        self.assertEqual((writer, comment_count), ("재수생A", 2))
+
+    def test_list_articles(self):
+        found = self.client.list_articles("10197921", 4427)
+        self.assertEqual([a.article_id for a in found], ["29430110", "29430105"])
+
+    def test_unrecorded_request_is_empty(self):
+        self.assertEqual(self.client.search("10197921", "없는키워드"), [])
+
+    def test_fetch_article(self):
+        article = self.client.fetch_article("10197921", "29430105")
+        self.assertIn("경희대 & 건국대", article["content"])
+        self.assertEqual(article["comment_authors"], ["고3B", "하늘담아"])
+        self.assertIn("horse324", article["comment_member_ids"])
+
+    def test_fetched_article_feeds_my_comment_check(self):
+        from main import has_my_comment, build_article_url, extract_article_id
+        article = self.client.fetch_article("10197921", "29430105")
+        self.assertTrue(has_my_comment(article["comment_authors"], article["comment_member_ids"], my_nicknames=["하늘담아"]))
+        self.assertEqual(extract_article_id(build_article_url("10197921", "29430105")), "29430105")
+
+    def test_cycle_candidates_are_deduplicated_across_keywords(self):
+        from main import collect_cycle_candidates
+        cafes = [{"club_id": "10197921", "cafe_name": "suhui", "name": "수만휘"}]
+        candidates = collect_cycle_candidates(cafes, ["정시", "경희대"], http_client=self.client)
+        self.assertEqual(len(candidates), 3)  # 검색 결과 4건 중 1건 중복
+        hot = candidates[("10197921", "29430105")]
+        self.assertEqual(hot["keywords"], ["정시", "경희대"])
+
+    def test_watermark_skips_seen_and_pages_forward_when_all_new(self):
+        from main import search_new_links
+        watermarks = {}
+        first = search_new_links("10197921", "정시", watermarks=watermarks, max_pages=5, http_client=self.client)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(watermarks["10197921|정시"]["max_article_id"], 29430105)
+        # 첫 실행은 1페이지만 보고 기준점만 잡음
+        self.assertEqual(self.client.requests_made, [("search", "10197921|0|정시|1")])
+
+        # 조용한 사이클: 이미 본 글뿐이라 후보 없음, 다음 페이지도 보지 않음
+        self.assertEqual(search_new_links("10197921", "정시", watermarks=watermarks, max_pages=5, http_client=self.client), [])
+        self.assertEqual(len(self.client.requests_made), 2)
+
+        # 몰린 사이클: 1페이지가 전부 새 글이면 2페이지까지 확인
+        watermarks["10197921|정시"]["max_article_id"] = 29430000
+        burst = search_new_links("10197921", "정시", watermarks=watermarks, max_pages=5, http_client=self.client)
+        self.assertEqual(len(burst), 2)
+        self.assertEqual(self.client.requests_made[-1], ("search", "10197921|0|정시|2"))
+
+    def test_truncated_burst_resumes_next_cycle_without_loss(self):
+        from main import collect_new_links, ListedArticle
+        posts = list(range(200, 100, -1))  # 최신순 article ID, 페이지당 10개
+        
+        def fetch_page(page):
+            return [ListedArticle(f"https://cafe.naver.com/f-e/cafes/1/articles/{n}", "", None)
+                    for n in posts[(page - 1) * 10:page * 10]]
+        
+        watermarks = {"1|정시": {"max_article_id": 130}}  # 131~200 (70건)이 몰림
+        collected = collect_new_links(fetch_page, "1|정시", "정시", watermarks=watermarks, max_pages=3)
+        self.assertEqual(len(collected), 30)
+        self.assertEqual(watermarks["1|정시"]["gap"], {"floor": 130, "below": 171, "page": 4})
+        
+        posts[:0] = [202, 201]  # 사이클 사이에 새 글 2건 (페이지가 밀림)
+        for _ in range(3):
+            collected += collect_new_links(fetch_page, "1|정시", "정시", watermarks=watermarks, max_pages=3)
+        ids = {int(item.link.rsplit("/", 1)[1]) for item in collected}
+        self.assertEqual(ids, set(range(131, 203)))
+        self.assertNotIn("gap", watermarks["1|정시"])
+        self.assertEqual(watermarks["1|정시"]["max_article_id"], 202)
+
+    def test_feed_candidates_match_keywords_locally(self):
+        from main import collect_feed_candidates
+        cafes = [{"club_id": "10197921", "cafe_name": "suhui", "name": "수만휘", "menu_ids": [4427]}]
+        candidates = collect_feed_candidates(cafes, ["추합", "경희대"], self.client)
+        self.assertEqual(len(candidates), 2)
+        self.assertEqual(candidates[("10197921", "29430110")]["keywords"], ["추합"])
+        # 키워드 수와 상관없이 게시판당 목록 1회만 조회
+        self.assertEqual(self.client.requests_made, [("list", "10197921|4427|1")])
+
+    def test_feed_without_title_hit_is_dropped_unless_body_matching(self):
+        from main import collect_feed_candidates
+        cafes = [{"club_id": "10197921", "cafe_name": "suhui", "name": "수만휘", "menu_ids": [4427]}]
+        self.assertEqual(len(collect_feed_candidates(cafes, ["의대"], self.client)), 0)
+        candidates = collect_feed_candidates(cafes, ["의대"], self.client, match_body=True)
+        self.assertTrue(all(c["match_body"] for c in candidates.values()))
+
+
+class TestListPrefilter(unittest.TestCase):
+    """목록 정보만으로 본문 조회 전에 거르는 규칙 테스트"""
+
+    def candidate(self, **overrides):
+        candidate = {"title": "정시 11232로 경희대 가능할까요?", "date": "2026.02.12. 09:00",
+                     "writer": "재수생A", "comment_count": 2}
+        candidate.update(overrides)
+        return candidate
+
+    def test_rules(self):
+        from main import prefilter_candidate
+        self.assertIsNone(prefilter_candidate(self.candidate(), ["광고"], ["하늘담아"]))
+        self.assertEqual(prefilter_candidate(self.candidate(date="2025.12.30."), [], ["하늘담아"]), "date")
+        self.assertEqual(prefilter_candidate(self.candidate(title="[광고] 정시 컨설팅"), ["광고"], ["하늘담아"]), "banned_title")
+        self.assertEqual(prefilter_candidate(self.candidate(writer="하늘담아"), [], ["하늘담아"]), "own_post")
+        self.assertEqual(prefilter_candidate(self.candidate(comment_count=12), [], ["하늘담아"], max_comments=10), "comment_count")
+
+    def test_unknown_list_values_pass_through(self):
+        from main import prefilter_candidate
+        candidate = self.candidate(date="14:03", writer=None, comment_count=None)
+        self.assertIsNone(prefilter_candidate(candidate, [], ["하늘담아"], max_comments=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""KeywordMatcher(Aho-Corasick) 금지/크롤링 키워드 매칭 테스트"""
+import sys
+import unittest
+
+sys.path.insert(0, ".")
+import main
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    """기존 부분 문자열 매칭과 같은 결과를 내는지 확인"""
+
+    def test_find_matches_substring_semantics(self):
+        keywords = ["he", "she", "his", "hers", "Usher", "컨설팅", "정시 컨설팅", "없는키워드"]
+        text = "USHERS 모집! 정시 컨설팅 문의"
+        expected = [k for k in keywords if k.lower() in text.lower()]
+        self.assertEqual(main.KeywordMatcher(keywords).find(text), expected)
+
+    def test_overlapping_and_suffix_patterns(self):
+        matcher = main.KeywordMatcher(["abcd", "bc", "c", "bcx"])
+        self.assertEqual(matcher.find("xabcx"), ["bc", "c", "bcx"])
+        self.assertTrue(matcher.search("zzc"))
+        self.assertFalse(matcher.search("abd"))
+
+    def test_empty_keyword_never_matches(self):
+        matcher = main.KeywordMatcher(["", "광고"])
+        self.assertFalse(matcher.search("평범한 질문 글"))
+        self.assertEqual(matcher.find("광고 글"), ["광고"])
+
+    def test_empty_keyword_keeps_original_semantics(self):
+        # 기존 동작: 빈 금지 키워드는 모든 글을 막고, 빈 크롤링 키워드는 무시
+        self.assertTrue(main.contains_banned_keyword("평범한 질문", "본문", ["", "광고"]))
+        self.assertEqual(main.find_banned_keywords("광고 글", "", ["", "광고"]), ["", "광고"])
+        self.assertEqual(main.match_keywords("정시 질문", ["", "정시"]), ["정시"])
+
+    def test_matcher_cached_per_list_until_config_change(self):
+        keywords = ["정시", "수시"]
+        matcher = main.get_keyword_matcher(keywords)
+        self.assertIs(main.get_keyword_matcher(keywords), matcher)
+        self.assertIs(main.get_keyword_matcher(list(keywords)), matcher)  # 같은 내용의 새 리스트도 재사용
+        main.clear_keyword_matchers(main.BOT_CONFIG_FILE, {}, {})
+        self.assertIsNot(main.get_keyword_matcher(keywords), matcher)
+
+    def test_matcher_follows_in_place_list_changes(self):
+        keywords = ["정시", "수시"]
+        self.assertTrue(main.contains_banned_keyword("수시 질문", "", keywords))
+        keywords.remove("수시")
+        self.assertFalse(main.contains_banned_keyword("수시 질문", "", keywords))
+        keywords[:] = ["논술"]
+        self.assertEqual(main.find_banned_keywords("논술 질문", "", keywords), ["논술"])
+
+    def test_ignore_spaces(self):
+        matcher = main.KeywordMatcher(["정시 컨설팅"], ignore_spaces=True)
+        self.assertTrue(matcher.search("정시컨설팅 받아보세요"))
+        self.assertFalse(main.KeywordMatcher(["정시 컨설팅"]).search("정시컨설팅 받아보세요"))
+
+    def test_jamo_match(self):
+        matcher = main.KeywordMatcher(["ㅈㅓㅇㅅㅣ"], jamo=True)
+        self.assertTrue(matcher.search("정시 상담"))
+        self.assertFalse(main.KeywordMatcher(["ㅈㅓㅇㅅㅣ"]).search("정시 상담"))
+
+
+if __name__ == "__main__":
+    unittest.main()
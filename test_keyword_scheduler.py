@@ -0,0 +1,87 @@
+"""
+키워드 수확률 기반 스케줄러(KeywordScheduler) 테스트.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, ".")
+
+
+class TestKeywordScheduler(unittest.TestCase):
+    """fixed/bandit 모드 키워드 선택과 통계 저장 테스트"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stats_file = os.path.join(self.tmp.name, "keyword_stats.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, **kwargs):
+        from main import KeywordScheduler
+        return KeywordScheduler(stats_file=self.stats_file, acceptance={}, **kwargs)
+
+    def test_fixed_mode_keeps_configured_order(self):
+        scheduler = self.make(mode="fixed")
+        self.assertEqual(scheduler.plan("1", ["정시", "수시", "편입"]), ["정시", "수시", "편입"])
+
+    def test_bandit_prefers_unexplored_then_high_yield(self):
+        scheduler = self.make(mode="bandit", keywords_per_cycle=2, exploration=0.1)
+        for _ in range(5):
+            scheduler.record_search("1", "정시", new_articles=3)
+            scheduler.record_result("1", ["정시"], generated=True)
+            scheduler.record_search("1", "수시", new_articles=1)
+            scheduler.record_result("1", ["수시"], generated=False)
+        # 한 번도 검색하지 않은 키워드가 먼저, 그 다음은 수확률 높은 키워드
+        self.assertEqual(scheduler.plan("1", ["수시", "정시", "편입"]), ["편입", "정시"])
+
+    def test_stats_persist_with_decay(self):
+        scheduler = self.make(mode="bandit", decay=0.5)
+        scheduler.record_search("1", "정시", new_articles=4)
+        scheduler.end_cycle()
+        reloaded = self.make(mode="bandit")
+        self.assertEqual(reloaded.stats["1|정시"]["searches"], 0.5)
+        self.assertEqual(reloaded.stats["1|정시"]["new_articles"], 2)
+
+    def test_acceptance_loaded_only_in_bandit_mode_once_per_cycle(self):
+        from unittest.mock import patch
+        from main import KeywordScheduler
+        with patch("main.KEYWORD_STATS_FILE", self.stats_file), \
+                patch("main.load_keyword_acceptance", return_value={"정시": (3, 4)}) as load:
+            scheduler = KeywordScheduler.from_config({"keyword_schedule": "fixed"})
+            scheduler.plan("1", ["정시", "수시"])
+            load.assert_not_called()  # fixed 모드는 댓글 기록을 읽지 않음
+            
+            scheduler.configure({"keyword_schedule": "bandit"})
+            scheduler.plan("1", ["정시", "수시"])
+            scheduler.plan("2", ["정시", "수시"])
+            self.assertEqual(load.call_count, 1)
+            self.assertEqual(scheduler.acceptance, {"정시": (3, 4)})
+            scheduler.configure({"keyword_schedule": "bandit"})  # 다음 사이클
+            scheduler.plan("1", ["정시", "수시"])
+            self.assertEqual(load.call_count, 2)
+
+    def test_acceptance_reuses_unchanged_archive_partitions(self):
+        import gzip
+        import json
+        from unittest.mock import patch
+        import main
+        archive_dir = os.path.join(self.tmp.name, "history_archive")
+        os.makedirs(archive_dir)
+        with gzip.open(os.path.join(archive_dir, "comments-2026-01.jsonl.gz"), "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "a", "status": "posted", "keywords": ["정시"]}) + "\n")
+            f.write(json.dumps({"id": "b", "status": "cancelled", "keywords": ["정시"]}) + "\n")
+        store = main.StateStore(os.path.join(self.tmp.name, "state.db"), os.path.join(self.tmp.name, "comment_history.json"),
+                                archive_dir=archive_dir, export_interval_seconds=0)
+        store.add_comment({"id": "c", "status": "approved", "keywords": ["정시", "수시"], "post_url": "u"})
+        store.add_comment({"id": "d", "status": "pending", "keywords": ["수시"], "post_url": "v"})
+        with patch("main.STATE_STORE", store), patch.dict(main._archive_acceptance_cache, clear=True):
+            self.assertEqual(main.load_keyword_acceptance(), {"정시": (2, 3), "수시": (1, 1)})
+            with patch("main.iter_archived_comments", side_effect=AssertionError("다시 읽음")):
+                self.assertEqual(main.load_keyword_acceptance(), {"정시": (2, 3), "수시": (1, 1)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+로컬 PASS 분류기(PassClassifier)의 학습/예측과 Query Agent 앞단 연동(shadow/on 모드)을 검증하는 테스트.
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, ".")
+
+PASS_PHRASES = ["오늘 공부 인증 ㅋㅋ", "잡담 하나만", "합격 축하해주세요", "광고 문의 주세요"]
+ASK_PHRASES = ["정시 컷 알려주세요", "수시 등급 질문", "환산점수 가능할까요", "모집인원 변동 질문"]
+
+
+def make_post(rng, phrases):
+    return " ".join(rng.choice(phrases) for _ in range(3)) + " " + "".join(rng.choice("가나다라마바사 ") for _ in range(80))
+
+
+class FakePool:
+    def __init__(self, inappropriate, good):
+        self.data = {"inappropriate": [{"post_content": t} for t in inappropriate],
+                     "good": [{"post_content": t, "comment": "답변"} for t in good], "bad": []}
+
+    def pools(self):
+        return self.data
+
+
+class TestPassClassifier(unittest.TestCase):
+    """학습/예측, 라벨 부족, 그림자 모드, on 모드 테스트"""
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.rng = rng
+        self.pool = FakePool([make_post(rng, PASS_PHRASES) for _ in range(40)],
+                             [make_post(rng, ASK_PHRASES) for _ in range(80)])
+
+    def test_separates_pass_from_questions(self):
+        from main import PassClassifier
+        classifier = PassClassifier(self.pool)
+        pass_prob = classifier.predict("잡담", make_post(self.rng, PASS_PHRASES))
+        ask_prob = classifier.predict("질문", make_post(self.rng, ASK_PHRASES))
+        self.assertGreater(pass_prob, 0.9)
+        self.assertLess(ask_prob, 0.1)
+
+    def test_not_enough_labels(self):
+        from main import PassClassifier
+        classifier = PassClassifier(FakePool(["잡담"] * 5, ["질문"] * 50))
+        self.assertIsNone(classifier.predict("잡담", ""))
+
+    def test_shadow_counts_agreement(self):
+        from main import PassClassifier
+        classifier = PassClassifier(self.pool)
+        classifier.record_shadow(0.95, 0.9, [])  # 둘 다 PASS
+        classifier.record_shadow(0.95, 0.9, [{"function": "f"}])  # 분류기만 PASS
+        classifier.record_shadow(0.1, 0.9, [{"function": "f"}])  # 둘 다 분석
+        classifier.record_shadow(0.1, 0.9, None)  # LLM 에러는 제외
+        self.assertEqual(classifier.shadow[(True, True)], 1)
+        self.assertEqual(classifier.shadow[(True, False)], 1)
+        self.assertEqual(classifier.shadow[(False, False)], 1)
+        self.assertEqual(sum(classifier.shadow.values()), 3)
+
+    def test_on_mode_skips_query_agent(self):
+        import main
+        classifier = main.PassClassifier(self.pool)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = main.QueryCache(os.path.join(tmp, "query_cache.db"))
+            with patch("main.PASS_CLASSIFIER", classifier), patch("main.QUERY_CACHE", cache), \
+                    patch("main.load_bot_config", return_value={"pass_classifier": "on", "pass_classifier_threshold": 0.9}), \
+                    patch("main.load_query_prompt", return_value="지침"), \
+                    patch("main.load_model_config", return_value="gemini"), \
+                    patch("main._generate_function_calls", return_value=[{"function": "f"}]) as generate:
+                self.assertEqual(main.generate_function_calls("잡담", make_post(self.rng, PASS_PHRASES)), [])
+                generate.assert_not_called()
+                self.assertEqual(cache.stats()["entries"], 0)  # 분류기 판단은 캐시에 넣지 않음
+                self.assertEqual(main.generate_function_calls("질문", make_post(self.rng, ASK_PHRASES)), [{"function": "f"}])
+                generate.assert_called_once()
+
+    def test_warns_once_without_numpy(self):
+        import main
+        with patch("main.np", None), patch("main.pass_classifier_warned", False), \
+                patch("main.load_bot_config", return_value={"pass_classifier": "shadow"}), \
+                patch("builtins.print") as printed:
+            main.check_pass_classifier_support()
+            main.check_pass_classifier_support()
+        self.assertEqual(printed.call_count, 1)
+        self.assertIn("numpy", printed.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Query Agent 결과 캐시(QueryCache)의 키 정규화, TTL, LRU 삭제, 적중률 통계를 검증하는 테스트.
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, ".")
+
+
+class TestQueryCache(unittest.TestCase):
+    """키 정규화 / 만료 / LRU / generate_function_calls 연동 테스트"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        from main import QueryCache
+        self.cache = QueryCache(os.path.join(self.tmp.name, "query_cache.db"), ttl_hours=1, max_entries=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_ignores_spacing_and_punctuation(self):
+        from main import QueryCache
+        a = QueryCache.make_key("정시 질문!!", "서울대  가능할까요?\n", "v1")
+        b = QueryCache.make_key("정시질문", "서울대 가능할까요 ", "v1")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, QueryCache.make_key("정시질문", "서울대 가능할까요", "v2"))
+        self.assertNotEqual(a, QueryCache.make_key("정시질문", "연세대 가능할까요", "v1"))
+
+    def test_pass_result_cached_and_stats(self):
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.put("k", [])
+        self.assertEqual(self.cache.get("k"), [])
+        stats = self.cache.stats()
+        self.assertEqual(stats["process"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+        self.assertEqual(stats["total"]["hits"], 1)
+
+    def test_ttl_expiry(self):
+        self.cache.put("k", [{"function": "f"}])
+        with patch("main.time.time", return_value=time.time() + 2 * 3600):
+            self.assertIsNone(self.cache.get("k"))
+
+    def test_lru_eviction(self):
+        now = time.time()
+        with patch("main.time.time", side_effect=[now, now + 1, now + 2, now + 3, now + 4]):
+            self.cache.put("a", [1])
+            self.cache.put("b", [2])
+            self.cache.get("a")  # a를 최근에 사용
+            self.cache.put("c", [3])  # 한도 2개 → b 삭제
+        self.assertEqual(self.cache.get("a"), [1])
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), [3])
+
+    def test_generate_function_calls_reuses_result(self):
+        import main
+        calls = [{"function": "univ_search", "params": {}}]
+        with patch("main.QUERY_CACHE", self.cache), \
+                patch("main.load_bot_config", return_value={"query_cache": True}), \
+                patch("main.load_query_prompt", return_value="지침"), \
+                patch("main.load_model_config", return_value="gemini"), \
+                patch("main._generate_function_calls", return_value=calls) as generate:
+            self.assertEqual(main.generate_function_calls("제목", "본문"), calls)
+            self.assertEqual(main.generate_function_calls("제목 ", "본문!"), calls)  # 재게시
+            self.assertEqual(generate.call_count, 1)
+            main.generate_function_calls("제목", "본문", existing_comments="하늘담아: 답변")
+            self.assertEqual(generate.call_count, 2)  # 우리 댓글이 보이면 캐시 사용 안 함
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+분석 파이프라인(StagePipeline)이 단계를 겹쳐 처리하고, 종료 시 남은 항목을 규칙대로 처리하는지 검증하는 테스트.
+"""
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, ".")
+
+
+class TestStagePipeline(unittest.TestCase):
+    """단계 겹침 / 예외 처리 / 종료 시 버리기 테스트"""
+
+    def test_throughput_limited_by_slowest_stage(self):
+        from main import StagePipeline
+        done = []
+        pipeline = StagePipeline([
+            ("a", lambda x: time.sleep(0.05) or x, 1),
+            ("b", lambda x: time.sleep(0.05) or x, 1),
+            ("c", lambda x: done.append(x), 1),
+        ], queue_size=2)
+        pipeline.start()
+        started = time.time()
+        for i in range(8):
+            pipeline.submit(i)
+        pipeline.close()
+        elapsed = time.time() - started
+        self.assertEqual(done, list(range(8)))
+        self.assertLess(elapsed, 0.7)  # 차례로면 8 x 0.1초 = 0.8초 이상
+
+    def test_stage_error_drops_item(self):
+        from main import StagePipeline
+        done = []
+
+        def fail_on_odd(x):
+            if x % 2:
+                raise ValueError("boom")
+            return x
+        pipeline = StagePipeline([("check", fail_on_odd, 2), ("save", done.append, 1)])
+        pipeline.start()
+        for i in range(6):
+            pipeline.submit(i)
+        pipeline.close()
+        self.assertEqual(sorted(done), [0, 2, 4])
+
+    def test_close_discard_keeps_finished_items(self):
+        from main import StagePipeline
+        release = threading.Event()
+        analyzed, saved, discarded = [], [], []
+
+        def slow(x):
+            release.wait(2)
+            analyzed.append(x)
+            return x
+        pipeline = StagePipeline([("ai", slow, 1), ("save", saved.append, 1)], queue_size=4, on_discard=discarded.append)
+        pipeline.start()
+        for i in range(3):
+            pipeline.submit(i)
+        time.sleep(0.05)  # 0번이 AI 단계에서 실행 중
+        closer = threading.Thread(target=pipeline.close, kwargs={"discard": True})
+        closer.start()
+        time.sleep(0.05)
+        release.set()
+        closer.join(5)
+        self.assertEqual(analyzed, [0])
+        self.assertEqual(saved, [0])
+        self.assertEqual(discarded, [1, 2])  # 버린 항목은 지연 재시도 대기열로 넘어감
+
+
+class TestArticlePipeline(unittest.TestCase):
+    """build_article_pipeline 단계 연결 테스트 (AI/RAG/저장은 패치)"""
+
+    def test_stages_feed_each_other(self):
+        import main
+        results = []
+
+        class Scheduler:
+            def record_result(self, club_id, keywords, generated):
+                results.append((keywords[0], generated))
+        candidates = [{"cafe_name": "c", "title": title, "keywords": [title], "club_id": 1, "link": f"L{title}"}
+                      for title in ("pass", "reply")]
+        with patch("main.check_article", return_value=("본문", "")), \
+                patch("main.run_query_agent", side_effect=lambda title, *a: None if title == "pass" else [{"name": "f"}]), \
+                patch("main.fetch_rag_context", return_value="rag"), \
+                patch("main.run_answer_agent", return_value=("댓글", {})), \
+                patch("main.save_generated_reply", return_value=True) as save:
+            pipeline = main.build_article_pipeline({}, [], ["pass", "reply"], Scheduler())
+            pipeline.start()
+            for candidate in candidates:
+                pipeline.submit({"candidate": candidate, "article": {}})
+            pipeline.close()
+        self.assertEqual(sorted(results), [("pass", False), ("reply", True)])
+        save.assert_called_once_with("Lreply", "reply", ("댓글", {}), keywords=["reply"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+SQLite 상태 저장소(StateStore)가 크롤러/게시 워커/관리 페이지 변경을 잃지 않는지 검증하는 테스트.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, ".")
+
+
+class TestStateStore(unittest.TestCase):
+    """댓글 기록 추가/상태 변경/JSON 내보내기·가져오기 테스트"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, "state.db")
+        self.history = os.path.join(self.tmp.name, "comment_history.json")
+        self.skip_links = os.path.join(self.tmp.name, "skip_links.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, export_interval_seconds=0):
+        from main import StateStore
+        return StateStore(self.db, self.history, self.skip_links, os.path.join(self.tmp.name, "history_archive"),
+                          export_interval_seconds=export_interval_seconds,
+                          export_request_file=os.path.join(self.tmp.name, ".export_history"))
+
+    def record(self, comment_id, article_id, status="pending", timestamp="2026-03-01T10:00:00"):
+        return {"id": comment_id, "post_url": f"https://cafe.naver.com/f-e/cafes/1/articles/{article_id}",
+                "status": status, "timestamp": timestamp, "comment": "답변", "action_history": [{"action": "created"}]}
+
+    def read_export(self):
+        with open(self.history, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_migrates_existing_json(self):
+        with open(self.history, "w", encoding="utf-8") as f:
+            json.dump([self.record("a", 100, "approved")], f)
+        with open(self.skip_links, "w", encoding="utf-8") as f:
+            json.dump([{"article_id": "555"}], f)
+        store = self.make()
+        self.assertEqual([c["id"] for c in store.comments(statuses=("approved",))], ["a"])
+        self.assertTrue(store.has_article("100"))
+        self.assertTrue(store.is_skipped("555"))
+
+    def test_crawler_and_poster_updates_do_not_overwrite_each_other(self):
+        crawler, poster = self.make(), self.make()
+        crawler.add_comment(self.record("a", 100, "approved"))
+        self.assertEqual([c["id"] for c in poster.comments(statuses=("approved",))], ["a"])
+        crawler.add_comment(self.record("b", 101))
+        self.assertTrue(poster.update_comment("a", lambda c: c.update(status="posted")))
+        exported = {c["id"]: c["status"] for c in self.read_export()}
+        self.assertEqual(exported, {"a": "posted", "b": "pending"})
+        self.assertFalse(poster.update_comment("missing", lambda c: None))
+
+    def test_admin_edits_to_export_are_imported(self):
+        store = self.make()
+        store.add_comment(self.record("a", 100))
+        history = self.read_export()
+        history[0]["status"] = "approved"
+        history[0]["action_history"].append({"action": "approved"})
+        time.sleep(0.01)  # mtime 구분
+        with open(self.history, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+        self.assertEqual([c["id"] for c in store.comments(statuses=("approved",))], ["a"])
+
+    def write_admin_edit(self, history):
+        time.sleep(0.01)  # mtime 구분
+        with open(self.history, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+
+    def test_export_is_debounced(self):
+        store = self.make(export_interval_seconds=3600)
+        store.add_comment(self.record("a", 100))
+        state = os.stat(self.history).st_mtime_ns
+        store.add_comment(self.record("b", 101))
+        self.assertTrue(store.update_comment("a", lambda c: c.update(status="posted")))
+        self.assertEqual(os.stat(self.history).st_mtime_ns, state)  # 간격 안의 쓰기는 파일을 다시 쓰지 않음
+        self.assertEqual([c["id"] for c in self.read_export()], ["a"])
+        
+        open(os.path.join(self.tmp.name, ".export_history"), "w").close()  # 관리 페이지의 즉시 내보내기 요청
+        store.comments()
+        self.assertEqual({c["id"]: c["status"] for c in self.read_export()}, {"a": "posted", "b": "pending"})
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, ".export_history")))
+        self.assertFalse(store.flush_export())  # 밀린 게 없음
+
+    def test_admin_edit_merges_with_newer_store_changes(self):
+        store = self.make(export_interval_seconds=3600)
+        store.add_comment(self.record("a", 100))
+        history = self.read_export()
+        # 내보내기 이후 게시 워커가 상태를 바꾸고 크롤러가 새 기록을 추가 (아직 파일에 없음)
+        store.update_comment("a", lambda c: (c.update(status="posted"), c["action_history"].append({"action": "posted"})))
+        store.add_comment(self.record("b", 101))
+        # 그 사이 관리 페이지는 예전 파일에서 댓글 내용만 고침
+        history[0]["comment"] = "고친 답변"
+        self.write_admin_edit(history)
+        
+        record = store.comments()[0]
+        self.assertEqual((record["comment"], record["status"]), ("고친 답변", "posted"))
+        self.assertEqual([a["action"] for a in record["action_history"]], ["created", "posted"])
+        self.assertEqual([c["id"] for c in store.comments()], ["a", "b"])  # 파일에 없던 새 기록은 유지
+
+    def test_admin_deletions_are_reconciled(self):
+        store = self.make()
+        store.add_comment(self.record("a", 100))
+        store.add_comment(self.record("b", 101))
+        self.write_admin_edit([c for c in self.read_export() if c["id"] != "a"])
+        self.assertEqual([c["id"] for c in store.comments()], ["b"])
+        self.assertFalse(store.has_article("100"))
+
+    def test_finished_records_move_to_archive_without_loss(self):
+        from datetime import datetime, timedelta
+        old = (datetime.now() - timedelta(days=30)).isoformat()
+        recent = (datetime.now() - timedelta(days=1)).isoformat()
+        store = self.make()
+        store.add_comment(self.record("old-posted", 100, "posted", old))
+        store.add_comment(self.record("old-cancelled", 101, "cancelled", old))
+        store.add_comment(self.record("old-pending", 102, "pending", old))
+        store.add_comment(self.record("recent-posted", 103, "posted", recent))
+        store.archive_now()
+
+        # 활성 기록(내보내기)은 pending과 최근 기록만
+        self.assertEqual([c["id"] for c in self.read_export()], ["old-pending", "recent-posted"])
+        # 보관된 글도 중복 체크에 걸림
+        self.assertTrue(store.has_article("100"))
+        # 보관 파티션 → 활성 기록 순서로 전부 스트리밍
+        self.assertEqual([c["id"] for c in store.iter_history()],
+                         ["old-posted", "old-cancelled", "old-pending", "recent-posted"])
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "history_archive")), [f"comments-{old[:7]}.jsonl.gz"])
+
+if __name__ == "__main__":
+    unittest.main()
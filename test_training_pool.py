@@ -0,0 +1,146 @@
+"""
+학습 예시 풀(TrainingExamplePool)이 파일이 바뀐 카페만 다시 읽고, 이 프로세스의 라벨 변경은 바로 반영하는지 검증하는 테스트.
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, ".")
+
+
+class TestTrainingExamplePool(unittest.TestCase):
+    """good / bad / inappropriate 분류, mtime 무효화, 증분 반영 테스트"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for cafe_id in ("a", "b"):
+            os.makedirs(os.path.join(self.tmp.name, cafe_id))
+        self.write_history("a", [
+            self.record("1", "posted", comment="안녕하세요\n\n본문입니다\n\n감사합니다"),
+            self.record("2", "cancelled", cancel_reason="최종답변부실"),
+            self.record("3", "pending"),
+        ])
+        self.write_history("b", [self.record("4", "cancelled", cancel_reason="부적절한 글", comment="")])
+        archive_dir = os.path.join(self.tmp.name, "b", "history_archive")
+        os.makedirs(archive_dir)
+        with gzip.open(os.path.join(archive_dir, "comments-2026-01.jsonl.gz"), "wt", encoding="utf-8") as f:
+            f.write(json.dumps(self.record("5", "approved")) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, comment_id, status, cancel_reason="", comment="답변"):
+        return {"id": comment_id, "status": status, "cancel_reason": cancel_reason,
+                "post_content": f"원글 {comment_id}", "comment": comment}
+
+    def write_history(self, cafe_id, records):
+        path = os.path.join(self.tmp.name, cafe_id, "comment_history.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # 같은 초 안에 다시 써도 mtime이 바뀌게
+
+    def make(self):
+        from main import TrainingExamplePool
+        pool = TrainingExamplePool(self.tmp.name, ["a", "b"])
+        self.loads = []
+        original = pool._load_cafe
+        pool._load_cafe = lambda cafe_id: self.loads.append(cafe_id) or original(cafe_id)
+        return pool
+
+    def contents(self, pool, name):
+        return sorted(example["post_content"] for example in pool.pools()[name])
+
+    def test_classifies_and_strips(self):
+        pool = self.make()
+        self.assertEqual(self.contents(pool, "good"), ["원글 1", "원글 5"])
+        self.assertEqual(self.contents(pool, "bad"), ["원글 2"])
+        self.assertEqual(self.contents(pool, "inappropriate"), ["원글 4"])
+        good = {ex["post_content"]: ex["comment"] for ex in pool.pools()["good"]}
+        self.assertEqual(good["원글 1"], "본문입니다")
+
+    def test_reloads_only_changed_cafe(self):
+        pool = self.make()
+        pool.pools()
+        pool.pools()
+        self.assertEqual(self.loads, ["a", "b"])
+        self.write_history("a", [self.record("1", "cancelled", cancel_reason="부적절한 글")])
+        self.assertEqual(self.contents(pool, "inappropriate"), ["원글 1", "원글 4"])
+        self.assertEqual(self.contents(pool, "good"), ["원글 5"])
+        self.assertEqual(self.loads, ["a", "b", "a"])
+
+    def test_record_labels_without_reload(self):
+        pool = self.make()
+        pool.pools()
+        cafe_dir = os.path.join(self.tmp.name, "a")
+        checkpoint = pool.write_checkpoint(cafe_dir)
+        record = self.record("3", "approved")
+        self.write_history("a", [self.record("1", "posted"), self.record("2", "cancelled", "최종답변부실"), record])
+        pool.record_labels([record], checkpoint)
+        self.assertEqual(self.contents(pool, "good"), ["원글 1", "원글 3", "원글 5"])
+        self.assertEqual(self.loads, ["a", "b"])
+
+    def test_external_edit_before_write_forces_reload(self):
+        pool = self.make()
+        pool.pools()
+        cafe_dir = os.path.join(self.tmp.name, "a")
+        self.write_history("a", [self.record("1", "cancelled", cancel_reason="부적절한 글")])  # 관리 페이지 수정
+        checkpoint = pool.write_checkpoint(cafe_dir)
+        pool.record_labels([self.record("9", "posted")], checkpoint)
+        self.assertEqual(self.contents(pool, "inappropriate"), ["원글 1", "원글 4"])
+        self.assertEqual(self.loads, ["a", "b", "a"])
+
+
+class TestSimilarExamples(unittest.TestCase):
+    """문자 n-gram TF-IDF 유사 예시 검색 테스트"""
+
+    def test_index_ranks_similar_text_first(self):
+        from main import CharNgramIndex
+        texts = ["수학 미적분 등급 올리는 방법", "서울대 정시 컷 질문", "영어 단어 외우는 법", ""]
+        index = CharNgramIndex(texts)
+        hits = index.query("정시로 서울대 가려면 컷이 몇인가요", 2)
+        self.assertEqual(hits[0][0], 1)
+        self.assertTrue(all(score > 0 for _, score in hits))
+        self.assertEqual(index.query("zzzz", 3), [])
+
+    def test_pool_similar_reuses_ngram_cache(self):
+        from main import TrainingExamplePool
+        import main
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "a"))
+            records = [{"id": str(i), "status": "posted", "post_content": text, "comment": "답변"}
+                       for i, text in enumerate(["수학 미적분 질문", "서울대 정시 컷", "영어 단어 공부"])]
+            with open(os.path.join(tmp, "a", "comment_history.json"), "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False)
+            pool = TrainingExamplePool(tmp, ["a"])
+            self.assertEqual(pool.similar("good", "정시 컷 알려주세요 서울대", 1)[0]["post_content"], "서울대 정시 컷")
+            
+            checkpoint = pool.write_checkpoint(os.path.join(tmp, "a"))
+            counted = []
+            original = main.CharNgramIndex.ngrams
+            main.CharNgramIndex.ngrams = classmethod(lambda cls, text: counted.append(text) or original(text))
+            try:
+                pool.record_labels([{"id": "9", "status": "approved", "post_content": "연세대 정시 컷", "comment": "답변"}],
+                                   checkpoint)
+                hits = pool.similar("good", "연세대 정시 컷", 2)
+            finally:
+                main.CharNgramIndex.ngrams = original
+            self.assertEqual(hits[0]["post_content"], "연세대 정시 컷")
+            self.assertEqual(counted, ["연세대 정시 컷", "연세대 정시 컷"])  # 새 라벨 + 질의만 새로 셈
+
+    def test_random_fallback_keeps_original_counts(self):
+        from unittest.mock import patch
+        import main
+        post_text, counts = main.few_shot_selection({"few_shot_retrieval": True}, "제목", "본문")
+        self.assertEqual((post_text, counts["good"]), ("제목\n본문", 4))
+        random_counts = {"good": 10, "bad": 10, "inappropriate": 20}
+        self.assertEqual(main.few_shot_selection({"few_shot_retrieval": False}, "제목", "본문"), (None, random_counts))
+        with patch("main.np", None):  # numpy 미설치
+            self.assertEqual(main.few_shot_selection({"few_shot_retrieval": True}, "제목", "본문"), (None, random_counts))
+
+
+if __name__ == "__main__":
+    unittest.main()